@@ -0,0 +1,122 @@
+"""
+Online database backups for INEX CONSULTING Bot
+Copies the live database with SQLite's backup API into rotated gzip snapshots
+"""
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config import (
+    BACKUP_DIR,
+    BACKUP_INTERVAL,
+    BACKUP_KEEP,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_PAUSE
+)
+from database import Database, db
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = 'inex_bot_'
+SNAPSHOT_SUFFIX = '.db.gz'
+
+
+class BackupManager:
+    """
+    Creates, rotates and finds database snapshots (blocking, run on the executor)
+
+    Each backup step copies at most BACKUP_PAGES_PER_STEP pages and then
+    lets writers in for BACKUP_STEP_PAUSE seconds, so registrations are
+    never held up for long while a backup runs. Snapshot names sort by
+    creation time.
+    """
+
+    def __init__(self, database: Database, directory: str = BACKUP_DIR,
+                 keep: int = BACKUP_KEEP, interval: float = BACKUP_INTERVAL):
+        self.database = database
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        # Scheduled backups and /backup must not write the same files at once
+        self._lock = threading.Lock()
+
+    def snapshots(self) -> List[str]:
+        """Paths of all snapshots, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+        ]
+        return [os.path.join(self.directory, name) for name in sorted(names, reverse=True)]
+
+    def latest(self) -> Optional[str]:
+        """Path of the newest snapshot"""
+        snapshots = self.snapshots()
+        return snapshots[0] if snapshots else None
+
+    def create(self) -> str:
+        """
+        Take a snapshot of the live database
+
+        Returns:
+            Path of the new snapshot
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+
+            name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            raw_path = os.path.join(self.directory, f'.{name}.db.tmp')
+            gzip_path = os.path.join(self.directory, f'.{name}{SNAPSHOT_SUFFIX}.tmp')
+            path = os.path.join(self.directory, f'{name}{SNAPSHOT_SUFFIX}')
+
+            started = time.monotonic()
+            try:
+                self._copy(raw_path)
+
+                with open(raw_path, 'rb') as source, gzip.open(gzip_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                # Only complete snapshots ever get the final name
+                os.replace(gzip_path, path)
+            finally:
+                for tmp_path in (raw_path, gzip_path):
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+
+            logger.info(
+                f"Backup created: {path} ({os.path.getsize(path)} bytes, "
+                f"{time.monotonic() - started:.1f}s)"
+            )
+
+            self._rotate()
+            return path
+
+    def backup_if_due(self) -> Optional[str]:
+        """Take a snapshot when the newest one is older than the backup interval"""
+        latest = self.latest()
+        if latest is not None and time.time() - os.path.getmtime(latest) < self.interval:
+            return None
+        return self.create()
+
+    def _copy(self, target_path: str):
+        """Copy the database page by page into a plain SQLite file"""
+        target = sqlite3.connect(target_path)
+        try:
+            self.database.backup(target, BACKUP_PAGES_PER_STEP, BACKUP_STEP_PAUSE)
+        finally:
+            target.close()
+
+    def _rotate(self):
+        for path in self.snapshots()[self.keep:]:
+            os.remove(path)
+            logger.info(f"Old backup removed: {path}")
+
+
+backups = BackupManager(db)
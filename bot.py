@@ -9,11 +9,16 @@ import sys
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN
-from handlers import user, admin
-from middlewares import ChannelSubscriptionMiddleware
+from backup import backups
+from broadcasts import broadcaster
+from config import BOT_TOKEN, BACKUP_INTERVAL, BACKUP_CHECK_INTERVAL, CHANNEL_MEMBER_UPDATES
+from database import async_db
+from exports import export_queue
+from fsm_storage import create_storage
+from handlers import user, admin, channel
+from middlewares import ChannelSubscriptionMiddleware, ActivityMiddleware
+from notifications import outbox
 
 # Configure logging
 logging.basicConfig(
@@ -35,11 +40,15 @@ async def main():
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
 
-    # Use memory storage for FSM
-    storage = MemoryStorage()
+    # FSM storage (SQLite by default, see FSM_STORAGE); closed by the dispatcher on shutdown
+    storage = create_storage()
     dp = Dispatcher(storage=storage)
 
     # Register middlewares
+    # Activity tracking is buffered in memory, so it adds no per-update writes
+    dp.message.outer_middleware(ActivityMiddleware())
+    dp.callback_query.outer_middleware(ActivityMiddleware())
+
     # Note: Subscription check middleware is optional and can be enabled if needed
     # dp.message.middleware(ChannelSubscriptionMiddleware())
     # dp.callback_query.middleware(ChannelSubscriptionMiddleware())
@@ -48,6 +57,22 @@ async def main():
     # IMPORTANT: Admin router must be first to handle admin states correctly
     dp.include_router(admin.router)
     dp.include_router(user.router)
+    # chat_member updates are only requested when this router is included
+    if CHANNEL_MEMBER_UPDATES:
+        dp.include_router(channel.router)
+
+    # Start database background tasks (buffered writes flushing)
+    async_db.start()
+    # Flushing and sweeping of FSM states
+    storage.start()
+    # Admin notifications queued in the outbox, including ones left from before a restart
+    outbox.start(bot)
+    # A broadcast interrupted by the last shutdown continues where it stopped
+    await broadcaster.resume(bot)
+
+    # Scheduled snapshots; checked often so restarts do not postpone them
+    if BACKUP_INTERVAL > 0:
+        async_db.start_periodic(backups.backup_if_due, BACKUP_CHECK_INTERVAL)
 
     logger.info("Bot started successfully!")
 
@@ -57,7 +82,11 @@ async def main():
     except Exception as e:
         logger.error(f"Error during polling: {e}")
     finally:
+        await broadcaster.close()
+        await outbox.close()
         await bot.session.close()
+        await export_queue.close()
+        await async_db.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,199 @@
+"""
+Broadcasts for INEX CONSULTING Bot
+Sends an announcement to every user as a resumable background job
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram import Bot
+
+from config import BROADCAST_BATCH_SIZE, BROADCAST_MAX_ATTEMPTS, BROADCAST_RETRY_DELAY, DEFAULT_LANGUAGE
+from database import AsyncDatabase, async_db
+from notifications import Notifier, notifier
+from texts import get_text
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcaster:
+    """
+    Runs one broadcast at a time in the background
+
+    Users who have not blocked the bot are read in keyset pages of
+    BROADCAST_BATCH_SIZE in user_id order. Each page is sent concurrently
+    through the rate-limited notifier, so a broadcast goes as fast as
+    Telegram's global limit allows. After every page the position and
+    counters are saved, and users who blocked the bot or deleted their
+    account are marked, in one transaction: a restart resumes after the
+    last saved page (users of the interrupted page may get the message
+    twice). Every user gets the text in their language.
+
+    A database step that fails is retried with exponential backoff; after
+    BROADCAST_MAX_ATTEMPTS failures the broadcast is marked failed and its
+    admin is told, so it never stays "running" without being sent.
+    """
+
+    def __init__(self, database: AsyncDatabase = async_db, sender: Notifier = notifier,
+                 batch_size: int = BROADCAST_BATCH_SIZE, max_attempts: int = BROADCAST_MAX_ATTEMPTS,
+                 retry_delay: float = BROADCAST_RETRY_DELAY):
+        self.database = database
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Row of the running (or last) broadcast, kept current after every page
+        self.current: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        # None, 'cancelled' (stopped by an admin) or 'closing' (shutdown, resumed later)
+        self._stop: Optional[str] = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def resume(self, bot: Bot):
+        """Continue a broadcast interrupted by a restart (call from the running event loop)"""
+        broadcast = await self.database.get_running_broadcast()
+        if broadcast is not None:
+            logger.info(f"Resuming broadcast {broadcast['id']} after user {broadcast['last_user_id']}")
+            self._launch(bot, broadcast)
+
+    async def start(self, bot: Bot, admin_id: int, texts: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Start a broadcast to all reachable users
+
+        Args:
+            texts: Language -> message text
+
+        Returns:
+            The new broadcast, or None if another one is still running
+        """
+        async with self._start_lock:
+            if self.running:
+                return None
+            broadcast = await self.database.create_broadcast(admin_id, json.dumps(texts, ensure_ascii=False))
+            if broadcast is not None:
+                self._launch(bot, broadcast)
+            return broadcast
+
+    def _launch(self, bot: Bot, broadcast: Dict[str, Any]):
+        self.current = broadcast
+        self._stop = None
+        self._task = asyncio.create_task(self._run(bot, broadcast))
+
+    def stop(self, broadcast_id: int) -> bool:
+        """Stop the running broadcast after the page being sent; False if it is not running"""
+        if not self.running or self.current['id'] != broadcast_id:
+            return False
+        self._stop = 'cancelled'
+        return True
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait up to `timeout` seconds for the broadcast to end; True if it has"""
+        if not self.running:
+            return True
+        await asyncio.wait({self._task}, timeout=timeout)
+        return self._task.done()
+
+    async def _retry(self, func, *args):
+        """Await a database call, retrying failures with exponential backoff"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await func(*args)
+            except Exception as e:
+                if attempt == self.max_attempts or self._stop == 'closing':
+                    raise
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                logger.warning(f"Broadcast step {func.__name__} failed (attempt {attempt}), retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _run(self, bot: Bot, broadcast: Dict[str, Any]):
+        texts = json.loads(broadcast['texts'])
+        try:
+            while self._stop is None:
+                users = await self._retry(
+                    self.database.get_broadcast_recipients, broadcast['last_user_id'], self.batch_size
+                )
+                if not users:
+                    break
+
+                results = await asyncio.gather(*(
+                    self.sender.send(bot, user['user_id'], texts.get(user['language'], texts[DEFAULT_LANGUAGE]))
+                    for user in users
+                ))
+                sent = sum(1 for result in results if result.ok)
+                blocked = [result.chat_id for result in results if result.blocked]
+                failed = len(results) - sent - len(blocked)
+
+                # Only the save is retried, the page is not sent again
+                await self._retry(
+                    self.database.save_broadcast_progress,
+                    broadcast['id'], users[-1]['user_id'], sent, failed, blocked
+                )
+                broadcast.update(
+                    last_user_id=users[-1]['user_id'],
+                    sent=broadcast['sent'] + sent,
+                    failed=broadcast['failed'] + failed,
+                    blocked=broadcast['blocked'] + len(blocked)
+                )
+
+            if self._stop == 'closing':
+                # Left running, the next start resumes it
+                return
+            status = self._stop or 'done'
+            await self._retry(self.database.finish_broadcast, broadcast['id'], status)
+        except Exception as e:
+            if self._stop == 'closing':
+                logger.error(f"Broadcast {broadcast['id']} interrupted by shutdown: {e}")
+                return
+            logger.error(f"Broadcast {broadcast['id']} failed: {e}", exc_info=True)
+            await self._fail(bot, broadcast)
+            return
+
+        broadcast['status'] = status
+        logger.info(
+            f"Broadcast {broadcast['id']} {status}: {broadcast['sent']} sent, "
+            f"{broadcast['failed']} failed, {broadcast['blocked']} blocked"
+        )
+
+    async def _fail(self, bot: Bot, broadcast: Dict[str, Any]):
+        """Mark the broadcast failed and tell the admin who started it"""
+        broadcast['status'] = 'failed'
+        try:
+            await self._retry(self.database.finish_broadcast, broadcast['id'], 'failed')
+        except Exception as e:
+            # Still 'running' in the database: resumed on the next start
+            logger.error(f"Could not mark broadcast {broadcast['id']} failed: {e}")
+
+        try:
+            admin = await self.database.get_user(broadcast['admin_id'])
+        except Exception:
+            admin = None
+        language = admin['language'] if admin else DEFAULT_LANGUAGE
+        await self.sender.send(
+            bot, broadcast['admin_id'], get_text('broadcast_failed', language, **broadcast_progress(broadcast))
+        )
+
+    async def close(self):
+        """Stop after the page being sent; the broadcast stays running and resumes on the next start"""
+        if self.running:
+            self._stop = 'closing'
+            await self._task
+
+
+def broadcast_progress(broadcast: Dict[str, Any]) -> Dict[str, int]:
+    """Counters of a broadcast for display"""
+    done = broadcast['sent'] + broadcast['failed'] + broadcast['blocked']
+    return {
+        'total': broadcast['total'],
+        'sent': broadcast['sent'],
+        'failed': broadcast['failed'],
+        'blocked': broadcast['blocked'],
+        'remaining': max(broadcast['total'] - done, 0),
+    }
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,110 @@
+"""
+In-process caches for INEX CONSULTING Bot
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+# Returned by TTLCache.get() when the key is not cached (None is a valid cached value)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry time-to-live
+
+    Thread-safe, so it can be shared between the event loop and
+    the database executor threads. Keeps hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Get cached value, counting a hit or a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Cache value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def update_fields(self, key: Hashable, fields: Dict[str, Any]):
+        """Merge fields into a cached dict value; other cached values are dropped"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return
+            value, expires_at = entry
+            if isinstance(value, dict):
+                self._data[key] = ({**value, **fields}, expires_at)
+            else:
+                del self._data[key]
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries, returns how many were dropped"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of unexpired (key, value) pairs, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._data.items() if expires_at > now]
+
+    def invalidate(self, key: Hashable):
+        """Drop key from the cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
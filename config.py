@@ -15,13 +15,109 @@ CHANNEL_ID = '@InEx_Operations'
 # CHANNEL_URL = 'https://t.me/man_ku_bu'
 CHANNEL_URL = 'https://t.me/InEx_Operations'
 
+# Channel membership cache: members are re-checked after SUBSCRIPTION_CACHE_TTL seconds,
+# non-members sooner (SUBSCRIPTION_NEGATIVE_TTL) so joining is noticed quickly
+SUBSCRIPTION_CACHE_TTL = float(os.getenv('SUBSCRIPTION_CACHE_TTL', '600'))
+SUBSCRIPTION_NEGATIVE_TTL = float(os.getenv('SUBSCRIPTION_NEGATIVE_TTL', '30'))
+SUBSCRIPTION_CACHE_SIZE = int(os.getenv('SUBSCRIPTION_CACHE_SIZE', '10000'))
+
+# Keep a local channel_members table from chat_member updates (the bot must be a channel admin);
+# memberships are then looked up locally and get_chat_member only seeds unknown users
+CHANNEL_MEMBER_UPDATES = os.getenv('CHANNEL_MEMBER_UPDATES', '0') == '1'
+
 # Admin IDs (Telegram user IDs)
 ADMIN_IDS = [
     int(id_) for id_ in os.getenv('ADMIN_IDS', '').split(',') if id_.strip()
 ]
 
 # Database
-DB_PATH = 'inex_bot.db'
+DB_PATH = os.getenv('DB_PATH', 'inex_bot.db')
+
+# SQLite connection tuning
+DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', '4'))
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')  # OFF, NORMAL, FULL or EXTRA
+DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', '-16000'))  # negative value = KiB
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))  # bytes
+DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', '5000'))  # milliseconds
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+
+# Buffered user profile/activity writes are flushed every N seconds
+USER_FLUSH_INTERVAL = float(os.getenv('USER_FLUSH_INTERVAL', '5'))
+
+# FSM storage: 'sqlite' keeps half-filled forms across restarts, 'memory' loses them;
+# SQLite state changes are written in one transaction every FSM_FLUSH_INTERVAL seconds
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'sqlite')
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '1'))
+# Forms untouched for FSM_STATE_TTL seconds are dropped (swept every FSM_SWEEP_INTERVAL);
+# the memory storage also keeps at most FSM_MAX_ENTRIES keys, least recently used go first
+FSM_STATE_TTL = float(os.getenv('FSM_STATE_TTL', '86400'))
+FSM_SWEEP_INTERVAL = float(os.getenv('FSM_SWEEP_INTERVAL', '300'))
+FSM_MAX_ENTRIES = int(os.getenv('FSM_MAX_ENTRIES', '10000'))
+
+# In-process cache of user rows (LRU, entries expire after TTL seconds)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '600'))
+
+# A picked meeting date is held for the user while they fill the form
+DATE_HOLD_TTL = float(os.getenv('DATE_HOLD_TTL', '900'))  # seconds
+HOLD_SWEEP_INTERVAL = float(os.getenv('HOLD_SWEEP_INTERVAL', '60'))  # seconds
+
+# Admin registrations list and search (inline results per request, Telegram allows up to 50)
+REGISTRATIONS_PAGE_SIZE = 10
+INLINE_SEARCH_PAGE_SIZE = 20
+
+# Background exports: concurrent jobs and progress message refresh (seconds)
+EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', '2'))
+EXPORT_PROGRESS_INTERVAL = float(os.getenv('EXPORT_PROGRESS_INTERVAL', '3'))
+
+# Export file formats offered to admins (styled Excel, raw gzip CSV / JSON Lines)
+EXPORT_FORMATS = ['xlsx', 'csv', 'jsonl']
+
+# Split exports: every sent file stays under the byte budget (Bot API upload limit is 50 MB),
+# exports with more rows than EXPORT_CHUNK_ROWS are built as parts on EXPORT_PART_WORKERS threads
+EXPORT_MAX_BYTES = int(os.getenv('EXPORT_MAX_BYTES', str(45 * 1024 * 1024)))
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '50000'))
+EXPORT_PART_WORKERS = int(os.getenv('EXPORT_PART_WORKERS', '2'))
+
+# Online database backups: gzip snapshots in BACKUP_DIR, the newest BACKUP_KEEP are kept
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL = float(os.getenv('BACKUP_INTERVAL', str(6 * 60 * 60)))  # seconds, 0 disables
+BACKUP_CHECK_INTERVAL = float(os.getenv('BACKUP_CHECK_INTERVAL', '300'))  # seconds
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+BACKUP_STEP_PAUSE = float(os.getenv('BACKUP_STEP_PAUSE', '0.05'))  # seconds between steps
+
+# Registrations of past meeting dates are moved to the archive every ARCHIVE_INTERVAL seconds,
+# in transactions of ARCHIVE_BATCH_SIZE rows; up to VACUUM_PAGES_PER_RUN free pages are reclaimed
+ARCHIVE_INTERVAL = float(os.getenv('ARCHIVE_INTERVAL', '3600'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+VACUUM_PAGES_PER_RUN = int(os.getenv('VACUUM_PAGES_PER_RUN', '2000'))
+
+# Outgoing messages: global and per-chat send rates (messages per second, Telegram allows
+# about 30 and 1), attempts per message and the base delay of the retry backoff (seconds)
+NOTIFY_GLOBAL_RATE = float(os.getenv('NOTIFY_GLOBAL_RATE', '25'))
+NOTIFY_CHAT_RATE = float(os.getenv('NOTIFY_CHAT_RATE', '1'))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+NOTIFY_RETRY_DELAY = float(os.getenv('NOTIFY_RETRY_DELAY', '1'))
+
+# Outbox of admin notifications: messages per delivery round, seconds between rounds,
+# rounds before a message is given up, and the base / maximum delay between rounds (seconds)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '5'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+OUTBOX_RETRY_DELAY = float(os.getenv('OUTBOX_RETRY_DELAY', '30'))
+OUTBOX_MAX_RETRY_DELAY = float(os.getenv('OUTBOX_MAX_RETRY_DELAY', '3600'))
+# Given-up messages are deleted OUTBOX_KEEP_FAILED seconds after they were queued
+OUTBOX_KEEP_FAILED = float(os.getenv('OUTBOX_KEEP_FAILED', str(30 * 24 * 60 * 60)))
+
+# Broadcasts to all users: users per page (sent concurrently, progress saved after each page)
+# and admin progress message refresh (seconds)
+BROADCAST_BATCH_SIZE = int(os.getenv('BROADCAST_BATCH_SIZE', '100'))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv('BROADCAST_PROGRESS_INTERVAL', '3'))
+# A failing database step of a broadcast is retried BROADCAST_MAX_ATTEMPTS times with
+# exponential backoff from BROADCAST_RETRY_DELAY seconds, then the broadcast is marked failed
+BROADCAST_MAX_ATTEMPTS = int(os.getenv('BROADCAST_MAX_ATTEMPTS', '5'))
+BROADCAST_RETRY_DELAY = float(os.getenv('BROADCAST_RETRY_DELAY', '2'))
 
 # Languages
 LANGUAGES = ['uz', 'ru']
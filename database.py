@@ -1,286 +1,1159 @@
 """
 SQLite Database handler for INEX CONSULTING Bot
 """
+import asyncio
+import queue
 import sqlite3
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from config import DB_PATH
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from typing import List, Optional, Dict, Any, Iterable, Iterator, NamedTuple, Tuple
+from config import (
+    DB_PATH,
+    DB_READ_POOL_SIZE,
+    DB_SYNCHRONOUS,
+    DB_CACHE_SIZE,
+    DB_MMAP_SIZE,
+    DB_BUSY_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    USER_FLUSH_INTERVAL,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+    DATE_HOLD_TTL,
+    HOLD_SWEEP_INTERVAL,
+    REGISTRATIONS_PAGE_SIZE,
+    ARCHIVE_INTERVAL,
+    ARCHIVE_BATCH_SIZE,
+    VACUUM_PAGES_PER_RUN,
+    OUTBOX_KEEP_FAILED
+)
+from cache import TTLCache, MISSING
+from migrations import migrate, enable_incremental_vacuum, find_full_scans
+from write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
+class ConnectionPool:
+    """
+    Long-lived SQLite connections: a single writer and a small pool of readers
+
+    WAL journal mode lets readers run alongside the writer, so long reads
+    (e.g. admin exports) never block registration inserts.
+    """
+
+    SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+    def __init__(self, db_path: str, read_pool_size: int = DB_READ_POOL_SIZE,
+                 synchronous: str = DB_SYNCHRONOUS, cache_size: int = DB_CACHE_SIZE,
+                 mmap_size: int = DB_MMAP_SIZE, busy_timeout: int = DB_BUSY_TIMEOUT,
+                 statement_cache_size: int = DB_STATEMENT_CACHE_SIZE):
+        synchronous = synchronous.upper()
+        if synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+
+        self.db_path = db_path
+        self.read_pool_size = max(1, read_pool_size)
+        self.pragmas = (
+            f'PRAGMA busy_timeout = {int(busy_timeout)}',
+            f'PRAGMA synchronous = {synchronous}',
+            f'PRAGMA cache_size = {int(cache_size)}',
+            f'PRAGMA mmap_size = {int(mmap_size)}',
+        )
+        self.statement_cache_size = statement_cache_size
+
+        self._write_lock = threading.RLock()
+        self.writer = self._connect()
+        self.writer.execute('PRAGMA journal_mode = WAL')
+
+        self._readers = queue.Queue()
+        for _ in range(self.read_pool_size):
+            self._readers.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection (autocommit, transactions are explicit)"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Borrow the writer connection inside an IMMEDIATE transaction"""
+        with self._write_lock:
+            conn = self.writer
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
+    @contextmanager
+    def exclusive(self):
+        """Borrow the writer connection without opening a transaction"""
+        with self._write_lock:
+            yield self.writer
+
+    @contextmanager
+    def read(self):
+        """Borrow a reader connection from the pool"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def backup(self, target: sqlite3.Connection, pages: int, pause: float = 0):
+        """
+        Online backup into target, copying at most `pages` pages per step
+
+        Runs on the writer connection and releases the write lock for
+        `pause` seconds between steps. Writes made in between go through
+        the same connection, so SQLite patches them into the copy; a copy
+        taken from another connection restarts on every concurrent write.
+        """
+        def between_steps(status: int, remaining: int, total: int):
+            if remaining:
+                self._write_lock.release()
+                try:
+                    time.sleep(pause)
+                finally:
+                    self._write_lock.acquire()
+
+        with self._write_lock:
+            self.writer.backup(target, pages=pages, progress=between_steps)
+
+    def close(self):
+        """Close all connections"""
+        with self._write_lock:
+            self.writer.close()
+        for _ in range(self.read_pool_size):
+            self._readers.get().close()
+
+
+# ========== QUERIES ==========
+# Kept as constants so that check_query_plans() covers every statement
+
+# User columns written through the write-behind buffer
+USER_BUFFERED_COLUMNS = (
+    'username', 'first_name', 'last_name', 'language', 'is_subscribed', 'last_seen_at', 'is_blocked'
+)
+
+# Columns set by touch_user; they update an existing row but never create one
+USER_ACTIVITY_COLUMNS = ('last_seen_at', 'is_blocked')
+
+# FSM record columns written through the storage write buffer
+FSM_COLUMNS = ('state', 'data')
+
+# Largest possible INTEGER PRIMARY KEY, open upper bound for id ranges
+MAX_ROWID = 2 ** 63 - 1
+
+# Row returned for users that exist only in the write buffer so far
+USER_DEFAULTS = {
+    'username': None,
+    'first_name': None,
+    'last_name': None,
+    'language': 'uz',
+    'is_subscribed': 0,
+    'created_at': None,
+    'last_seen_at': None,
+    'is_blocked': 0,
+}
+
+
+@lru_cache(maxsize=None)
+def user_upsert_sql(columns: Tuple[str, ...]) -> str:
+    """Build the upsert statement for a set of buffered user columns"""
+    assert set(columns) <= set(USER_BUFFERED_COLUMNS)
+    return f'''
+        INSERT INTO users (user_id, {', '.join(columns)})
+        VALUES (?{', ?' * len(columns)})
+        ON CONFLICT(user_id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in columns)}
+    '''
+
+
+@lru_cache(maxsize=None)
+def user_update_sql(columns: Tuple[str, ...]) -> str:
+    """Build the update statement for a set of buffered user columns (no insert)"""
+    assert set(columns) <= set(USER_BUFFERED_COLUMNS)
+    return f"UPDATE users SET {', '.join(f'{column} = ?' for column in columns)} WHERE user_id = ?"
+
+
+def is_activity_only(fields: Dict[str, Any]) -> bool:
+    """Check that buffered user fields hold nothing but activity"""
+    return set(fields) <= set(USER_ACTIVITY_COLUMNS)
+
+
+SEARCH_MAX_TERMS = 8
+
+
+def search_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix
+
+    Words are quoted, so FTS5 operators in the input are never
+    interpreted. Phones are stored as +998XXXXXXXXX, a local 9-digit
+    number gets the country code.
+
+    Returns:
+        MATCH expression, None if the text has no words
+    """
+    terms = []
+    for word in re.findall(r'\w+', text)[:SEARCH_MAX_TERMS]:
+        if word.isdigit() and len(word) == 9:
+            word = '998' + word
+        terms.append(f'"{word}"*')
+
+    return ' '.join(terms) or None
+
+
+@lru_cache(maxsize=None)
+def fsm_upsert_sql(columns: Tuple[str, ...]) -> str:
+    """Build the upsert statement for a set of buffered FSM columns"""
+    assert set(columns) <= set(FSM_COLUMNS)
+    return f'''
+        INSERT INTO fsm_states (key, updated_at{''.join(f', {column}' for column in columns)})
+        VALUES (?, ?{', ?' * len(columns)})
+        ON CONFLICT(key) DO UPDATE SET
+            {''.join(f'{column} = excluded.{column}, ' for column in columns)}updated_at = excluded.updated_at
+    '''
+
+
+GET_FSM_RECORD_SQL = 'SELECT state, data FROM fsm_states WHERE key = ?'
+
+# A finished conversation leaves no row behind
+DELETE_EMPTY_FSM_RECORD_SQL = "DELETE FROM fsm_states WHERE key = ? AND state IS NULL AND data = '{}'"
+
+DELETE_EXPIRED_FSM_RECORDS_SQL = 'DELETE FROM fsm_states WHERE updated_at < ?'
+
+# Maintained by triggers, see migration 14
+COUNT_FSM_RECORDS_SQL = "SELECT value as count FROM stats_counters WHERE scope = 'fsm' AND key = 'states'"
+
+GET_CHANNEL_MEMBER_SQL = 'SELECT status FROM channel_members WHERE user_id = ?'
+
+SET_CHANNEL_MEMBER_SQL = '''
+    INSERT INTO channel_members (user_id, status, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id) DO UPDATE SET
+        status = excluded.status,
+        updated_at = excluded.updated_at
+'''
+
+ENQUEUE_OUTBOX_SQL = '''
+    INSERT INTO outbox (chat_id, text, reply_markup, next_attempt_at)
+    VALUES (?, ?, ?, ?)
+'''
+
+GET_DUE_OUTBOX_SQL = '''
+    SELECT id, chat_id, text, reply_markup, attempts
+    FROM outbox
+    WHERE next_attempt_at <= ?
+    ORDER BY next_attempt_at
+    LIMIT ?
+'''
+
+DELETE_OUTBOX_SQL = 'DELETE FROM outbox WHERE id = ?'
+
+# A NULL next_attempt_at means delivery was given up
+RESCHEDULE_OUTBOX_SQL = '''
+    UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+    WHERE id = ?
+'''
+
+COUNT_FAILED_OUTBOX_SQL = 'SELECT COUNT(*) as count FROM outbox WHERE next_attempt_at IS NULL'
+
+DELETE_FAILED_OUTBOX_SQL = 'DELETE FROM outbox WHERE next_attempt_at IS NULL AND created_at < ?'
+
+# Keyset page of users a broadcast can reach
+GET_BROADCAST_RECIPIENTS_SQL = '''
+    SELECT user_id, language
+    FROM users
+    WHERE is_blocked = 0 AND user_id > ?
+    ORDER BY user_id
+    LIMIT ?
+'''
+
+COUNT_REACHABLE_USERS_SQL = 'SELECT COUNT(*) as count FROM users WHERE is_blocked = 0'
+
+MARK_USER_BLOCKED_SQL = 'UPDATE users SET is_blocked = 1 WHERE user_id = ?'
+
+CREATE_BROADCAST_SQL = 'INSERT INTO broadcasts (admin_id, texts, total) VALUES (?, ?, ?)'
+
+GET_BROADCAST_SQL = 'SELECT * FROM broadcasts WHERE id = ?'
+
+GET_RUNNING_BROADCAST_SQL = "SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id LIMIT 1"
+
+SAVE_BROADCAST_PROGRESS_SQL = '''
+    UPDATE broadcasts
+    SET last_user_id = ?, sent = sent + ?, failed = failed + ?, blocked = blocked + ?
+    WHERE id = ?
+'''
+
+FINISH_BROADCAST_SQL = '''
+    UPDATE broadcasts SET status = ?, finished_at = CURRENT_TIMESTAMP
+    WHERE id = ? AND status = 'running'
+'''
+
+GET_USER_SQL = 'SELECT * FROM users WHERE user_id = ?'
+
+COUNT_ACTIVE_USERS_SQL = 'SELECT COUNT(*) as count FROM users WHERE last_seen_at >= ?'
+
+ADD_MEETING_DATE_SQL = 'INSERT INTO meeting_dates (date) VALUES (?)'
+
+GET_ACTIVE_MEETING_DATES_SQL = '''
+    SELECT date FROM meeting_dates
+    WHERE is_active = 1
+    ORDER BY date
+'''
+
+# Every active date with its booked flag and current hold in one pass
+GET_MEETING_DATES_SNAPSHOT_SQL = '''
+    SELECT md.date,
+           EXISTS (
+               SELECT 1 FROM registrations r WHERE r.meeting_date = md.date
+           ) AS is_booked,
+           h.user_id AS hold_user_id,
+           h.expires_at AS hold_expires_at
+    FROM meeting_dates md
+    LEFT JOIN date_holds h ON h.meeting_date = md.date
+    WHERE md.is_active = 1
+    ORDER BY md.date
+'''
+
+IS_DATE_ACTIVE_SQL = 'SELECT 1 FROM meeting_dates WHERE date = ? AND is_active = 1'
+
+IS_DATE_REGISTERED_SQL = 'SELECT 1 FROM registrations WHERE meeting_date = ? LIMIT 1'
+
+GET_DATE_HOLD_SQL = 'SELECT user_id, expires_at FROM date_holds WHERE meeting_date = ?'
+
+# Holding a new date releases any other date held by the same user
+RELEASE_OTHER_HOLDS_SQL = 'DELETE FROM date_holds WHERE user_id = ? AND meeting_date != ?'
+
+UPSERT_DATE_HOLD_SQL = '''
+    INSERT INTO date_holds (meeting_date, user_id, expires_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(meeting_date) DO UPDATE SET
+        user_id = excluded.user_id,
+        expires_at = excluded.expires_at
+'''
+
+DELETE_DATE_HOLD_SQL = 'DELETE FROM date_holds WHERE meeting_date = ?'
+
+RELEASE_USER_HOLDS_SQL = 'DELETE FROM date_holds WHERE user_id = ?'
+
+DELETE_EXPIRED_HOLDS_SQL = 'DELETE FROM date_holds WHERE expires_at <= ?'
+
+REMOVE_MEETING_DATE_SQL = 'UPDATE meeting_dates SET is_active = 0 WHERE date = ?'
+
+DELETE_MEETING_DATE_SQL = 'DELETE FROM meeting_dates WHERE date = ?'
+
+ADD_REGISTRATION_SQL = '''
+    INSERT INTO registrations (user_id, fullname, phone, address, company, meeting_date)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Full export, every registration newest first
+EXPORT_REGISTRATIONS_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    ORDER BY r.created_at DESC
+'''
+
+# Keyset pagination on (created_at, id), newest first
+REGISTRATIONS_PAGE_FIRST_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT ?
+'''
+
+REGISTRATIONS_PAGE_OLDER_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    WHERE (r.created_at, r.id) < (?, ?)
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT ?
+'''
+
+REGISTRATIONS_PAGE_NEWER_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    WHERE (r.created_at, r.id) > (?, ?)
+    ORDER BY r.created_at ASC, r.id ASC
+    LIMIT ?
+'''
+
+# Full-text search, best match first; ranking runs on the index alone,
+# only the rows of the requested page are joined
+SEARCH_REGISTRATIONS_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM (
+        SELECT rowid, rank FROM registrations_fts
+        WHERE registrations_fts MATCH ?
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    ) AS f
+    JOIN registrations r ON r.id = f.rowid
+    LEFT JOIN users u ON r.user_id = u.user_id
+    ORDER BY f.rank
+'''
+
+COUNT_SEARCH_RESULTS_SQL = 'SELECT COUNT(*) as count FROM registrations_fts WHERE registrations_fts MATCH ?'
+
+# Delta export: registrations past a watermark id (rowid range), newest first
+GET_REGISTRATIONS_AFTER_ID_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    WHERE r.id > ?
+    ORDER BY r.id DESC
+'''
+
+# One part of a split export: after_id < id <= until_id, newest first
+GET_REGISTRATIONS_ID_RANGE_SQL = '''
+    SELECT r.*, u.username, u.first_name, u.last_name
+    FROM registrations r
+    LEFT JOIN users u ON r.user_id = u.user_id
+    WHERE r.id > ? AND r.id <= ?
+    ORDER BY r.id DESC
+'''
+
+# Ids only, walks the rowid b-tree without touching other columns
+GET_REGISTRATION_IDS_SQL = 'SELECT id FROM registrations WHERE id > ? AND id <= ? ORDER BY id DESC'
+
+COUNT_REGISTRATIONS_AFTER_ID_SQL = 'SELECT COUNT(*) as count FROM registrations WHERE id > ?'
+
+GET_EXPORT_WATERMARK_SQL = 'SELECT * FROM export_watermarks WHERE admin_id = ?'
+
+# The watermark never moves backwards
+SET_EXPORT_WATERMARK_SQL = '''
+    INSERT INTO export_watermarks (admin_id, last_id, last_created_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(admin_id) DO UPDATE SET
+        last_id = excluded.last_id,
+        last_created_at = excluded.last_created_at,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE excluded.last_id > export_watermarks.last_id
+'''
+
+# ----- Archive -----
+# Meeting day as YYYYMMDD (dates are stored as DD.MM.YYYY); must match the
+# expression indexes of migration 6 exactly, otherwise the planner scans
+REGISTRATION_DAY_SQL = 'substr(meeting_date, 7, 4) || substr(meeting_date, 4, 2) || substr(meeting_date, 1, 2)'
+MEETING_DATE_DAY_SQL = 'substr(date, 7, 4) || substr(date, 4, 2) || substr(date, 1, 2)'
+
+GET_PAST_REGISTRATION_IDS_SQL = f'SELECT id FROM registrations WHERE {REGISTRATION_DAY_SQL} < ? LIMIT ?'
+
+ARCHIVE_REGISTRATION_SQL = '''
+    INSERT OR IGNORE INTO registrations_archive
+        (id, user_id, fullname, phone, address, company, meeting_date, created_at)
+    SELECT id, user_id, fullname, phone, address, company, meeting_date, created_at
+    FROM registrations WHERE id = ?
+'''
+
+DELETE_REGISTRATION_SQL = 'DELETE FROM registrations WHERE id = ?'
+
+DELETE_PAST_MEETING_DATES_SQL = f'DELETE FROM meeting_dates WHERE {MEETING_DATE_DAY_SQL} < ?'
+
+COUNT_ARCHIVED_REGISTRATIONS_SQL = "SELECT value as count FROM stats_counters WHERE scope = 'archived' AND key = ''"
+
+GET_ARCHIVED_REGISTRATIONS_BY_DATE_SQL = '''
+    SELECT a.*, u.username, u.first_name, u.last_name
+    FROM registrations_archive a
+    LEFT JOIN users u ON a.user_id = u.user_id
+    WHERE a.meeting_date = ?
+    ORDER BY a.id
+'''
+
+GET_ARCHIVED_ID_RANGE_SQL = '''
+    SELECT a.*, u.username, u.first_name, u.last_name
+    FROM registrations_archive a
+    LEFT JOIN users u ON a.user_id = u.user_id
+    WHERE a.id > ? AND a.id <= ?
+    ORDER BY a.id DESC
+'''
+
+GET_ARCHIVED_IDS_SQL = 'SELECT id FROM registrations_archive WHERE id > ? AND id <= ? ORDER BY id DESC'
+
+GET_USER_REGISTRATION_SQL = '''
+    SELECT * FROM registrations
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT 1
+'''
+
+# Totals come from the trigger-maintained counters, not COUNT(*)
+COUNT_REGISTRATIONS_SQL = "SELECT value as count FROM stats_counters WHERE scope = 'total' AND key = ''"
+
+# Statistics dashboard, all lookups on the (scope, key) primary key
+GET_COUNTERS_SQL = 'SELECT key, value FROM stats_counters WHERE scope = ? ORDER BY value DESC, key'
+
+GET_COUNTERS_SINCE_SQL = 'SELECT key, value FROM stats_counters WHERE scope = ? AND key >= ? ORDER BY key'
+
+COUNT_COUNTERS_SQL = 'SELECT COUNT(*) as count FROM stats_counters WHERE scope = ?'
+
+# Queries that return every row of their table by design; they may walk a
+# whole index but never the table itself
+WHOLE_TABLE_READS = {'export_registrations'}
+
+# name -> (sql, sample parameters) for the EXPLAIN QUERY PLAN check
+QUERY_PLAN_CHECKS = {
+    'flush_user_writes': (user_upsert_sql(USER_BUFFERED_COLUMNS), (0,) * (len(USER_BUFFERED_COLUMNS) + 1)),
+    'flush_user_activity': (user_update_sql(USER_ACTIVITY_COLUMNS), (0,) * (len(USER_ACTIVITY_COLUMNS) + 1)),
+    'save_fsm_record': (fsm_upsert_sql(FSM_COLUMNS), ('', 0.0) + ('',) * len(FSM_COLUMNS)),
+    'get_fsm_record': (GET_FSM_RECORD_SQL, ('',)),
+    'delete_empty_fsm_record': (DELETE_EMPTY_FSM_RECORD_SQL, ('',)),
+    'delete_expired_fsm_records': (DELETE_EXPIRED_FSM_RECORDS_SQL, (0.0,)),
+    'count_fsm_records': (COUNT_FSM_RECORDS_SQL, ()),
+    'get_channel_member': (GET_CHANNEL_MEMBER_SQL, (0,)),
+    'set_channel_member': (SET_CHANNEL_MEMBER_SQL, (0, '')),
+    'get_due_outbox': (GET_DUE_OUTBOX_SQL, (0.0, 1)),
+    'delete_outbox': (DELETE_OUTBOX_SQL, (0,)),
+    'reschedule_outbox': (RESCHEDULE_OUTBOX_SQL, (0.0, '', 0)),
+    'count_failed_outbox': (COUNT_FAILED_OUTBOX_SQL, ()),
+    'delete_failed_outbox': (DELETE_FAILED_OUTBOX_SQL, ('',)),
+    'get_broadcast_recipients': (GET_BROADCAST_RECIPIENTS_SQL, (0, 1)),
+    'count_reachable_users': (COUNT_REACHABLE_USERS_SQL, ()),
+    'mark_user_blocked': (MARK_USER_BLOCKED_SQL, (0,)),
+    'get_broadcast': (GET_BROADCAST_SQL, (0,)),
+    'get_running_broadcast': (GET_RUNNING_BROADCAST_SQL, ()),
+    'save_broadcast_progress': (SAVE_BROADCAST_PROGRESS_SQL, (0, 0, 0, 0, 0)),
+    'finish_broadcast': (FINISH_BROADCAST_SQL, ('', 0)),
+    'get_user': (GET_USER_SQL, (0,)),
+    'get_active_users_count': (COUNT_ACTIVE_USERS_SQL, ('',)),
+    'add_meeting_date': (ADD_MEETING_DATE_SQL, ('',)),
+    'get_active_meeting_dates': (GET_ACTIVE_MEETING_DATES_SQL, ()),
+    'get_meeting_dates_snapshot': (GET_MEETING_DATES_SNAPSHOT_SQL, ()),
+    'is_date_active': (IS_DATE_ACTIVE_SQL, ('',)),
+    'is_date_registered': (IS_DATE_REGISTERED_SQL, ('',)),
+    'get_date_hold': (GET_DATE_HOLD_SQL, ('',)),
+    'release_other_holds': (RELEASE_OTHER_HOLDS_SQL, (0, '')),
+    'upsert_date_hold': (UPSERT_DATE_HOLD_SQL, ('', 0, 0.0)),
+    'delete_date_hold': (DELETE_DATE_HOLD_SQL, ('',)),
+    'release_user_holds': (RELEASE_USER_HOLDS_SQL, (0,)),
+    'delete_expired_holds': (DELETE_EXPIRED_HOLDS_SQL, (0.0,)),
+    'remove_meeting_date': (REMOVE_MEETING_DATE_SQL, ('',)),
+    'delete_meeting_date': (DELETE_MEETING_DATE_SQL, ('',)),
+    'add_registration': (ADD_REGISTRATION_SQL, (0, '', '', '', '', '')),
+    'export_registrations': (EXPORT_REGISTRATIONS_SQL, ()),
+    'registrations_page_first': (REGISTRATIONS_PAGE_FIRST_SQL, (10,)),
+    'registrations_page_older': (REGISTRATIONS_PAGE_OLDER_SQL, ('', 0, 10)),
+    'registrations_page_newer': (REGISTRATIONS_PAGE_NEWER_SQL, ('', 0, 10)),
+    'search_registrations': (SEARCH_REGISTRATIONS_SQL, ('"a"*', 10, 0)),
+    'count_search_results': (COUNT_SEARCH_RESULTS_SQL, ('"a"*',)),
+    'get_registrations_after_id': (GET_REGISTRATIONS_AFTER_ID_SQL, (0,)),
+    'get_registrations_id_range': (GET_REGISTRATIONS_ID_RANGE_SQL, (0, 0)),
+    'get_registration_ids': (GET_REGISTRATION_IDS_SQL, (0, 0)),
+    'count_registrations_after_id': (COUNT_REGISTRATIONS_AFTER_ID_SQL, (0,)),
+    'get_export_watermark': (GET_EXPORT_WATERMARK_SQL, (0,)),
+    'set_export_watermark': (SET_EXPORT_WATERMARK_SQL, (0, 0, '')),
+    'get_past_registration_ids': (GET_PAST_REGISTRATION_IDS_SQL, ('', 1)),
+    'archive_registration': (ARCHIVE_REGISTRATION_SQL, (0,)),
+    'delete_registration': (DELETE_REGISTRATION_SQL, (0,)),
+    'delete_past_meeting_dates': (DELETE_PAST_MEETING_DATES_SQL, ('',)),
+    'get_archived_registrations_by_date': (GET_ARCHIVED_REGISTRATIONS_BY_DATE_SQL, ('',)),
+    'get_archived_id_range': (GET_ARCHIVED_ID_RANGE_SQL, (0, 0)),
+    'get_archived_ids': (GET_ARCHIVED_IDS_SQL, (0, 0)),
+    'get_user_registration': (GET_USER_REGISTRATION_SQL, (0,)),
+    'get_registrations_count': (COUNT_REGISTRATIONS_SQL, ()),
+    'get_counters': (GET_COUNTERS_SQL, ('',)),
+    'get_counters_since': (GET_COUNTERS_SINCE_SQL, ('', '')),
+    'count_counters': (COUNT_COUNTERS_SQL, ('',)),
+    'get_archived_count': (COUNT_ARCHIVED_REGISTRATIONS_SQL, ()),
+}
+
+
+class DatesSnapshot(NamedTuple):
+    """Active meeting dates with their booking state, valid for one dates version"""
+    version: int
+    valid_until: float  # earliest hold expiry, the snapshot goes stale then
+    registered: Dict[str, bool]  # date -> has registration, ordered by date
+    holds: Dict[str, int]  # date -> user holding it (unexpired holds only)
+
+    def is_available(self, date: str, user_id: int = None) -> bool:
+        """Check that date is active, not registered and not held by another user"""
+        if self.registered.get(date) is not False:
+            return False
+        holder = self.holds.get(date)
+        return holder is None or holder == user_id
+
+    def dates_for(self, user_id: int = None) -> Tuple[Tuple[str, bool], ...]:
+        """(date, is_booked) pairs as seen by user (their own hold is not booked)"""
+        return tuple(
+            (date, not self.is_available(date, user_id))
+            for date in self.registered
+        )
+
+
+class RegistrationsPage(NamedTuple):
+    """One page of registrations with keyset cursors of the neighbour pages"""
+    rows: List[Dict[str, Any]]
+    newer_cursor: Optional[Tuple[str, int]]  # (created_at, id) of the first row, None on the first page
+    older_cursor: Optional[Tuple[str, int]]  # (created_at, id) of the last row, None on the last page
+
+
+class RegistrationResult(NamedTuple):
+    """Outcome of add_registration"""
+    registration_id: Optional[int]  # None if the registration was rejected
+    date_unavailable: bool = False  # rejected because the date was removed or archived
+
+
+class SearchResults(NamedTuple):
+    """One page of full-text search results"""
+    rows: List[Dict[str, Any]]
+    next_offset: Optional[int]  # None on the last page
+
+
+class OutboxMessage(NamedTuple):
+    """A message to deliver through the outbox"""
+    chat_id: int
+    text: str
+    reply_markup: Optional[str] = None  # JSON of the inline keyboard
+
+
 class Database:
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
+        self.user_buffer = WriteBuffer()
+        self.user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+        self._user_cache_generation = 0
+        self._dates_version = 0
+        self._dates_snapshot = None
+        self._flush_lock = threading.Lock()
         self.init_db()
 
-    def get_connection(self):
-        """Create database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def read(self):
+        """Context manager yielding a pooled reader connection"""
+        return self.pool.read()
+
+    def write(self):
+        """Context manager yielding the writer connection in a transaction"""
+        return self.pool.write()
+
+    def backup(self, target: sqlite3.Connection, pages: int, pause: float = 0):
+        """Copy the live database into target in steps of `pages` pages"""
+        self.pool.backup(target, pages, pause)
+
+    def close(self):
+        """Flush buffered writes and close all database connections"""
+        self.flush_user_writes()
+        logger.info(f"User cache stats: {self.user_cache.stats()}")
+        self.pool.close()
 
     def init_db(self):
-        """Initialize database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                language TEXT DEFAULT 'uz',
-                is_subscribed INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Meeting dates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS meeting_dates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL UNIQUE,
-                is_active INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Registrations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS registrations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                fullname TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                address TEXT NOT NULL,
-                company TEXT NOT NULL,
-                meeting_date TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
+        """Bring the schema up to date and verify query plans"""
+        with self.pool.exclusive() as conn:
+            version = migrate(conn)
+            enable_incremental_vacuum(conn)
+
+        logger.info(f"Database initialized successfully (schema version {version})")
+
+        for name, detail in self.check_query_plans():
+            logger.warning(f"Query '{name}' does a full scan: {detail}")
 
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized successfully")
+    def check_query_plans(self) -> List[Tuple[str, str]]:
+        """Return (query name, plan detail) for every query that reads a whole table or index"""
+        with self.read() as conn:
+            return find_full_scans(conn, QUERY_PLAN_CHECKS, WHOLE_TABLE_READS)
 
     # ========== USER METHODS ==========
+    # Profile writes go through a write-behind buffer and reach the
+    # database in one transaction per flush_user_writes() call.
+
+    def _update_user(self, user_id: int, fields: Dict[str, Any],
+                     insert_fields: Dict[str, Any] = None) -> bool:
+        """
+        Buffer changed user fields, return False if nothing changed
+
+        Without insert_fields an unknown user is left alone (like an UPDATE
+        matching no row); with them the user is created.
+        """
+        current = self.get_user(user_id)
+
+        if current is None:
+            if insert_fields is None:
+                return False
+            fields = {**fields, **insert_fields}
+        elif all(current.get(key) == value for key, value in fields.items()):
+            return False
+
+        self.user_buffer.update(user_id, fields)
+        self._invalidate_user(user_id)
+        return True
 
     def add_user(self, user_id: int, username: str = None,
                  first_name: str = None, last_name: str = None,
                  language: str = 'uz'):
         """Add new user or update existing"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO users (user_id, username, first_name, last_name, language)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET
-                username = excluded.username,
-                first_name = excluded.first_name,
-                last_name = excluded.last_name
-        ''', (user_id, username, first_name, last_name, language))
-
-        conn.commit()
-        conn.close()
-        logger.info(f"User {user_id} added/updated")
-
-    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+        changed = self._update_user(
+            user_id,
+            {'username': username, 'first_name': first_name, 'last_name': last_name},
+            insert_fields={'language': language}
+        )
+        if changed:
+            logger.info(f"User {user_id} added/updated")
+
+    def _invalidate_user(self, user_id: int):
+        """Drop cached user row (and discard fills racing with this call)"""
+        self._user_cache_generation += 1
+        self.user_cache.invalidate(user_id)
+
+    def _with_pending(self, user_id: int, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Overlay buffered changes on a stored user row"""
+        pending = self.user_buffer.get(user_id)
 
         if row:
-            return dict(row)
-        return None
+            user = dict(row)
+        elif pending is not None and not is_activity_only(pending):
+            user = {'user_id': user_id, **USER_DEFAULTS}
+        else:
+            # Activity alone does not make a user
+            return None
+
+        if pending:
+            user.update(pending)
+        return user
+
+    def get_cached_user(self, user_id: int) -> Any:
+        """Get user from the cache only, MISSING if it is not cached"""
+        row = self.user_cache.get(user_id)
+        if row is MISSING:
+            return MISSING
+        return self._with_pending(user_id, row)
+
+    def load_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Read user from the database and cache the row"""
+        generation = self._user_cache_generation
+        with self.read() as conn:
+            found = conn.execute(GET_USER_SQL, (user_id,)).fetchone()
+        row = dict(found) if found else None
+
+        # Unknown users are cached too (as None) until add_user
+        if generation == self._user_cache_generation:
+            self.user_cache.set(user_id, row)
+
+        return self._with_pending(user_id, row)
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get user by ID (including buffered changes)"""
+        user = self.get_cached_user(user_id)
+        if user is MISSING:
+            user = self.load_user(user_id)
+        return user
 
     def set_user_language(self, user_id: int, language: str):
         """Update user language"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            UPDATE users SET language = ? WHERE user_id = ?
-        ''', (language, user_id))
-
-        conn.commit()
-        conn.close()
-        logger.info(f"User {user_id} language set to {language}")
+        if self._update_user(user_id, {'language': language}):
+            logger.info(f"User {user_id} language set to {language}")
 
     def set_user_subscribed(self, user_id: int, subscribed: bool = True):
         """Set user subscription status"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            UPDATE users SET is_subscribed = ? WHERE user_id = ?
-        ''', (1 if subscribed else 0, user_id))
-
-        conn.commit()
-        conn.close()
-        logger.info(f"User {user_id} subscription status: {subscribed}")
+        if self._update_user(user_id, {'is_subscribed': 1 if subscribed else 0}):
+            logger.info(f"User {user_id} subscription status: {subscribed}")
 
     def get_user_language(self, user_id: int) -> str:
         """Get user language preference"""
         user = self.get_user(user_id)
         return user['language'] if user else 'uz'
 
+    def get_channel_member_status(self, user_id: int) -> Optional[str]:
+        """Get the last known channel member status of user (None if never seen)"""
+        with self.read() as conn:
+            row = conn.execute(GET_CHANNEL_MEMBER_SQL, (user_id,)).fetchone()
+
+        return row['status'] if row else None
+
+    def set_channel_member_status(self, user_id: int, status: str):
+        """Store the channel member status of user"""
+        with self.write() as conn:
+            conn.execute(SET_CHANNEL_MEMBER_SQL, (user_id, status))
+
+    def get_user_cache_stats(self) -> Dict[str, Any]:
+        """Get user cache size and hit/miss counters"""
+        return self.user_cache.stats()
+
+    def touch_user(self, user_id: int):
+        """
+        Record user activity; only stored in memory until the next flush
+
+        Activity of a user without a row is not stored (see flush_user_writes).
+        """
+        self.user_buffer.update(
+            user_id,
+            # A user who writes to the bot can be reached by broadcasts again
+            {'last_seen_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'), 'is_blocked': 0}
+        )
+
+    def get_active_users_count(self, days: int = 1) -> int:
+        """Count users seen within the last `days` days"""
+        since = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.read() as conn:
+            row = conn.execute(COUNT_ACTIVE_USERS_SQL, (since,)).fetchone()
+
+        return row['count']
+
+    def flush_user_writes(self) -> int:
+        """Write all buffered user changes in a single transaction"""
+        with self._flush_lock:
+            pending = self.user_buffer.begin_flush()
+            success = False
+            try:
+                if pending:
+                    with self.write() as conn:
+                        for user_id, fields in pending.items():
+                            columns = tuple(c for c in USER_BUFFERED_COLUMNS if c in fields)
+                            if is_activity_only(fields):
+                                # Updates an existing user only, never inserts one
+                                conn.execute(
+                                    user_update_sql(columns),
+                                    (*(fields[c] for c in columns), user_id)
+                                )
+                            else:
+                                conn.execute(
+                                    user_upsert_sql(columns),
+                                    (user_id, *(fields[c] for c in columns))
+                                )
+                    # Keep cached rows in sync with what was just written
+                    self._user_cache_generation += 1
+                    for user_id, fields in pending.items():
+                        self.user_cache.update_fields(user_id, fields)
+                success = True
+            finally:
+                self.user_buffer.end_flush(success)
+
+        if pending:
+            logger.info(f"Flushed {len(pending)} buffered user updates")
+        return len(pending)
+
     # ========== MEETING DATES METHODS ==========
 
     def add_meeting_date(self, date: str):
         """Add new meeting date"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
         try:
-            cursor.execute('''
-                INSERT INTO meeting_dates (date) VALUES (?)
-            ''', (date,))
-            conn.commit()
-            logger.info(f"Meeting date added: {date}")
-            return True
+            with self.write() as conn:
+                conn.execute(ADD_MEETING_DATE_SQL, (date,))
         except sqlite3.IntegrityError:
             logger.warning(f"Date already exists: {date}")
             return False
-        finally:
-            conn.close()
+
+        self._bump_dates_version()
+        logger.info(f"Meeting date added: {date}")
+        return True
 
     def get_active_meeting_dates(self) -> List[str]:
         """Get all active meeting dates (including booked ones)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT date FROM meeting_dates
-            WHERE is_active = 1
-            ORDER BY date
-        ''')
-
-        dates = [row['date'] for row in cursor.fetchall()]
-        conn.close()
-        return dates
-
-    def get_available_meeting_dates(self) -> List[str]:
-        """Get only available (not booked) meeting dates"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Get dates that are active AND not in registrations
-        cursor.execute('''
-            SELECT md.date
-            FROM meeting_dates md
-            WHERE md.is_active = 1
-            AND md.date NOT IN (
-                SELECT meeting_date FROM registrations
-            )
-            ORDER BY md.date
-        ''')
+        with self.read() as conn:
+            rows = conn.execute(GET_ACTIVE_MEETING_DATES_SQL).fetchall()
 
-        dates = [row['date'] for row in cursor.fetchall()]
-        conn.close()
-        return dates
+        return [row['date'] for row in rows]
 
-    def get_booked_meeting_dates(self) -> List[str]:
-        """Get booked (registered) meeting dates"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _bump_dates_version(self):
+        """Invalidate the availability snapshot (call after the change is committed)"""
+        self._dates_version += 1
 
-        cursor.execute('''
-            SELECT DISTINCT meeting_date
-            FROM registrations
-            ORDER BY meeting_date
-        ''')
+    def get_cached_meeting_dates_snapshot(self) -> Optional[DatesSnapshot]:
+        """Get the availability snapshot if it is still current, else None"""
+        snapshot = self._dates_snapshot
+        if (snapshot is not None and snapshot.version == self._dates_version
+                and time.time() < snapshot.valid_until):
+            return snapshot
+        return None
 
-        dates = [row['meeting_date'] for row in cursor.fetchall()]
-        conn.close()
-        return dates
+    def get_meeting_dates_snapshot(self) -> DatesSnapshot:
+        """
+        Get all active meeting dates with their booking state
+
+        The result is cached until the next date, registration or hold
+        change (or until the earliest hold expires), so browsing dates
+        costs no queries in between.
+        """
+        snapshot = self.get_cached_meeting_dates_snapshot()
+        if snapshot is not None:
+            return snapshot
+
+        # Capture the version first: a change committed while we read bumps it
+        # and the stored snapshot is treated as stale
+        version = self._dates_version
+        with self.read() as conn:
+            rows = conn.execute(GET_MEETING_DATES_SNAPSHOT_SQL).fetchall()
+
+        now = time.time()
+        registered = {}
+        holds = {}
+        valid_until = float('inf')
+        for row in rows:
+            registered[row['date']] = bool(row['is_booked'])
+            if row['hold_expires_at'] is not None and row['hold_expires_at'] > now:
+                holds[row['date']] = row['hold_user_id']
+                valid_until = min(valid_until, row['hold_expires_at'])
+
+        snapshot = DatesSnapshot(version, valid_until, registered, holds)
+        self._dates_snapshot = snapshot
+        return snapshot
+
+    # ========== DATE HOLDS ==========
+    # Picking a date holds it for DATE_HOLD_TTL seconds; finishing the form
+    # turns the hold into a registration. All checks and writes happen in a
+    # single IMMEDIATE transaction on the writer connection.
+
+    def reserve_date(self, date: str, user_id: int, ttl: float = DATE_HOLD_TTL) -> bool:
+        """Hold date for user; False if it is inactive, registered or held by someone else"""
+        now = time.time()
+        reserved = False
+
+        with self.write() as conn:
+            purged = conn.execute(DELETE_EXPIRED_HOLDS_SQL, (now,)).rowcount
+
+            if (conn.execute(IS_DATE_ACTIVE_SQL, (date,)).fetchone()
+                    and not conn.execute(IS_DATE_REGISTERED_SQL, (date,)).fetchone()):
+                hold = conn.execute(GET_DATE_HOLD_SQL, (date,)).fetchone()
+                if hold is None or hold['user_id'] == user_id:
+                    conn.execute(RELEASE_OTHER_HOLDS_SQL, (user_id, date))
+                    conn.execute(UPSERT_DATE_HOLD_SQL, (date, user_id, now + ttl))
+                    reserved = True
+
+        if reserved or purged:
+            self._bump_dates_version()
+        if reserved:
+            logger.info(f"Date {date} held for user {user_id} ({ttl:.0f}s)")
+        return reserved
+
+    def release_date_holds(self, user_id: int):
+        """Release any date held by user"""
+        with self.write() as conn:
+            released = conn.execute(RELEASE_USER_HOLDS_SQL, (user_id,)).rowcount
+
+        if released:
+            self._bump_dates_version()
+            logger.info(f"Released date hold of user {user_id}")
+
+    def purge_expired_holds(self) -> int:
+        """Delete expired holds and return count"""
+        with self.write() as conn:
+            count = conn.execute(DELETE_EXPIRED_HOLDS_SQL, (time.time(),)).rowcount
+
+        if count:
+            self._bump_dates_version()
+            logger.info(f"Purged {count} expired date holds")
+        return count
 
     def remove_meeting_date(self, date: str):
         """Deactivate meeting date"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.write() as conn:
+            conn.execute(REMOVE_MEETING_DATE_SQL, (date,))
 
-        cursor.execute('''
-            UPDATE meeting_dates SET is_active = 0 WHERE date = ?
-        ''', (date,))
-
-        conn.commit()
-        conn.close()
+        self._bump_dates_version()
         logger.info(f"Meeting date removed: {date}")
 
     def delete_meeting_date(self, date: str):
         """Permanently delete meeting date"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('DELETE FROM meeting_dates WHERE date = ?', (date,))
+        with self.write() as conn:
+            conn.execute(DELETE_MEETING_DATE_SQL, (date,))
 
-        conn.commit()
-        conn.close()
+        self._bump_dates_version()
         logger.info(f"Meeting date deleted: {date}")
 
     # ========== REGISTRATION METHODS ==========
 
     def add_registration(self, user_id: int, fullname: str, phone: str,
-                        address: str, company: str, meeting_date: str) -> int:
-        """Add new registration"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO registrations (user_id, fullname, phone, address, company, meeting_date)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, fullname, phone, address, company, meeting_date))
-
-        registration_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        logger.info(f"Registration added: ID {registration_id}, User {user_id}")
-        return registration_id
+                        address: str, company: str, meeting_date: str,
+                        notifications: Iterable[OutboxMessage] = ()) -> RegistrationResult:
+        """
+        Add new registration, converting the user's hold on meeting_date
 
-    def get_registrations(self, limit: int = None) -> List[Dict[str, Any]]:
-        """Get all registrations"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        Args:
+            notifications: Messages queued in the outbox in the same transaction,
+                so they are sent if and only if the registration is stored
 
-        query = '''
-            SELECT r.*, u.username, u.first_name, u.last_name
-            FROM registrations r
-            LEFT JOIN users u ON r.user_id = u.user_id
-            ORDER BY r.created_at DESC
-        '''
+        Returns:
+            Result with the registration ID, or with None if the date is no longer
+            active (date_unavailable), was registered or is held by another user
+        """
+        registration_id = None
 
-        if limit:
-            query += f' LIMIT {limit}'
+        try:
+            with self.write() as conn:
+                # The date may have been deleted or archived while the user held it
+                if not conn.execute(IS_DATE_ACTIVE_SQL, (meeting_date,)).fetchone():
+                    logger.warning(f"Registration rejected: date {meeting_date} is unavailable, User {user_id}")
+                    return RegistrationResult(None, date_unavailable=True)
+
+                hold = conn.execute(GET_DATE_HOLD_SQL, (meeting_date,)).fetchone()
+                held_by_other = (hold is not None and hold['user_id'] != user_id
+                                 and hold['expires_at'] > time.time())
+
+                if not held_by_other and not conn.execute(IS_DATE_REGISTERED_SQL, (meeting_date,)).fetchone():
+                    cursor = conn.execute(ADD_REGISTRATION_SQL, (user_id, fullname, phone, address, company, meeting_date))
+                    registration_id = cursor.lastrowid
+                    conn.execute(DELETE_DATE_HOLD_SQL, (meeting_date,))
+                    self._enqueue_messages(conn, notifications)
+        except sqlite3.IntegrityError:
+            # Unique index on meeting_date caught a double booking
+            registration_id = None
 
-        cursor.execute(query)
-        registrations = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return registrations
+        if registration_id is None:
+            logger.warning(f"Registration rejected: date {meeting_date} is taken, User {user_id}")
+            return RegistrationResult(None)
+
+        self._bump_dates_version()
+        logger.info(f"Registration added: ID {registration_id}, User {user_id}")
+        return RegistrationResult(registration_id)
+
+    def iter_registrations(self, after_id: int = None, until_id: int = None,
+                           archived: bool = False, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream registrations (newest first) without materialising them
+
+        Args:
+            after_id: Only registrations with a greater id (delta export)
+            until_id: Only registrations with id up to this one (part of a split export)
+            archived: Read the archive instead of current registrations
+
+        Holds a pooled reader connection until the iterator is exhausted or closed.
+        """
+        with self.read() as conn:
+            if archived:
+                cursor = conn.execute(GET_ARCHIVED_ID_RANGE_SQL, (after_id or 0, until_id or MAX_ROWID))
+            elif until_id is not None:
+                cursor = conn.execute(GET_REGISTRATIONS_ID_RANGE_SQL, (after_id or 0, until_id))
+            elif after_id is None:
+                cursor = conn.execute(EXPORT_REGISTRATIONS_SQL)
+            else:
+                cursor = conn.execute(GET_REGISTRATIONS_AFTER_ID_SQL, (after_id,))
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cursor.close()
+
+    def get_registration_id_ranges(self, chunk_rows: int, after_id: int = 0, until_id: int = None,
+                                   archived: bool = False) -> List[Tuple[int, int]]:
+        """
+        Split registrations (or the archive) into id ranges of at most chunk_rows rows
+
+        Returns:
+            List of (after_id, until_id) ranges, newest first; a range
+            covers after_id < id <= until_id
+        """
+        if until_id is None:
+            until_id = MAX_ROWID
+
+        boundaries = []
+        with self.read() as conn:
+            sql = GET_ARCHIVED_IDS_SQL if archived else GET_REGISTRATION_IDS_SQL
+            cursor = conn.execute(sql, (after_id, until_id))
+            for index, (registration_id,) in enumerate(cursor):
+                if index % chunk_rows == 0:
+                    boundaries.append(registration_id)
+
+        lower_bounds = boundaries[1:] + [after_id]
+        return list(zip(lower_bounds, boundaries))
+
+    def get_registrations_page(self, cursor: Tuple[str, int] = None, newer: bool = False,
+                               limit: int = REGISTRATIONS_PAGE_SIZE) -> RegistrationsPage:
+        """
+        Get one page of registrations, newest first, using keyset pagination
+
+        Args:
+            cursor: (created_at, id) to page from; None for the first page
+            newer: Page towards newer registrations (previous page) instead of older ones
+            limit: Page size
+
+        Returns:
+            RegistrationsPage; cost does not depend on the table size
+        """
+        with self.read() as conn:
+            if cursor is not None and newer:
+                rows = conn.execute(REGISTRATIONS_PAGE_NEWER_SQL, (*cursor, limit + 1)).fetchall()
+                if len(rows) > limit:
+                    rows = [dict(row) for row in reversed(rows[:limit])]
+                    return RegistrationsPage(
+                        rows,
+                        (rows[0]['created_at'], rows[0]['id']),
+                        (rows[-1]['created_at'], rows[-1]['id'])
+                    )
+                # Reached the newest rows: show the regular first page
+                cursor = None
+
+            if cursor is None:
+                rows = conn.execute(REGISTRATIONS_PAGE_FIRST_SQL, (limit + 1,)).fetchall()
+            else:
+                rows = conn.execute(REGISTRATIONS_PAGE_OLDER_SQL, (*cursor, limit + 1)).fetchall()
+
+        has_older = len(rows) > limit
+        rows = [dict(row) for row in rows[:limit]]
+
+        newer_cursor = None
+        older_cursor = None
+        if rows and cursor is not None:
+            newer_cursor = (rows[0]['created_at'], rows[0]['id'])
+        if rows and has_older:
+            older_cursor = (rows[-1]['created_at'], rows[-1]['id'])
+
+        return RegistrationsPage(rows, newer_cursor, older_cursor)
+
+    def search_registrations(self, text: str, offset: int = 0,
+                             limit: int = REGISTRATIONS_PAGE_SIZE) -> SearchResults:
+        """
+        Full-text search over name, phone, company and address
+
+        Args:
+            text: Free text typed by the admin
+            offset: Number of better matches to skip
+            limit: Page size
+
+        Returns:
+            SearchResults ranked by relevance (bm25)
+        """
+        match = search_match_query(text)
+        if match is None:
+            return SearchResults([], None)
+
+        with self.read() as conn:
+            rows = conn.execute(SEARCH_REGISTRATIONS_SQL, (match, limit + 1, offset)).fetchall()
+
+        next_offset = offset + limit if len(rows) > limit else None
+        return SearchResults([dict(row) for row in rows[:limit]], next_offset)
+
+    def count_search_results(self, text: str) -> int:
+        """Get number of registrations matching a search"""
+        match = search_match_query(text)
+        if match is None:
+            return 0
+
+        with self.read() as conn:
+            row = conn.execute(COUNT_SEARCH_RESULTS_SQL, (match,)).fetchone()
+
+        return row['count']
 
     def get_user_registration(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user's registration"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM registrations
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (user_id,))
-
-        row = cursor.fetchone()
-        conn.close()
+        with self.read() as conn:
+            row = conn.execute(GET_USER_REGISTRATION_SQL, (user_id,)).fetchone()
 
         if row:
             return dict(row)
@@ -288,67 +1161,500 @@ class Database:
 
     def get_registrations_count(self) -> int:
         """Get total registrations count"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.read() as conn:
+            row = conn.execute(COUNT_REGISTRATIONS_SQL).fetchone()
 
-        cursor.execute('SELECT COUNT(*) as count FROM registrations')
-        count = cursor.fetchone()['count']
-        conn.close()
-        return count
+        return row['count']
 
-    def get_registrations_by_date(self, meeting_date: str) -> List[Dict[str, Any]]:
-        """Get registrations for specific date"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_stats(self, days: int = 7) -> Dict[str, Any]:
+        """
+        Registration statistics for the admin dashboard
 
-        cursor.execute('''
-            SELECT r.*, u.username, u.first_name, u.last_name
-            FROM registrations r
-            LEFT JOIN users u ON r.user_id = u.user_id
-            WHERE r.meeting_date = ?
-            ORDER BY r.created_at DESC
-        ''', (meeting_date,))
+        Reads only the counters kept by triggers, so the cost depends on
+        the number of regions and days, not on the number of registrations.
 
-        registrations = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return registrations
+        Returns:
+            Dict with total, archived, booked_dates, regions [(region, count)]
+            and daily [(YYYY-MM-DD, count)] for the last `days` days (UTC)
+        """
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
 
-    # ========== CLEAR METHODS ==========
+        with self.read() as conn:
+            total = conn.execute(COUNT_REGISTRATIONS_SQL).fetchone()['count']
+            archived = conn.execute(COUNT_ARCHIVED_REGISTRATIONS_SQL).fetchone()['count']
+            booked_dates = conn.execute(COUNT_COUNTERS_SQL, ('meeting_date',)).fetchone()['count']
+            regions = conn.execute(GET_COUNTERS_SQL, ('region',)).fetchall()
+            daily = conn.execute(GET_COUNTERS_SINCE_SQL, ('created_day', since)).fetchall()
 
-    def clear_all_registrations(self) -> int:
-        """Delete all registrations and return count"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return {
+            'total': total,
+            'archived': archived,
+            'booked_dates': booked_dates,
+            'regions': [(row['key'], row['value']) for row in regions],
+            'daily': [(row['key'], row['value']) for row in daily],
+        }
 
-        # Get count before deleting
-        cursor.execute('SELECT COUNT(*) as count FROM registrations')
-        count = cursor.fetchone()['count']
+    def count_registrations_after(self, after_id: int) -> int:
+        """Count registrations with id greater than after_id"""
+        with self.read() as conn:
+            row = conn.execute(COUNT_REGISTRATIONS_AFTER_ID_SQL, (after_id,)).fetchone()
 
-        # Delete all
-        cursor.execute('DELETE FROM registrations')
+        return row['count']
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Cleared {count} registrations from database")
-        return count
+    # ========== EXPORT WATERMARKS ==========
+
+    def get_export_watermark(self, admin_id: int) -> Optional[Dict[str, Any]]:
+        """Get the last registration exported by admin"""
+        with self.read() as conn:
+            row = conn.execute(GET_EXPORT_WATERMARK_SQL, (admin_id,)).fetchone()
+
+        if row:
+            return dict(row)
+        return None
+
+    def set_export_watermark(self, admin_id: int, last_id: int, last_created_at: str):
+        """Advance admin's export watermark (never moves it backwards)"""
+        with self.write() as conn:
+            conn.execute(SET_EXPORT_WATERMARK_SQL, (admin_id, last_id, last_created_at))
 
-    def clear_all_meeting_dates(self) -> int:
-        """Delete all meeting dates and return count"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        logger.info(f"Export watermark of admin {admin_id} set to registration {last_id}")
 
-        # Get count before deleting
-        cursor.execute('SELECT COUNT(*) as count FROM meeting_dates')
-        count = cursor.fetchone()['count']
+    # ========== FSM STORAGE ==========
 
-        # Delete all
-        cursor.execute('DELETE FROM meeting_dates')
+    def get_fsm_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get stored FSM state and JSON data for a storage key"""
+        with self.read() as conn:
+            row = conn.execute(GET_FSM_RECORD_SQL, (key,)).fetchone()
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Cleared {count} meeting dates from database")
+        if row:
+            return dict(row)
+        return None
+
+    def save_fsm_records(self, records: Dict[str, Dict[str, Any]]):
+        """
+        Write buffered FSM changes in a single transaction
+
+        Args:
+            records: Storage key -> changed columns (state and/or JSON data)
+        """
+        now = time.time()
+        with self.write() as conn:
+            for key, fields in records.items():
+                columns = tuple(c for c in FSM_COLUMNS if c in fields)
+                conn.execute(fsm_upsert_sql(columns), (key, now, *(fields[c] for c in columns)))
+                conn.execute(DELETE_EMPTY_FSM_RECORD_SQL, (key,))
+
+    def purge_expired_fsm_records(self, ttl: float) -> int:
+        """Delete FSM records not changed for `ttl` seconds"""
+        with self.write() as conn:
+            return conn.execute(DELETE_EXPIRED_FSM_RECORDS_SQL, (time.time() - ttl,)).rowcount
+
+    def get_fsm_records_count(self) -> int:
+        """Get number of stored FSM records"""
+        with self.read() as conn:
+            row = conn.execute(COUNT_FSM_RECORDS_SQL).fetchone()
+
+        return row['count']
+
+    # ========== OUTBOX ==========
+
+    @staticmethod
+    def _enqueue_messages(conn: sqlite3.Connection, messages: Iterable[OutboxMessage]):
+        now = time.time()
+        conn.executemany(ENQUEUE_OUTBOX_SQL, ((m.chat_id, m.text, m.reply_markup, now) for m in messages))
+
+    def enqueue_messages(self, messages: Iterable[OutboxMessage]):
+        """Queue messages for delivery in a single transaction"""
+        with self.write() as conn:
+            self._enqueue_messages(conn, messages)
+
+    def get_due_messages(self, limit: int) -> List[Dict[str, Any]]:
+        """Get queued messages whose next attempt is due, oldest first"""
+        with self.read() as conn:
+            rows = conn.execute(GET_DUE_OUTBOX_SQL, (time.time(), limit)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def finish_messages(self, delivered: Iterable[int],
+                        failed: Iterable[Tuple[int, Optional[float], str]] = ()):
+        """
+        Record the outcome of a delivery round in a single transaction
+
+        Args:
+            delivered: Outbox ids of sent messages, they are deleted
+            failed: (id, next attempt time or None to give up, error) of the others
+        """
+        with self.write() as conn:
+            conn.executemany(DELETE_OUTBOX_SQL, ((message_id,) for message_id in delivered))
+            conn.executemany(RESCHEDULE_OUTBOX_SQL, (
+                (next_attempt_at, error, message_id) for message_id, next_attempt_at, error in failed
+            ))
+
+    def count_failed_messages(self) -> int:
+        """Count messages whose delivery was given up"""
+        with self.read() as conn:
+            row = conn.execute(COUNT_FAILED_OUTBOX_SQL).fetchone()
+
+        return row['count']
+
+    def purge_failed_messages(self, keep: float = OUTBOX_KEEP_FAILED) -> int:
+        """Delete given-up messages queued more than `keep` seconds ago and return count"""
+        cutoff = (datetime.utcnow() - timedelta(seconds=keep)).strftime('%Y-%m-%d %H:%M:%S')
+        with self.write() as conn:
+            count = conn.execute(DELETE_FAILED_OUTBOX_SQL, (cutoff,)).rowcount
+
+        if count:
+            logger.info(f"Purged {count} undelivered outbox messages")
         return count
 
+    # ========== BROADCASTS ==========
+
+    def create_broadcast(self, admin_id: int, texts: str) -> Optional[Dict[str, Any]]:
+        """
+        Create a running broadcast to all users who have not blocked the bot
+
+        Args:
+            texts: JSON object of language -> message text
+
+        Returns:
+            The new broadcast, or None while another one is still running
+        """
+        with self.write() as conn:
+            # Checked in the same transaction, so two broadcasts can never run at once
+            if conn.execute(GET_RUNNING_BROADCAST_SQL).fetchone() is not None:
+                return None
+            total = conn.execute(COUNT_REACHABLE_USERS_SQL).fetchone()['count']
+            cursor = conn.execute(CREATE_BROADCAST_SQL, (admin_id, texts, total))
+            row = conn.execute(GET_BROADCAST_SQL, (cursor.lastrowid,)).fetchone()
+
+        logger.info(f"Broadcast {row['id']} created by admin {admin_id} for {total} users")
+        return dict(row)
+
+    def get_broadcast(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """Get broadcast by id"""
+        with self.read() as conn:
+            row = conn.execute(GET_BROADCAST_SQL, (broadcast_id,)).fetchone()
+
+        return dict(row) if row else None
+
+    def get_running_broadcast(self) -> Optional[Dict[str, Any]]:
+        """Get the broadcast that is still running (e.g. interrupted by a restart)"""
+        with self.read() as conn:
+            row = conn.execute(GET_RUNNING_BROADCAST_SQL).fetchone()
+
+        return dict(row) if row else None
+
+    def get_broadcast_recipients(self, after_user_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Get the next page of reachable users (user_id, language) in user_id order"""
+        with self.read() as conn:
+            rows = conn.execute(GET_BROADCAST_RECIPIENTS_SQL, (after_user_id, limit)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def save_broadcast_progress(self, broadcast_id: int, last_user_id: int, sent: int,
+                                failed: int, blocked_user_ids: List[int]):
+        """Record one delivered page and mark users who blocked the bot, in a single transaction"""
+        with self.write() as conn:
+            conn.execute(SAVE_BROADCAST_PROGRESS_SQL,
+                         (last_user_id, sent, failed, len(blocked_user_ids), broadcast_id))
+            conn.executemany(MARK_USER_BLOCKED_SQL, ((user_id,) for user_id in blocked_user_ids))
+
+        for user_id in blocked_user_ids:
+            self._invalidate_user(user_id)
+
+    def finish_broadcast(self, broadcast_id: int, status: str) -> bool:
+        """Mark a running broadcast 'done', 'cancelled' or 'failed'; False if it was not running"""
+        with self.write() as conn:
+            return conn.execute(FINISH_BROADCAST_SQL, (status, broadcast_id)).rowcount > 0
+
+    # ========== ARCHIVE ==========
+
+    def archive_past_registrations(self, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """
+        Move registrations of past meeting dates to the archive and drop past dates
+
+        Every batch is its own short transaction, so registrations keep
+        flowing while a large backlog is archived. Freed pages are then
+        returned to the file system with an incremental vacuum.
+
+        Returns:
+            Number of registrations archived
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        archived = 0
+
+        while True:
+            with self.write() as conn:
+                ids = [(row['id'],) for row in conn.execute(GET_PAST_REGISTRATION_IDS_SQL, (today, batch_size))]
+                conn.executemany(ARCHIVE_REGISTRATION_SQL, ids)
+                conn.executemany(DELETE_REGISTRATION_SQL, ids)
+            archived += len(ids)
+            if len(ids) < batch_size:
+                break
+
+        with self.write() as conn:
+            dates_removed = conn.execute(DELETE_PAST_MEETING_DATES_SQL, (today,)).rowcount
+        if dates_removed:
+            self._bump_dates_version()
+
+        if archived or dates_removed:
+            pages = self.reclaim_space()
+            logger.info(
+                f"Archived {archived} registrations, removed {dates_removed} past meeting dates, "
+                f"reclaimed {pages} pages"
+            )
+
+        return archived
+
+    def reclaim_space(self, max_pages: int = VACUUM_PAGES_PER_RUN) -> int:
+        """
+        Return up to max_pages free pages to the file system
+
+        Returns:
+            Number of pages released
+        """
+        with self.pool.exclusive() as conn:
+            free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            # The pragma frees one page per step and returns no rows; execute()
+            # stops after the first step, executescript() runs it to completion.
+            # PRAGMA does not accept bound parameters
+            conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)})')
+            free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+        return free_before - free_after
+
+    def get_archived_count(self) -> int:
+        """Get number of archived registrations"""
+        with self.read() as conn:
+            row = conn.execute(COUNT_ARCHIVED_REGISTRATIONS_SQL).fetchone()
+
+        return row['count']
+
+    def get_archived_registrations_by_date(self, meeting_date: str) -> List[Dict[str, Any]]:
+        """Get archived registrations for a meeting date"""
+        with self.read() as conn:
+            rows = conn.execute(GET_ARCHIVED_REGISTRATIONS_BY_DATE_SQL, (meeting_date,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+
+class AsyncDatabase:
+    """
+    Awaitable facade over Database
+
+    Every call is executed on a dedicated thread pool so that
+    handlers never block the event loop on disk I/O.
+    """
+
+    def __init__(self, database: Database, max_workers: int = None):
+        # One worker per reader plus one for the writer
+        if max_workers is None:
+            max_workers = database.pool.read_pool_size + 1
+        self.db = database
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='db'
+        )
+        self._tasks: List[asyncio.Task] = []
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def start(self):
+        """Start background maintenance tasks (call from the running event loop)"""
+        self.start_periodic(self.db.flush_user_writes, USER_FLUSH_INTERVAL)
+        self.start_periodic(self.db.purge_expired_holds, HOLD_SWEEP_INTERVAL)
+        self.start_periodic(self.db.archive_past_registrations, ARCHIVE_INTERVAL)
+        self.start_periodic(self.db.purge_failed_messages, ARCHIVE_INTERVAL)
+
+    def start_periodic(self, func, interval: float):
+        """Run a blocking callable on the executor every `interval` seconds until close()"""
+        self._tasks.append(asyncio.create_task(self._periodic(func, interval)))
+
+    async def _periodic(self, func, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.run(func)
+            except Exception as e:
+                logger.error(f"Error in periodic task {func.__name__}: {e}", exc_info=True)
+
+    async def close(self):
+        """Stop background tasks, flush buffers and close connections"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        self.executor.shutdown(wait=True)
+        self.db.close()
+
+    # ========== USER METHODS ==========
+
+    async def add_user(self, user_id: int, username: str = None,
+                       first_name: str = None, last_name: str = None,
+                       language: str = 'uz'):
+        return await self.run(self.db.add_user, user_id, username,
+                              first_name, last_name, language)
+
+    async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        # Cached users are served on the event loop without a thread hop
+        user = self.db.get_cached_user(user_id)
+        if user is MISSING:
+            user = await self.run(self.db.load_user, user_id)
+        return user
+
+    async def set_user_language(self, user_id: int, language: str):
+        return await self.run(self.db.set_user_language, user_id, language)
+
+    async def set_user_subscribed(self, user_id: int, subscribed: bool = True):
+        return await self.run(self.db.set_user_subscribed, user_id, subscribed)
+
+    async def get_user_language(self, user_id: int) -> str:
+        user = await self.get_user(user_id)
+        return user['language'] if user else 'uz'
+
+    async def get_channel_member_status(self, user_id: int) -> Optional[str]:
+        return await self.run(self.db.get_channel_member_status, user_id)
+
+    async def set_channel_member_status(self, user_id: int, status: str):
+        return await self.run(self.db.set_channel_member_status, user_id, status)
+
+    def get_user_cache_stats(self) -> Dict[str, Any]:
+        """Get user cache counters (memory only, safe to call on the event loop)"""
+        return self.db.get_user_cache_stats()
+
+    def touch_user(self, user_id: int):
+        """Record user activity (memory only, safe to call on the event loop)"""
+        self.db.touch_user(user_id)
+
+    async def get_active_users_count(self, days: int = 1) -> int:
+        return await self.run(self.db.get_active_users_count, days)
+
+    async def get_fsm_record(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_fsm_record, key)
+
+    async def get_fsm_records_count(self) -> int:
+        return await self.run(self.db.get_fsm_records_count)
+
+    async def flush_user_writes(self) -> int:
+        return await self.run(self.db.flush_user_writes)
+
+    # ========== MEETING DATES METHODS ==========
+
+    async def add_meeting_date(self, date: str) -> bool:
+        return await self.run(self.db.add_meeting_date, date)
+
+    async def get_active_meeting_dates(self) -> List[str]:
+        return await self.run(self.db.get_active_meeting_dates)
+
+    async def get_meeting_dates_snapshot(self) -> DatesSnapshot:
+        # A current snapshot is served on the event loop without a thread hop
+        snapshot = self.db.get_cached_meeting_dates_snapshot()
+        if snapshot is None:
+            snapshot = await self.run(self.db.get_meeting_dates_snapshot)
+        return snapshot
+
+    async def reserve_date(self, date: str, user_id: int) -> bool:
+        return await self.run(self.db.reserve_date, date, user_id)
+
+    async def release_date_holds(self, user_id: int):
+        return await self.run(self.db.release_date_holds, user_id)
+
+    async def remove_meeting_date(self, date: str):
+        return await self.run(self.db.remove_meeting_date, date)
+
+    async def delete_meeting_date(self, date: str):
+        return await self.run(self.db.delete_meeting_date, date)
+
+    # ========== REGISTRATION METHODS ==========
+
+    async def add_registration(self, user_id: int, fullname: str, phone: str,
+                               address: str, company: str, meeting_date: str,
+                               notifications: Iterable[OutboxMessage] = ()) -> RegistrationResult:
+        return await self.run(self.db.add_registration, user_id, fullname,
+                              phone, address, company, meeting_date, list(notifications))
+
+    async def get_registrations_page(self, cursor: Tuple[str, int] = None,
+                                     newer: bool = False) -> RegistrationsPage:
+        return await self.run(self.db.get_registrations_page, cursor, newer)
+
+    async def search_registrations(self, text: str, offset: int = 0,
+                                   limit: int = REGISTRATIONS_PAGE_SIZE) -> SearchResults:
+        return await self.run(self.db.search_registrations, text, offset, limit)
+
+    async def count_search_results(self, text: str) -> int:
+        return await self.run(self.db.count_search_results, text)
+
+    async def get_user_registration(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_user_registration, user_id)
+
+    async def get_registrations_count(self) -> int:
+        return await self.run(self.db.get_registrations_count)
+
+    async def get_stats(self, days: int = 7) -> Dict[str, Any]:
+        return await self.run(self.db.get_stats, days)
+
+    async def count_registrations_after(self, after_id: int) -> int:
+        return await self.run(self.db.count_registrations_after, after_id)
+
+    async def get_export_watermark(self, admin_id: int) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_export_watermark, admin_id)
+
+    async def set_export_watermark(self, admin_id: int, last_id: int, last_created_at: str):
+        return await self.run(self.db.set_export_watermark, admin_id, last_id, last_created_at)
+
+    # ========== OUTBOX ==========
+
+    async def enqueue_messages(self, messages: Iterable[OutboxMessage]):
+        return await self.run(self.db.enqueue_messages, list(messages))
+
+    async def get_due_messages(self, limit: int) -> List[Dict[str, Any]]:
+        return await self.run(self.db.get_due_messages, limit)
+
+    async def finish_messages(self, delivered: Iterable[int],
+                              failed: Iterable[Tuple[int, Optional[float], str]] = ()):
+        return await self.run(self.db.finish_messages, list(delivered), list(failed))
+
+    async def count_failed_messages(self) -> int:
+        return await self.run(self.db.count_failed_messages)
+
+    # ========== BROADCASTS ==========
+
+    async def create_broadcast(self, admin_id: int, texts: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.create_broadcast, admin_id, texts)
+
+    async def get_broadcast(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_broadcast, broadcast_id)
+
+    async def get_running_broadcast(self) -> Optional[Dict[str, Any]]:
+        return await self.run(self.db.get_running_broadcast)
+
+    async def get_broadcast_recipients(self, after_user_id: int, limit: int) -> List[Dict[str, Any]]:
+        return await self.run(self.db.get_broadcast_recipients, after_user_id, limit)
+
+    async def save_broadcast_progress(self, broadcast_id: int, last_user_id: int, sent: int,
+                                      failed: int, blocked_user_ids: List[int]):
+        return await self.run(self.db.save_broadcast_progress, broadcast_id, last_user_id,
+                              sent, failed, blocked_user_ids)
+
+    async def finish_broadcast(self, broadcast_id: int, status: str) -> bool:
+        return await self.run(self.db.finish_broadcast, broadcast_id, status)
+
+    # ========== CLEAR METHODS ==========
+
+    async def archive_past_registrations(self) -> int:
+        return await self.run(self.db.archive_past_registrations)
+
+    async def get_archived_count(self) -> int:
+        return await self.run(self.db.get_archived_count)
+
+    async def get_archived_registrations_by_date(self, meeting_date: str) -> List[Dict[str, Any]]:
+        return await self.run(self.db.get_archived_registrations_by_date, meeting_date)
+
 
-# Create database instance
+# Create database instances
 db = Database()
+async_db = AsyncDatabase(db)
@@ -3,152 +3,204 @@ Excel export utility for INEX CONSULTING Bot
 Creates beautiful formatted Excel files
 """
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, BinaryIO, Dict, Iterable, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+HEADERS = ['№', 'Ism-Familiya', 'Telefon', 'Manzil', 'Korxona', 'Uchrashuv sanasi', "Ro'yxatdan o'tgan vaqt"]
 
-def create_registrations_excel(registrations: List[Dict[str, Any]], filename: str = None) -> str:
-    """
-    Create a beautiful Excel file from registrations data
+# Registration fields in column order (after the row number)
+FIELDS = ['fullname', 'phone', 'address', 'company', 'meeting_date', 'created_at']
 
-    Args:
-        registrations: List of registration dictionaries
-        filename: Optional filename (auto-generated if not provided)
+# Columns with centered data (№, meeting date, created at)
+CENTERED_COLUMNS = {1, 6, 7}
 
-    Returns:
-        Path to the created Excel file
-    """
-    if filename is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'inex_registrations_{timestamp}.xlsx'
+COLUMN_WIDTHS = {
+    'A': 8,   # №
+    'B': 25,  # Ism-Familiya
+    'C': 18,  # Telefon
+    'D': 30,  # Manzil
+    'E': 25,  # Korxona
+    'F': 20,  # Uchrashuv sanasi
+    'G': 20   # Ro'yxatdan o'tgan vaqt
+}
 
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ro'yxatlar"
+HEADER_ROW = 4
 
-    # Define styles
-    # Header style
-    header_font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
 
-    # Data style
+def _register_styles(wb: Workbook):
+    """
+    Register shared named styles
+
+    Every cell references one of these by name instead of carrying
+    its own font/fill/border/alignment objects.
+    """
+    # Border style
+    thin_side = Side(style='thin', color='000000')
+    thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+
+    centered = Alignment(horizontal='center', vertical='center')
+
+    wb.add_named_style(NamedStyle(
+        name='inex_title',
+        font=Font(name='Arial', size=16, bold=True, color='4472C4'),
+        alignment=centered
+    ))
+    wb.add_named_style(NamedStyle(
+        name='inex_subtitle',
+        font=Font(name='Arial', size=10, italic=True, color='666666'),
+        alignment=centered
+    ))
+    wb.add_named_style(NamedStyle(
+        name='inex_header',
+        font=Font(name='Arial', size=12, bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=thin_border
+    ))
+    wb.add_named_style(NamedStyle(
+        name='inex_summary',
+        font=Font(name='Arial', size=11, bold=True, color='4472C4'),
+        alignment=centered
+    ))
+
+    # Data cells: alternating row colors, left or centered alignment
     data_font = Font(name='Arial', size=11)
     data_alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+    fills = {
+        'light': PatternFill(start_color='F2F2F2', end_color='F2F2F2', fill_type='solid'),
+        'white': PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid'),
+    }
+    for fill_name, fill in fills.items():
+        wb.add_named_style(NamedStyle(
+            name=f'inex_data_{fill_name}',
+            font=data_font, fill=fill, border=thin_border, alignment=data_alignment
+        ))
+        wb.add_named_style(NamedStyle(
+            name=f'inex_data_{fill_name}_center',
+            font=data_font, fill=fill, border=thin_border, alignment=centered
+        ))
+
+
+def _styled_cell(ws, value: Any, style: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
 
-    # Border style
-    thin_border = Border(
-        left=Side(style='thin', color='000000'),
-        right=Side(style='thin', color='000000'),
-        top=Side(style='thin', color='000000'),
-        bottom=Side(style='thin', color='000000')
-    )
 
-    # Alternating row colors
-    light_fill = PatternFill(start_color='F2F2F2', end_color='F2F2F2', fill_type='solid')
-    white_fill = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
+def _discard_sheet(ws):
+    """
+    Close a write-only sheet that will never be saved and remove its temp file
+
+    openpyxl has no public call for this: the file is normally removed by
+    Workbook.save(), and Workbook.close() leaves it alone in write-only
+    mode. The writer's cleanup() is used if it exists (checked against the
+    openpyxl version pinned in requirements.txt); otherwise the file stays
+    until openpyxl's exit hook removes it.
+    """
+    ws.close()
+    cleanup = getattr(getattr(ws, '_writer', None), 'cleanup', None)
+    if cleanup is not None:
+        cleanup()
+
+
+def write_registrations_excel(registrations: Iterable[Dict[str, Any]],
+                              output: Union[str, BinaryIO]) -> int:
+    """
+    Stream registrations into a formatted Excel file
+
+    Uses openpyxl write-only mode, so rows are written as they are
+    pulled from the iterable and memory stays flat for any row count.
+
+    Args:
+        registrations: Iterable of registration dictionaries (e.g. a database cursor iterator)
+        output: File path or binary file-like object
+
+    Returns:
+        Number of registrations written
+    """
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    ws = wb.create_sheet("Ro'yxatlar")
+
+    # Column widths must be set before the first row is written
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
 
     # Title row
-    ws.merge_cells('A1:G1')
-    title_cell = ws['A1']
-    title_cell.value = "INEX CONSULTING - Uchrashuv Ro'yxatlari"
-    title_cell.font = Font(name='Arial', size=16, bold=True, color='4472C4')
-    title_cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.merged_cells.add('A1:G1')
     ws.row_dimensions[1].height = 30
+    ws.append([_styled_cell(ws, "INEX CONSULTING - Uchrashuv Ro'yxatlari", 'inex_title')])
 
     # Subtitle row (date exported)
-    ws.merge_cells('A2:G2')
-    subtitle_cell = ws['A2']
-    subtitle_cell.value = f"Export qilingan sana: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-    subtitle_cell.font = Font(name='Arial', size=10, italic=True, color='666666')
-    subtitle_cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.merged_cells.add('A2:G2')
     ws.row_dimensions[2].height = 20
+    ws.append([_styled_cell(
+        ws, f"Export qilingan sana: {datetime.now().strftime('%d.%m.%Y %H:%M')}", 'inex_subtitle'
+    )])
 
-    # Headers
-    headers = ['№', 'Ism-Familiya', 'Telefon', 'Manzil', 'Korxona', 'Uchrashuv sanasi', "Ro'yxatdan o'tgan vaqt"]
-    header_row = 4
-
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=header_row, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
+    ws.append([])
 
-    ws.row_dimensions[header_row].height = 25
+    # Headers
+    ws.row_dimensions[HEADER_ROW].height = 25
+    ws.append([_styled_cell(ws, header, 'inex_header') for header in HEADERS])
 
     # Data rows
-    for row_num, registration in enumerate(registrations, start=header_row + 1):
-        # Row number
-        ws.cell(row=row_num, column=1).value = row_num - header_row
-
-        # Full name
-        ws.cell(row=row_num, column=2).value = registration.get('fullname', '')
-
-        # Phone
-        ws.cell(row=row_num, column=3).value = registration.get('phone', '')
-
-        # Address
-        ws.cell(row=row_num, column=4).value = registration.get('address', '')
-
-        # Company
-        ws.cell(row=row_num, column=5).value = registration.get('company', '')
-
-        # Meeting date
-        ws.cell(row=row_num, column=6).value = registration.get('meeting_date', '')
-
-        # Created at
-        ws.cell(row=row_num, column=7).value = registration.get('created_at', '')
-
-        # Apply styling to all cells in the row
-        fill = light_fill if (row_num - header_row) % 2 == 0 else white_fill
-
-        for col_num in range(1, 8):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.font = data_font
-            cell.alignment = data_alignment
-            cell.border = thin_border
-            cell.fill = fill
-
-        # Center align row number and date columns
-        ws.cell(row=row_num, column=1).alignment = Alignment(horizontal='center', vertical='center')
-        ws.cell(row=row_num, column=6).alignment = Alignment(horizontal='center', vertical='center')
-        ws.cell(row=row_num, column=7).alignment = Alignment(horizontal='center', vertical='center')
-
-        ws.row_dimensions[row_num].height = 20
-
-    # Column widths
-    column_widths = {
-        'A': 8,   # №
-        'B': 25,  # Ism-Familiya
-        'C': 18,  # Telefon
-        'D': 30,  # Manzil
-        'E': 25,  # Korxona
-        'F': 20,  # Uchrashuv sanasi
-        'G': 20   # Ro'yxatdan o'tgan vaqt
-    }
-
-    for col, width in column_widths.items():
-        ws.column_dimensions[col].width = width
+    count = 0
+    try:
+        for count, registration in enumerate(registrations, start=1):
+            row_num = HEADER_ROW + count
+            fill = 'light' if count % 2 == 0 else 'white'
+
+            values = [count] + [registration.get(field, '') for field in FIELDS]
+            row = [
+                _styled_cell(
+                    ws, value,
+                    f'inex_data_{fill}_center' if col_num in CENTERED_COLUMNS else f'inex_data_{fill}'
+                )
+                for col_num, value in enumerate(values, 1)
+            ]
+
+            ws.row_dimensions[row_num].height = 20
+            ws.append(row)
+            # Row is already on disk, drop its dimension to keep memory flat
+            del ws.row_dimensions[row_num]
+    except BaseException:
+        # Aborted (e.g. cancelled export): close the half-written sheet and drop its temp file
+        _discard_sheet(ws)
+        raise
 
     # Summary row
-    last_row = len(registrations) + header_row + 2
-    ws.merge_cells(f'A{last_row}:G{last_row}')
-    summary_cell = ws.cell(row=last_row, column=1)
-    summary_cell.value = f"Jami ro'yxatlar soni: {len(registrations)}"
-    summary_cell.font = Font(name='Arial', size=11, bold=True, color='4472C4')
-    summary_cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.append([])
+    last_row = count + HEADER_ROW + 2
+    ws.merged_cells.add(f'A{last_row}:G{last_row}')
     ws.row_dimensions[last_row].height = 25
+    ws.append([_styled_cell(ws, f"Jami ro'yxatlar soni: {count}", 'inex_summary')])
+
+    wb.save(output)
+    return count
+
+
+def create_registrations_excel(registrations: Iterable[Dict[str, Any]], filename: str = None) -> str:
+    """
+    Create a beautiful Excel file from registrations data
+
+    Args:
+        registrations: Iterable of registration dictionaries
+        filename: Optional filename (auto-generated if not provided)
+
+    Returns:
+        Path to the created Excel file
+    """
+    if filename is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f'inex_registrations_{timestamp}.xlsx'
 
-    # Save file
-    wb.save(filename)
-    logger.info(f"Excel file created: {filename}")
+    count = write_registrations_excel(registrations, filename)
+    logger.info(f"Excel file created: {filename} ({count} rows)")
 
     return filename
@@ -0,0 +1,376 @@
+"""
+Registration exports for INEX CONSULTING Bot
+Builds export files in memory on dedicated worker threads, as background jobs
+"""
+import asyncio
+import io
+import itertools
+import logging
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, BinaryIO, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from config import EXPORT_CHUNK_ROWS, EXPORT_MAX_BYTES, EXPORT_MAX_CONCURRENT, EXPORT_PART_WORKERS
+from database import MAX_ROWID, Database
+from excel_export import write_registrations_excel
+from raw_export import write_registrations_csv, write_registrations_jsonl
+
+logger = logging.getLogger(__name__)
+
+# Exports never share threads with database queries of regular handlers
+export_executor = ThreadPoolExecutor(max_workers=EXPORT_MAX_CONCURRENT, thread_name_prefix='export')
+
+# Parts of split exports, shared by all jobs so exports hold a bounded number of pooled readers
+part_executor = ThreadPoolExecutor(max_workers=EXPORT_PART_WORKERS, thread_name_prefix='export-part')
+
+
+class ExportFile(NamedTuple):
+    """One document to send"""
+    filename: str
+    data: bytes
+
+
+class ExportResult(NamedTuple):
+    """Export built in memory: one workbook, a zip of parts, or several parts"""
+    files: List[ExportFile]
+    row_count: int
+    # Newest exported registration, the next delta export starts after it
+    last_id: Optional[int] = None
+    last_created_at: Optional[str] = None
+
+
+class ExportFormat(NamedTuple):
+    """Row writer and file extension of an export format"""
+    writer: Callable[[Iterable[Dict[str, Any]], BinaryIO], int]
+    extension: str
+
+
+FORMATS: Dict[str, ExportFormat] = {
+    'xlsx': ExportFormat(write_registrations_excel, 'xlsx'),
+    'csv': ExportFormat(write_registrations_csv, 'csv.gz'),
+    'jsonl': ExportFormat(write_registrations_jsonl, 'jsonl.gz'),
+}
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export builder when its job was cancelled"""
+
+
+class _Watermark:
+    """Remembers the newest registration seen while rows stream through"""
+
+    def __init__(self):
+        self.last_id: Optional[int] = None
+        self.last_created_at: Optional[str] = None
+
+    def track(self, registrations: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for registration in registrations:
+            if self.last_id is None or registration['id'] > self.last_id:
+                self.last_id = registration['id']
+                self.last_created_at = registration['created_at']
+            yield registration
+
+
+class _Progress:
+    """Sums rows written by export parts that are built on several threads"""
+
+    def __init__(self, progress: Optional[Callable[[int], None]]):
+        self._progress = progress
+        self._rows: Dict[Hashable, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def part(self, key: Hashable) -> Callable[[int], None]:
+        def report(rows_done: int):
+            with self._lock:
+                self._total += rows_done - self._rows.get(key, 0)
+                self._rows[key] = rows_done
+                total = self._total
+            if self._progress is not None:
+                self._progress(total)
+        return report
+
+    def reset(self, key: Hashable):
+        """Forget rows of a part that is going to be rebuilt"""
+        with self._lock:
+            self._total -= self._rows.pop(key, 0)
+
+
+class _Part(NamedTuple):
+    data: bytes
+    row_count: int
+    last_id: Optional[int]
+    last_created_at: Optional[str]
+
+
+def _report_progress(registrations: Iterable[Dict[str, Any]],
+                     progress: Callable[[int], None]) -> Iterator[Dict[str, Any]]:
+    for count, registration in enumerate(registrations, start=1):
+        progress(count)
+        yield registration
+
+
+def _build_file(database: Database, export_format: ExportFormat, after_id: int, until_id: int,
+                archived: bool, progress: Callable[[int], None]) -> _Part:
+    """Stream one id range of registrations into an in-memory export file"""
+    buffer = io.BytesIO()
+    watermark = _Watermark()
+
+    source = database.iter_registrations(after_id=after_id, until_id=until_id, archived=archived)
+    try:
+        row_count = export_format.writer(_report_progress(watermark.track(source), progress), buffer)
+    finally:
+        # Return the pooled reader right away, also when the export was cancelled
+        source.close()
+
+    return _Part(buffer.getvalue(), row_count, watermark.last_id, watermark.last_created_at)
+
+
+def _build_parts(database: Database, export_format: ExportFormat, id_range: Tuple[int, int],
+                 archived: bool, progress: _Progress) -> List[_Part]:
+    """Build an id range as one file, halving it until every part fits EXPORT_MAX_BYTES"""
+    after_id, until_id = id_range
+    part = _build_file(database, export_format, after_id, until_id, archived, progress.part(id_range))
+
+    if len(part.data) <= EXPORT_MAX_BYTES:
+        return [part]
+    if part.row_count <= 1:
+        raise ValueError(f"Registration {part.last_id} alone exceeds the export size limit")
+
+    logger.info(f"Export part {id_range} is {len(part.data)} bytes, splitting it in halves")
+    progress.reset(id_range)
+    parts = []
+    half = (part.row_count + 1) // 2
+    for sub_range in database.get_registration_id_ranges(half, after_id, until_id, archived=archived):
+        parts.extend(_build_parts(database, export_format, sub_range, archived, progress))
+    return parts
+
+
+def _package(parts: List[_Part], name: str, extension: str) -> List[ExportFile]:
+    """One file as is; several parts as one zip archive if it fits, else one by one"""
+    if len(parts) == 1:
+        return [ExportFile(f'{name}.{extension}', parts[0].data)]
+
+    files = [
+        ExportFile(f'{name}_part{number}of{len(parts)}.{extension}', part.data)
+        for number, part in enumerate(parts, start=1)
+    ]
+
+    buffer = io.BytesIO()
+    # Parts (xlsx, gzip) are compressed already, compressing them again gains nothing
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for file in files:
+            archive.writestr(file.filename, file.data)
+
+    if buffer.tell() <= EXPORT_MAX_BYTES:
+        return [ExportFile(f'{name}.zip', buffer.getvalue())]
+    return files
+
+
+def build_export(database: Database, fmt: str = 'xlsx', after_id: int = None, archived: bool = False,
+                 progress: Callable[[int], None] = None) -> ExportResult:
+    """
+    Stream registrations into in-memory export files (blocking)
+
+    Exports larger than EXPORT_CHUNK_ROWS are split into id ranges that
+    are built in parallel; every file sent stays under EXPORT_MAX_BYTES.
+
+    Args:
+        fmt: One of EXPORT_FORMATS (styled Excel or raw gzip CSV/JSONL)
+        after_id: Export only registrations newer than this id (delta export)
+        archived: Export the archive of past meeting dates instead
+        progress: Called with the number of rows written so far; may raise
+            ExportCancelled to stop the export
+    """
+    export_format = FORMATS[fmt]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if archived:
+        name = f'inex_archive_{timestamp}'
+    else:
+        name = f"inex_registrations{'' if after_id is None else '_new'}_{timestamp}"
+    tracker = _Progress(progress)
+
+    # An empty range still gives a file with headers
+    id_ranges = database.get_registration_id_ranges(EXPORT_CHUNK_ROWS, after_id or 0, archived=archived) \
+        or [(after_id or 0, MAX_ROWID)]
+
+    if len(id_ranges) == 1:
+        parts = _build_parts(database, export_format, id_ranges[0], archived, tracker)
+    else:
+        futures = [
+            part_executor.submit(_build_parts, database, export_format, id_range, archived, tracker)
+            for id_range in id_ranges
+        ]
+        try:
+            parts = [part for future in futures for part in future.result()]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    newest = max(parts, key=lambda part: part.last_id or 0)
+    result = ExportResult(
+        _package(parts, name, export_format.extension), sum(part.row_count for part in parts),
+        newest.last_id, newest.last_created_at
+    )
+    logger.info(
+        f"Export built: {name} ({result.row_count} rows in {len(parts)} parts, "
+        f"{', '.join(f'{file.filename} {len(file.data)} bytes' for file in result.files)})"
+    )
+    return result
+
+
+async def run_export(func, *args, **kwargs):
+    """Run a blocking export builder on the export worker thread"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(export_executor, partial(func, *args, **kwargs))
+
+
+# ========== JOB QUEUE ==========
+
+class ExportJob:
+    """
+    One export build shared by every admin who requested it
+
+    rows_done is written by the worker thread and read by the event loop.
+    """
+
+    def __init__(self, job_id: int, key: Hashable):
+        self.job_id = job_id
+        self.key = key
+        self.subscribers: Set[int] = set()
+        self.rows_done = 0
+        self.started = False
+        self.task: Optional[asyncio.Task] = None
+        self._cancel = threading.Event()
+
+    def report(self, rows_done: int):
+        """Progress callback for the builder (runs on the worker thread)"""
+        self.rows_done = rows_done
+        if self._cancel.is_set():
+            raise ExportCancelled()
+
+    def stop(self):
+        """Ask the builder to stop at the next row"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait until the job is finished or timeout passes; True if finished"""
+        await asyncio.wait({self.task}, timeout=timeout)
+        return self.task.done()
+
+    def result(self) -> ExportResult:
+        """Get the built export (raises the builder's error or ExportCancelled)"""
+        return self.task.result()
+
+
+def _log_job_result(task: asyncio.Task):
+    # Subscribers may all be gone, so the outcome is always retrieved here
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None and not isinstance(error, ExportCancelled):
+        logger.error(f"Export job failed: {error}")
+
+
+class ExportQueue:
+    """
+    Background export jobs with a concurrency limit
+
+    Requests with the same key are merged into one pending or running
+    job, so every subscriber receives the same file. A job is cancelled
+    once all of its subscribers have cancelled.
+    """
+
+    def __init__(self, max_concurrent: int = EXPORT_MAX_CONCURRENT):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._jobs: Dict[Hashable, ExportJob] = {}
+        self._by_id: Dict[int, ExportJob] = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, key: Hashable, subscriber: int, func, *args, **kwargs) -> Tuple[ExportJob, bool]:
+        """
+        Subscribe to the job for key, starting it if there is none
+
+        func runs on the export thread with an extra progress keyword argument.
+
+        Returns:
+            (job, True if a new job was started)
+        """
+        job = self._jobs.get(key)
+        if job is not None:
+            job.subscribers.add(subscriber)
+            logger.info(f"Admin {subscriber} joined export job {job.job_id} {key}")
+            return job, False
+
+        job = ExportJob(next(self._ids), key)
+        job.subscribers.add(subscriber)
+        self._jobs[key] = job
+        self._by_id[job.job_id] = job
+        job.task = asyncio.create_task(self._run(job, partial(func, *args, **kwargs)))
+        job.task.add_done_callback(_log_job_result)
+
+        logger.info(f"Export job {job.job_id} {key} queued by admin {subscriber}")
+        return job, True
+
+    def get(self, job_id: int) -> Optional[ExportJob]:
+        return self._by_id.get(job_id)
+
+    def find(self, key: Hashable) -> Optional[ExportJob]:
+        """Get the pending or running job for key"""
+        return self._jobs.get(key)
+
+    def cancel(self, job_id: int, subscriber: int) -> bool:
+        """
+        Unsubscribe from a job; the build itself stops when nobody is left
+
+        Returns:
+            True if subscriber was waiting for the job
+        """
+        job = self._by_id.get(job_id)
+        if job is None or subscriber not in job.subscribers:
+            return False
+
+        job.subscribers.discard(subscriber)
+        if not job.subscribers:
+            job.stop()
+            # New requests must not join a job that is shutting down
+            self._forget(job)
+            logger.info(f"Export job {job_id} cancelled")
+        return True
+
+    def _forget(self, job: ExportJob):
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        self._by_id.pop(job.job_id, None)
+
+    async def _run(self, job: ExportJob, build) -> ExportResult:
+        try:
+            async with self._semaphore:
+                if job.cancelled:
+                    raise ExportCancelled()
+                job.started = True
+                return await run_export(build, progress=job.report)
+        finally:
+            self._forget(job)
+
+    async def close(self):
+        """Cancel all jobs and wait for running builds to stop"""
+        jobs = list(self._by_id.values())
+        for job in jobs:
+            job.subscribers.clear()
+            job.stop()
+        if jobs:
+            await asyncio.wait({job.task for job in jobs})
+        export_executor.shutdown(wait=True)
+        part_executor.shutdown(wait=True)
+
+
+export_queue = ExportQueue()
@@ -0,0 +1,189 @@
+"""
+FSM storage for INEX CONSULTING Bot
+Keeps conversation states in the bot database so half-filled forms survive restarts
+"""
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from cache import TTLCache
+from config import (
+    FSM_STORAGE,
+    FSM_FLUSH_INTERVAL,
+    FSM_STATE_TTL,
+    FSM_SWEEP_INTERVAL,
+    FSM_MAX_ENTRIES
+)
+from database import AsyncDatabase, async_db
+from write_buffer import WriteBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage on the bot's SQLite database
+
+    Changes go to a write buffer first and are written in one transaction
+    every FSM_FLUSH_INTERVAL seconds, so a burst of update_data() calls
+    costs one commit instead of one per call. Reads see buffered changes
+    before they reach the database. A crash loses at most the last
+    flush interval; a normal shutdown flushes everything. Records not
+    changed for `ttl` seconds are swept.
+    """
+
+    def __init__(self, database: AsyncDatabase = async_db, key_builder: Optional[KeyBuilder] = None,
+                 flush_interval: float = FSM_FLUSH_INTERVAL, ttl: float = FSM_STATE_TTL):
+        self.database = database
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.buffer = WriteBuffer()
+        self._flush_lock = threading.Lock()
+
+    def start(self):
+        """Start flushing buffered changes and sweeping abandoned states in the background"""
+        self.database.start_periodic(self.flush, self.flush_interval)
+        self.database.start_periodic(self.sweep, FSM_SWEEP_INTERVAL)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        self.buffer.update(self.key_builder.build(key), {'state': state})
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        fields = await self._get_fields(key, 'state')
+        return fields['state'] if fields else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        # Serialized right away: a value JSON cannot store fails in the handler, not in a flush
+        self.buffer.update(self.key_builder.build(key), {'data': json.dumps(data, ensure_ascii=False)})
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        fields = await self._get_fields(key, 'data')
+        return json.loads(fields['data']) if fields else {}
+
+    async def _get_fields(self, key: StorageKey, column: str) -> Optional[Dict[str, Any]]:
+        """Buffered columns if they contain `column`, else the stored record"""
+        storage_key = self.key_builder.build(key)
+        fields = self.buffer.get(storage_key)
+        if fields and column in fields:
+            return fields
+        return await self.database.get_fsm_record(storage_key)
+
+    def flush(self) -> int:
+        """Write all buffered changes in a single transaction (blocking)"""
+        with self._flush_lock:
+            pending = self.buffer.begin_flush()
+            success = False
+            try:
+                if pending:
+                    self.database.db.save_fsm_records(pending)
+                success = True
+            finally:
+                self.buffer.end_flush(success)
+
+        if pending:
+            logger.debug(f"Flushed {len(pending)} FSM state changes")
+        return len(pending)
+
+    def sweep(self) -> int:
+        """Delete records not changed for the TTL (blocking)"""
+        removed = self.database.db.purge_expired_fsm_records(self.ttl)
+        if removed:
+            logger.info(f"Removed {removed} abandoned FSM states")
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        """Gauges: stored keys (a trigger-maintained counter) and changes waiting for a flush"""
+        return {
+            'backend': 'sqlite',
+            'keys': await self.database.get_fsm_records_count(),
+            'pending': len(self.buffer),
+        }
+
+    async def close(self) -> None:
+        await self.database.run(self.flush)
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """
+    In-process FSM storage with per-key TTL and an entry limit
+
+    Unlike aiogram's MemoryStorage, a key is dropped when its state is
+    cleared and its data is empty, when it has not changed for `ttl`
+    seconds, or when it is the least recently used one and the storage
+    is full. Memory stays bounded however many users start a form and
+    walk away. Everything is lost on restart.
+    """
+
+    def __init__(self, database: AsyncDatabase = async_db, maxsize: int = FSM_MAX_ENTRIES,
+                 ttl: float = FSM_STATE_TTL):
+        # Only used to schedule the sweeper
+        self.database = database
+        # key -> (state, data); the cache is thread-safe, so the sweeper can run on the executor
+        self.records = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def start(self):
+        """Start sweeping expired states in the background"""
+        self.database.start_periodic(self.sweep, FSM_SWEEP_INTERVAL)
+
+    def _get(self, key: StorageKey):
+        return self.records.get(key, (None, {}))
+
+    def _set(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        if state is None and not data:
+            self.records.invalidate(key)
+        else:
+            # Every change restarts the TTL
+            self.records.set(key, (state, data))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        self._set(key, state, self._get(key)[1])
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._get(key)[0]
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self._set(key, self._get(key)[0], data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return self._get(key)[1].copy()
+
+    def sweep(self) -> int:
+        """Drop expired states (blocking)"""
+        removed = self.records.purge_expired()
+        if removed:
+            logger.info(f"Removed {removed} abandoned FSM states")
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        """Gauges: live keys, approximate bytes held by their data, evictions"""
+        records = self.records.items()
+        cache_stats = self.records.stats()
+        return {
+            'backend': 'memory',
+            'keys': len(records),
+            'bytes': sum(
+                len(state or '') + len(json.dumps(data, ensure_ascii=False, default=str).encode())
+                for _, (state, data) in records
+            ),
+            'evictions': cache_stats['evictions'],
+            'expirations': cache_stats['expirations'],
+        }
+
+    async def close(self) -> None:
+        self.records.clear()
+
+
+def create_storage(kind: str = FSM_STORAGE) -> BaseStorage:
+    """FSM storage selected by the FSM_STORAGE setting"""
+    if kind == 'sqlite':
+        return SQLiteStorage()
+    if kind == 'memory':
+        return BoundedMemoryStorage()
+    raise ValueError(f"Unknown FSM_STORAGE: {kind!r} (expected 'sqlite' or 'memory')")
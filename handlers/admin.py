@@ -3,28 +3,57 @@ Admin handlers for INEX CONSULTING Bot
 """
 from aiogram import Router, F
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    BufferedInputFile,
+    FSInputFile,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent
+)
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage
 from datetime import datetime
+import html
 import logging
-import re
 import os
+import re
 
 from states import AdminStates
 from custom_calendar import get_current_month_keyboard, get_month_keyboard
-from database import db
+from database import async_db
 from keyboards import (
     get_admin_main_keyboard,
     get_admin_dates_management_keyboard,
     get_admin_dates_list_keyboard,
-    get_back_to_admin_keyboard,
     get_cancel_keyboard,
     get_save_dates_keyboard,
-    get_export_confirm_keyboard
+    get_export_confirm_keyboard,
+    get_export_progress_keyboard,
+    get_archive_keyboard,
+    get_registrations_page_keyboard,
+    get_search_page_keyboard,
+    get_stats_keyboard,
+    get_dates_added_keyboard,
+    get_broadcast_confirm_keyboard,
+    get_broadcast_progress_keyboard
 )
 from texts import get_text
-from config import ADMIN_IDS
-from excel_export import create_registrations_excel
+from config import (
+    ADMIN_IDS,
+    BROADCAST_PROGRESS_INTERVAL,
+    EXPORT_FORMATS,
+    EXPORT_MAX_BYTES,
+    EXPORT_PROGRESS_INTERVAL,
+    INLINE_SEARCH_PAGE_SIZE,
+    LANGUAGES,
+    REGISTRATIONS_PAGE_SIZE
+)
+from exports import ExportCancelled, build_export, export_queue
+from backup import backups
+from broadcasts import broadcast_progress, broadcaster
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +65,18 @@ def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
 
+def format_registration(reg: dict, language: str) -> str:
+    """Registration card as shown in admin lists (user input is HTML-escaped)"""
+    return get_text('registration_item', language,
+                    id=reg['id'],
+                    fullname=html.escape(reg['fullname']),
+                    phone=html.escape(reg['phone']),
+                    address=html.escape(reg['address']),
+                    company=html.escape(reg['company']),
+                    date=reg['meeting_date'],
+                    created_at=reg['created_at'])
+
+
 # ========== ADMIN COMMAND ==========
 
 @router.message(Command('admin'))
@@ -46,7 +87,7 @@ async def cmd_admin(message: Message, state: FSMContext):
         return
 
     # Get user language preference
-    user = db.get_user(message.from_user.id)
+    user = await async_db.get_user(message.from_user.id)
     language = user['language'] if user else 'uz'
 
     await message.answer(
@@ -59,44 +100,170 @@ async def cmd_admin(message: Message, state: FSMContext):
 
 # ========== VIEW REGISTRATIONS ==========
 
+async def show_registrations_page(callback: CallbackQuery, state: FSMContext,
+                                  cursor: tuple = None, newer: bool = False):
+    """Render one page of registrations (fetches only that page)"""
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    page = await async_db.get_registrations_page(cursor, newer)
+
+    if not page.rows:
+        await callback.answer(get_text('no_registrations', language), show_alert=True)
+        return
+
+    # Total is counted once when the list is opened, not on every page
+    count = user_data.get('registrations_total')
+    if count is None or cursor is None:
+        count = await async_db.get_registrations_count()
+        await state.update_data(registrations_total=count)
+
+    message_text = get_text('registrations_list', language, count=count)
+
+    for reg in page.rows:
+        message_text += format_registration(reg, language)
+
+    await callback.message.edit_text(
+        message_text,
+        reply_markup=get_registrations_page_keyboard(page.newer_cursor, page.older_cursor, language)
+    )
+    await callback.answer()
+
+
 @router.callback_query(F.data == 'admin_view_registrations')
 async def view_registrations(callback: CallbackQuery, state: FSMContext):
-    """View all registrations"""
+    """View registrations (first page)"""
     if not is_admin(callback.from_user.id):
         await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
         return
 
+    await show_registrations_page(callback, state)
+
+
+@router.callback_query(F.data.startswith('regs_'))
+async def paginate_registrations(callback: CallbackQuery, state: FSMContext):
+    """Handle registrations list next/previous buttons"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    # regs_<newer|older>_<id>_<created_at>
+    _, direction, reg_id, created_at = callback.data.split('_', 3)
+
+    await show_registrations_page(
+        callback, state,
+        cursor=(created_at, int(reg_id)),
+        newer=direction == 'newer'
+    )
+
+
+# ========== SEARCH ==========
+
+async def render_search_page(state: FSMContext, offset: int):
+    """Text and keyboard of one page of /find results (None when nothing matched)"""
     user_data = await state.get_data()
     language = user_data.get('language', 'uz')
+    query = user_data.get('find_query', '')
 
-    registrations = db.get_registrations()
+    results = await async_db.search_registrations(query, offset)
+    if not results.rows:
+        return None
 
-    if not registrations:
+    # Total is counted once per search, not on every page
+    count = user_data.get('find_total')
+    if count is None or offset == 0:
+        count = await async_db.count_search_results(query)
+        await state.update_data(find_total=count)
+
+    message_text = get_text('find_results', language, query=html.escape(query), count=count)
+    for reg in results.rows:
+        message_text += format_registration(reg, language)
+
+    prev_offset = max(offset - REGISTRATIONS_PAGE_SIZE, 0) if offset > 0 else None
+    return message_text, get_search_page_keyboard(prev_offset, results.next_offset, language)
+
+
+@router.message(Command('find'))
+async def cmd_find(message: Message, state: FSMContext):
+    """Full-text search over registrations: /find <text>"""
+    if not is_admin(message.from_user.id):
+        await message.answer(get_text('not_admin', 'uz'))
+        return
+
+    user = await async_db.get_user(message.from_user.id)
+    language = user['language'] if user else 'uz'
+
+    parts = message.text.split(maxsplit=1)
+    query = parts[1].strip() if len(parts) > 1 else ''
+
+    if not query:
+        await message.answer(get_text('find_usage', language))
+        return
+
+    # Callback data is too short for the query, pages only carry the offset
+    await state.update_data(language=language, find_query=query, find_total=None)
+
+    page = await render_search_page(state, 0)
+    if page is None:
+        await message.answer(get_text('find_empty', language, query=html.escape(query)))
+        return
+
+    message_text, keyboard = page
+    await message.answer(message_text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith('find_'))
+async def paginate_search(callback: CallbackQuery, state: FSMContext):
+    """Switch /find result pages"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    page = await render_search_page(state, int(callback.data.split('_', 1)[1]))
+    if page is None:
         await callback.answer(get_text('no_registrations', language), show_alert=True)
         return
 
-    # Format registrations list
-    count = len(registrations)
-    message_text = get_text('registrations_list', language, count=count)
+    message_text, keyboard = page
+    await callback.message.edit_text(message_text, reply_markup=keyboard)
+    await callback.answer()
+
 
-    for reg in registrations[:20]:  # Limit to 20 to avoid message too long
-        message_text += get_text('registration_item', language,
-                                id=reg['id'],
-                                fullname=reg['fullname'],
-                                phone=reg['phone'],
-                                address=reg['address'],
-                                company=reg['company'],
-                                date=reg['meeting_date'],
-                                created_at=reg['created_at'])
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery):
+    """Search registrations from any chat: @bot <text>"""
+    if not is_admin(inline_query.from_user.id):
+        await inline_query.answer([], cache_time=300, is_personal=True)
+        return
 
-    if count > 20:
-        message_text += f"\n\n... va yana {count - 20} ta ro'yxat"
+    user = await async_db.get_user(inline_query.from_user.id)
+    language = user['language'] if user else 'uz'
 
-    await callback.message.edit_text(
-        message_text,
-        reply_markup=get_back_to_admin_keyboard(language)
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    results = await async_db.search_registrations(inline_query.query, offset, INLINE_SEARCH_PAGE_SIZE)
+
+    articles = [
+        InlineQueryResultArticle(
+            id=str(reg['id']),
+            title=reg['fullname'],
+            description=f"{reg['phone']} · {reg['company']} · {reg['meeting_date']}",
+            input_message_content=InputTextMessageContent(
+                message_text=format_registration(reg, language).strip()
+            )
+        )
+        for reg in results.rows
+    ]
+
+    # Results are personal (admins only) and change with every registration
+    await inline_query.answer(
+        articles,
+        cache_time=5,
+        is_personal=True,
+        next_offset=str(results.next_offset) if results.next_offset is not None else ''
     )
-    await callback.answer()
 
 
 # ========== MANAGE DATES ==========
@@ -231,17 +398,18 @@ async def save_selected_dates(callback: CallbackQuery, state: FSMContext):
         return
 
     # Add all selected dates to database
-    added_count = 0
+    added_dates = []
     for date_str in selected_dates:
-        success = db.add_meeting_date(date_str)
+        success = await async_db.add_meeting_date(date_str)
         if success:
-            added_count += 1
+            added_dates.append(date_str)
 
-    # Show result
-    if added_count > 0:
+    # Show result, offering to announce the new dates to users
+    if added_dates:
+        await state.update_data(announce_dates=added_dates)
         await callback.message.edit_text(
-            get_text('dates_added_successfully', language, count=added_count),
-            reply_markup=get_admin_main_keyboard(language)
+            get_text('dates_added_successfully', language, count=len(added_dates)),
+            reply_markup=get_dates_added_keyboard(language)
         )
     else:
         await callback.message.edit_text(
@@ -265,7 +433,7 @@ async def remove_date_start(callback: CallbackQuery, state: FSMContext):
     user_data = await state.get_data()
     language = user_data.get('language', 'uz')
 
-    dates = db.get_active_meeting_dates()
+    dates = await async_db.get_active_meeting_dates()
 
     if not dates:
         await callback.answer(get_text('no_dates_available', language), show_alert=True)
@@ -292,12 +460,12 @@ async def process_remove_date(callback: CallbackQuery, state: FSMContext):
     date = callback.data.replace('remove_date_', '')
 
     # Remove from database
-    db.delete_meeting_date(date)
+    await async_db.delete_meeting_date(date)
 
     await callback.answer(get_text('date_removed', language, date=date), show_alert=True)
 
     # Show updated dates list
-    dates = db.get_active_meeting_dates()
+    dates = await async_db.get_active_meeting_dates()
 
     if dates:
         await callback.message.edit_text(
@@ -337,6 +505,7 @@ async def admin_back(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == 'cancel', AdminStates.adding_date)
 @router.callback_query(F.data == 'cancel', AdminStates.removing_date)
 @router.callback_query(F.data == 'cancel', AdminStates.replying_to_user)
+@router.callback_query(F.data == 'cancel', AdminStates.entering_broadcast)
 async def admin_cancel(callback: CallbackQuery, state: FSMContext):
     """Cancel admin operation"""
     if not is_admin(callback.from_user.id):
@@ -367,7 +536,7 @@ async def start_reply_to_user(callback: CallbackQuery, state: FSMContext):
     user_id = int(callback.data.replace('reply_user_', ''))
 
     # Get admin's language preference
-    admin_user = db.get_user(callback.from_user.id)
+    admin_user = await async_db.get_user(callback.from_user.id)
     language = admin_user['language'] if admin_user else 'uz'
 
     # Save user_id and language in state
@@ -408,7 +577,7 @@ async def process_reply_message(message: Message, state: FSMContext, bot: any):
         return
 
     # Get user's language preference
-    user = db.get_user(reply_to_user_id)
+    user = await async_db.get_user(reply_to_user_id)
     user_language = user['language'] if user else 'uz'
 
     logger.info(f"Sending reply to user {reply_to_user_id} in {user_language}: {reply_text[:50]}")
@@ -445,23 +614,23 @@ async def export_and_clear_start(callback: CallbackQuery, state: FSMContext):
     language = user_data.get('language', 'uz')
 
     # Check if there's data to export
-    registrations_count = db.get_registrations_count()
+    registrations_count = await async_db.get_registrations_count()
 
     if registrations_count == 0:
         await callback.answer(get_text('no_data_to_export', language), show_alert=True)
         return
 
-    # Show confirmation
+    # Show confirmation (with the format picked last time)
     await callback.message.edit_text(
         get_text('export_confirm', language),
-        reply_markup=get_export_confirm_keyboard(language)
+        reply_markup=get_export_confirm_keyboard(language, user_data.get('export_format', 'xlsx'))
     )
     await callback.answer()
 
 
-@router.callback_query(F.data == 'confirm_export_and_clear')
-async def confirm_export_and_clear(callback: CallbackQuery, state: FSMContext, bot):
-    """Process export and clear operation"""
+@router.callback_query(F.data.startswith(('export_format_', 'archive_format_')))
+async def select_export_format(callback: CallbackQuery, state: FSMContext):
+    """Pick the export file format (styled Excel or raw gzip CSV/JSONL)"""
     if not is_admin(callback.from_user.id):
         await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
         return
@@ -469,47 +638,141 @@ async def confirm_export_and_clear(callback: CallbackQuery, state: FSMContext, b
     user_data = await state.get_data()
     language = user_data.get('language', 'uz')
 
-    # Show processing message
-    await callback.message.edit_text(get_text('export_processing', language))
+    prefix, export_format = callback.data.split('_format_', 1)
+    if export_format not in EXPORT_FORMATS:
+        await callback.answer()
+        return
 
-    try:
-        # Get all registrations
-        registrations = db.get_registrations()
+    if export_format != user_data.get('export_format', 'xlsx'):
+        await state.update_data(export_format=export_format)
+        keyboard = get_archive_keyboard if prefix == 'archive' else get_export_confirm_keyboard
+        await callback.message.edit_reply_markup(
+            reply_markup=keyboard(language, export_format)
+        )
+    await callback.answer()
+
+
+@router.callback_query(F.data.in_({'confirm_export_and_clear', 'confirm_export_new', 'confirm_export_archive'}))
+async def confirm_export_and_clear(callback: CallbackQuery, state: FSMContext, bot):
+    """
+    Process export operation (full or only new since the admin's last export)
+
+    The file is built by a background export job. Admins asking for the
+    same export at the same time share one job and get the same file.
+    """
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
 
-        if not registrations:
-            await callback.answer(get_text('no_data_to_export', language), show_alert=True)
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+    admin_id = callback.from_user.id
+    delta = callback.data == 'confirm_export_new'
+    archived = callback.data == 'confirm_export_archive'
+    export_format = user_data.get('export_format', 'xlsx')
+
+    try:
+        after_id = None
+        if delta:
+            watermark = await async_db.get_export_watermark(admin_id)
+            after_id = watermark['last_id'] if watermark else 0
+            pending_count = await async_db.count_registrations_after(after_id)
+            empty_text = 'no_new_data_to_export'
+            # Delta exports depend on the admin's own watermark
+            job_key = ('new', export_format, admin_id)
+        elif archived:
+            pending_count = await async_db.get_archived_count()
+            empty_text = 'archive_empty'
+            job_key = ('archive', export_format)
+        else:
+            pending_count = await async_db.get_registrations_count()
+            empty_text = 'no_data_to_export'
+            job_key = ('full', export_format)
+
+        if pending_count == 0:
+            await callback.answer(get_text(empty_text, language), show_alert=True)
             await callback.message.edit_text(
                 get_text('admin_panel', language),
                 reply_markup=get_admin_main_keyboard(language)
             )
             return
 
-        # Create Excel file
-        excel_file = create_registrations_excel(registrations)
+        running = export_queue.find(job_key)
+        if running is not None and admin_id in running.subscribers:
+            # Repeated tap, this admin is already waiting for the same export
+            await callback.answer(get_text('export_already_running', language))
+            return
 
-        # Send Excel file to admin
-        file = FSInputFile(excel_file)
-        await bot.send_document(
-            callback.from_user.id,
-            file,
-            caption=f"📊 INEX CONSULTING ro'yxatlari\n\nJami: {len(registrations)} ta"
+        job, _ = export_queue.submit(
+            job_key, admin_id, build_export, async_db.db,
+            fmt=export_format, after_id=after_id, archived=archived
         )
 
-        # Delete local Excel file
-        try:
-            os.remove(excel_file)
-            logger.info(f"Deleted temporary Excel file: {excel_file}")
-        except Exception as e:
-            logger.warning(f"Could not delete Excel file {excel_file}: {e}")
+        # Show processing message with a cancel button
+        progress_markup = get_export_progress_keyboard(job.job_id, language)
+        await callback.message.edit_text(get_text('export_processing', language), reply_markup=progress_markup)
+        await callback.answer()
+
+        shown_rows = 0
+        while not await job.wait(EXPORT_PROGRESS_INTERVAL):
+            if admin_id not in job.subscribers:
+                break
+            if job.rows_done != shown_rows:
+                shown_rows = job.rows_done
+                try:
+                    await callback.message.edit_text(
+                        get_text('export_progress', language, rows=shown_rows),
+                        reply_markup=progress_markup
+                    )
+                except TelegramBadRequest:
+                    # Progress is cosmetic, a failed edit must not fail the export
+                    pass
+
+        if admin_id not in job.subscribers:
+            # Cancelled by this admin, the cancel handler already updated the message
+            return
+
+        export = job.result()
+        if archived:
+            title = "INEX CONSULTING arxivi"
+        elif delta:
+            title = "INEX CONSULTING yangi ro'yxatlari"
+        else:
+            title = "INEX CONSULTING ro'yxatlari"
+
+        # Send export files to admin straight from memory (nothing is written to disk)
+        for number, file in enumerate(export.files, start=1):
+            caption = f"📊 {title}\n\nJami: {export.row_count} ta"
+            if len(export.files) > 1:
+                caption += f"\n📦 {number}/{len(export.files)}"
+            await bot.send_document(
+                admin_id,
+                BufferedInputFile(file.data, filename=file.filename),
+                caption=caption
+            )
+
+        # Advance the watermark only once every file has been delivered
+        # (archived ids are interleaved with current ones, so archive exports never move it)
+        if export.last_id is not None and not archived:
+            await async_db.set_export_watermark(admin_id, export.last_id, export.last_created_at)
 
         # Show success message (database NOT cleared!)
-        success_msg = "✅ Excel fayl yuborildi!\n\n💾 Database saqlanib qoldi." if language == 'uz' else "✅ Excel файл отправлен!\n\n💾 База данных сохранена."
+        success_msg = "✅ Fayl yuborildi!\n\n💾 Database saqlanib qoldi." if language == 'uz' else "✅ Файл отправлен!\n\n💾 База данных сохранена."
         await callback.message.edit_text(
             success_msg,
             reply_markup=get_admin_main_keyboard(language)
         )
 
-        logger.info(f"Admin {callback.from_user.id} exported {len(registrations)} registrations to Excel (database NOT cleared)")
+        logger.info(
+            f"Admin {admin_id} exported {export.row_count} {'new ' if delta else 'archived ' if archived else ''}registrations "
+            f"to {export_format} (database NOT cleared)"
+        )
+
+    except ExportCancelled:
+        await callback.message.edit_text(
+            get_text('export_cancelled', language),
+            reply_markup=get_admin_main_keyboard(language)
+        )
 
     except Exception as e:
         logger.error(f"Error during export: {e}")
@@ -519,4 +782,355 @@ async def confirm_export_and_clear(callback: CallbackQuery, state: FSMContext, b
             reply_markup=get_admin_main_keyboard(language)
         )
 
+
+@router.callback_query(F.data.startswith('export_cancel_'))
+async def cancel_export(callback: CallbackQuery, state: FSMContext):
+    """Stop waiting for an export; the job stops when no admin waits for it"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    job_id = int(callback.data.rsplit('_', 1)[1])
+
+    if not export_queue.cancel(job_id, callback.from_user.id):
+        await callback.answer(get_text('export_not_running', language), show_alert=True)
+        return
+
+    await callback.message.edit_text(
+        get_text('export_cancelled', language),
+        reply_markup=get_admin_main_keyboard(language)
+    )
+    await callback.answer()
+
+    logger.info(f"Admin {callback.from_user.id} cancelled export job {job_id}")
+
+
+# ========== ARCHIVE ==========
+
+@router.callback_query(F.data == 'admin_archive')
+async def view_archive(callback: CallbackQuery, state: FSMContext):
+    """Show archive size with the archive export button"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    archived = await async_db.get_archived_count()
+    current = await async_db.get_registrations_count()
+
+    await callback.message.edit_text(
+        get_text('archive_info', language, archived=archived, current=current),
+        reply_markup=get_archive_keyboard(language, user_data.get('export_format', 'xlsx'))
+    )
+    await callback.answer()
+
+
+@router.message(Command('archive'))
+async def cmd_archive(message: Message, state: FSMContext):
+    """List archived registrations of one meeting date: /archive DD.MM.YYYY"""
+    if not is_admin(message.from_user.id):
+        await message.answer(get_text('not_admin', 'uz'))
+        return
+
+    user = await async_db.get_user(message.from_user.id)
+    language = user['language'] if user else 'uz'
+
+    parts = message.text.split(maxsplit=1)
+    meeting_date = parts[1].strip() if len(parts) > 1 else ''
+
+    try:
+        # Stored dates are zero-padded, accept 1.2.2025 as well
+        meeting_date = datetime.strptime(meeting_date, '%d.%m.%Y').strftime('%d.%m.%Y')
+    except ValueError:
+        await message.answer(get_text('archive_usage', language))
+        return
+
+    registrations = await async_db.get_archived_registrations_by_date(meeting_date)
+
+    if not registrations:
+        await message.answer(get_text('archive_date_empty', language, date=meeting_date))
+        return
+
+    message_text = get_text('archive_date_list', language, date=meeting_date, count=len(registrations))
+
+    for reg in registrations:
+        message_text += format_registration(reg, language)
+
+    await message.answer(message_text)
+
+
+# ========== STATISTICS ==========
+
+STATS_DAYS = 7
+
+
+@router.callback_query(F.data == 'admin_stats')
+async def view_stats(callback: CallbackQuery, state: FSMContext, fsm_storage: BaseStorage):
+    """Statistics dashboard (reads counters only, no table scans)"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    stats = await async_db.get_stats(STATS_DAYS)
+    active_users = await async_db.get_active_users_count()
+    failed_notifications = await async_db.count_failed_messages()
+    cache_stats = async_db.get_user_cache_stats()
+
+    fsm = ''
+    if hasattr(fsm_storage, 'stats'):
+        fsm_stats = await fsm_storage.stats()
+        if fsm_stats['backend'] == 'memory':
+            fsm = get_text('stats_fsm_memory', language, kb=fsm_stats['bytes'] // 1024, **fsm_stats)
+        else:
+            fsm = get_text('stats_fsm_sqlite', language, **fsm_stats)
+
+    def lines(pairs):
+        if not pairs:
+            return get_text('stats_none', language)
+        return '\n'.join(
+            get_text('stats_line', language, name=html.escape(name), count=count)
+            for name, count in pairs
+        )
+
+    daily = [
+        (datetime.strptime(day, '%Y-%m-%d').strftime('%d.%m'), count)
+        for day, count in stats['daily']
+    ]
+
+    text = get_text('stats_dashboard', language,
+                    total=stats['total'],
+                    archived=stats['archived'],
+                    booked_dates=stats['booked_dates'],
+                    active_users=active_users,
+                    failed_notifications=failed_notifications,
+                    regions=lines(stats['regions']),
+                    days=STATS_DAYS,
+                    daily=lines(daily),
+                    cache_size=cache_stats['size'],
+                    cache_hit_rate=round(cache_stats['hit_rate'] * 100),
+                    fsm=fsm)
+
+    try:
+        await callback.message.edit_text(text, reply_markup=get_stats_keyboard(language))
+    except TelegramBadRequest:
+        # Refresh without changes: "message is not modified"
+        pass
+    await callback.answer()
+
+
+# ========== BROADCASTS ==========
+
+def broadcast_status_text(broadcast: dict, language: str) -> str:
+    """Progress or final result of a broadcast"""
+    key = 'broadcast_progress' if broadcast['status'] == 'running' else f"broadcast_{broadcast['status']}"
+    return get_text(key, language, **broadcast_progress(broadcast))
+
+
+@router.callback_query(F.data == 'admin_broadcast')
+async def broadcast_start(callback: CallbackQuery, state: FSMContext):
+    """Ask for the broadcast text, or show the broadcast that is still running"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    if broadcaster.running:
+        await callback.message.edit_text(
+            broadcast_status_text(broadcaster.current, language),
+            reply_markup=get_broadcast_progress_keyboard(broadcaster.current['id'], language)
+        )
+        await callback.answer()
+        return
+
+    await callback.message.edit_text(
+        get_text('broadcast_ask_text', language),
+        reply_markup=get_cancel_keyboard(language)
+    )
+    await state.set_state(AdminStates.entering_broadcast)
+    await callback.answer()
+
+
+@router.message(AdminStates.entering_broadcast, F.text)
+async def broadcast_preview(message: Message, state: FSMContext):
+    """Show the typed broadcast as users will see it"""
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    # Formatting typed by the admin is kept, as HTML like every bot message
+    text = message.html_text
+    await state.update_data(broadcast_texts={lang: text for lang in LANGUAGES})
+
+    await message.answer(
+        get_text('broadcast_preview', language, text=text),
+        reply_markup=get_broadcast_confirm_keyboard(language)
+    )
+
+
+@router.callback_query(F.data == 'broadcast_new_dates')
+async def broadcast_new_dates(callback: CallbackQuery, state: FSMContext):
+    """Preview an announcement of the dates just added, in every user's language"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+    dates = user_data.get('announce_dates')
+
+    if not dates:
+        await callback.answer()
+        return
+
+    dates_list = '\n'.join(f"📅 {date}" for date in dates)
+    texts = {lang: get_text('new_dates_announcement', lang, dates=dates_list) for lang in LANGUAGES}
+    await state.update_data(broadcast_texts=texts)
+    await state.set_state(AdminStates.entering_broadcast)
+
+    await callback.message.edit_text(
+        get_text('broadcast_preview', language, text=texts[language]),
+        reply_markup=get_broadcast_confirm_keyboard(language)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == 'broadcast_confirm', AdminStates.entering_broadcast)
+async def broadcast_confirm(callback: CallbackQuery, state: FSMContext, bot):
+    """Start the broadcast and keep its progress message up to date until it ends"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+    texts = user_data.get('broadcast_texts')
+
+    if not texts:
+        await callback.answer()
+        return
+
+    broadcast = await broadcaster.start(bot, callback.from_user.id, texts)
+    if broadcast is None:
+        await callback.answer(get_text('broadcast_already_running', language), show_alert=True)
+        return
+
+    await state.set_state(AdminStates.main_menu)
+    await state.update_data(broadcast_texts=None, announce_dates=None)
     await callback.answer()
+
+    progress_markup = get_broadcast_progress_keyboard(broadcast['id'], language)
+    shown = None
+    while True:
+        finished = await broadcaster.wait(BROADCAST_PROGRESS_INTERVAL)
+        if finished and broadcast['status'] == 'running':
+            # Interrupted by a shutdown, resumed on the next start
+            return
+
+        text = broadcast_status_text(broadcast, language)
+        if text != shown:
+            shown = text
+            try:
+                await callback.message.edit_text(
+                    text,
+                    reply_markup=get_admin_main_keyboard(language) if finished else progress_markup
+                )
+            except TelegramBadRequest:
+                # Progress is cosmetic, a failed edit must not stop the broadcast
+                pass
+
+        if finished:
+            return
+
+
+@router.callback_query(F.data == 'broadcast_status')
+async def broadcast_status(callback: CallbackQuery, state: FSMContext):
+    """Refresh the progress of the running (or last) broadcast"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+    broadcast = broadcaster.current
+
+    if broadcast is None:
+        await callback.answer(get_text('broadcast_not_running', language), show_alert=True)
+        return
+
+    if broadcaster.running:
+        markup = get_broadcast_progress_keyboard(broadcast['id'], language)
+    else:
+        markup = get_admin_main_keyboard(language)
+
+    try:
+        await callback.message.edit_text(broadcast_status_text(broadcast, language), reply_markup=markup)
+    except TelegramBadRequest:
+        # Refresh without changes: "message is not modified"
+        pass
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith('broadcast_stop_'))
+async def broadcast_stop(callback: CallbackQuery, state: FSMContext):
+    """Stop the running broadcast after the page being sent"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(get_text('not_admin', 'uz'), show_alert=True)
+        return
+
+    user_data = await state.get_data()
+    language = user_data.get('language', 'uz')
+
+    broadcast_id = int(callback.data.rsplit('_', 1)[1])
+
+    if not broadcaster.stop(broadcast_id):
+        await callback.answer(get_text('broadcast_not_running', language), show_alert=True)
+        return
+
+    await callback.answer(get_text('broadcast_stopping', language))
+    logger.info(f"Admin {callback.from_user.id} stopped broadcast {broadcast_id}")
+
+
+# ========== BACKUP ==========
+
+@router.message(Command('backup'))
+async def cmd_backup(message: Message, state: FSMContext):
+    """Send the latest database snapshot (taken now if there is none yet)"""
+    if not is_admin(message.from_user.id):
+        await message.answer(get_text('not_admin', 'uz'))
+        return
+
+    user = await async_db.get_user(message.from_user.id)
+    language = user['language'] if user else 'uz'
+
+    try:
+        path = await async_db.run(backups.latest)
+        if path is None:
+            await message.answer(get_text('backup_processing', language))
+            path = await async_db.run(backups.create)
+
+        size = os.path.getsize(path)
+        # Same upload budget as exports
+        if size > EXPORT_MAX_BYTES:
+            await message.answer(get_text('backup_too_large', language, path=path))
+            return
+
+        created = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%d.%m.%Y %H:%M')
+        await message.answer_document(
+            FSInputFile(path),
+            caption=get_text('backup_caption', language, created=created, size=size // 1024)
+        )
+
+        logger.info(f"Admin {message.from_user.id} downloaded backup {path}")
+
+    except Exception as e:
+        logger.error(f"Error sending backup: {e}")
+        await message.answer(get_text('backup_error', language))
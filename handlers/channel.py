@@ -0,0 +1,26 @@
+"""
+Channel membership updates for INEX CONSULTING Bot
+Keeps the local channel_members table current (enabled by CHANNEL_MEMBER_UPDATES)
+"""
+from aiogram import Router
+from aiogram.types import ChatMemberUpdated
+import logging
+
+from subscription import membership
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+
+@router.chat_member()
+async def channel_member_updated(event: ChatMemberUpdated):
+    """Record joins, leaves and bans in the channel"""
+    if not membership.is_channel(event.chat):
+        return
+
+    user_id = event.new_chat_member.user.id
+    status = event.new_chat_member.status
+
+    await membership.update(user_id, status)
+    logger.info(f"User {user_id} channel status changed: {event.old_chat_member.status} -> {status}")
@@ -9,7 +9,7 @@ import re
 import logging
 
 from states import UserRegistration
-from database import db
+from database import async_db
 from keyboards import (
     get_language_keyboard,
     get_channel_subscription_keyboard,
@@ -21,7 +21,9 @@ from keyboards import (
     ReplyKeyboardRemove
 )
 from texts import get_text
-from config import ADMIN_IDS, CHANNEL_ID
+from config import CHANNEL_ID
+from notifications import admin_messages, notify_admins, outbox
+from subscription import membership
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +38,7 @@ async def cmd_start(message: Message, state: FSMContext):
     user = message.from_user
 
     # Add user to database
-    db.add_user(
+    await async_db.add_user(
         user_id=user.id,
         username=user.username,
         first_name=user.first_name,
@@ -61,27 +63,24 @@ async def process_language_selection(callback: CallbackQuery, state: FSMContext,
     user_id = callback.from_user.id
 
     # Save language preference
-    db.set_user_language(user_id, language)
+    await async_db.set_user_language(user_id, language)
     await state.update_data(language=language)
 
     await callback.answer(get_text('language_changed', language))
 
     # Check if user is already subscribed to channel
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
-        logger.info(f"User {user_id} subscription status: {member.status}")
-
-        if member.status in ['member', 'administrator', 'creator']:
+        if await membership.is_subscribed(bot, user_id):
             # User is already subscribed
-            db.set_user_subscribed(user_id, True)
+            await async_db.set_user_subscribed(user_id, True)
             await callback.message.edit_text(
                 get_text('welcome', language)
             )
             # Show meeting date selection
-            await show_meeting_dates(callback.message, state, language)
+            await show_meeting_dates(callback.message, state, language, callback.from_user.id)
             return
         else:
-            logger.warning(f"User {user_id} status is '{member.status}' - not subscribed")
+            logger.warning(f"User {user_id} is not subscribed")
     except Exception as e:
         logger.error(f"Error checking subscription for user {user_id}: {e}", exc_info=True)
 
@@ -103,12 +102,10 @@ async def check_subscription(callback: CallbackQuery, state: FSMContext, bot: Bo
     language = user_data.get('language', 'uz')
 
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
-        logger.info(f"User {user_id} subscription check - status: {member.status}")
-
-        if member.status in ['member', 'administrator', 'creator']:
+        # The user says they have just joined: ask Telegram, not the cache
+        if await membership.is_subscribed(bot, user_id, force=True):
             # User is subscribed
-            db.set_user_subscribed(user_id, True)
+            await async_db.set_user_subscribed(user_id, True)
             await callback.answer()  # No alert
 
             await callback.message.edit_text(
@@ -116,11 +113,11 @@ async def check_subscription(callback: CallbackQuery, state: FSMContext, bot: Bo
             )
 
             # Show meeting date selection
-            await show_meeting_dates(callback.message, state, language)
+            await show_meeting_dates(callback.message, state, language, callback.from_user.id)
 
         else:
             # User not subscribed - edit existing message
-            logger.warning(f"User {user_id} subscription check FAILED - status: {member.status}")
+            logger.warning(f"User {user_id} subscription check FAILED - not subscribed")
             await callback.answer()  # Close loading
             await callback.message.edit_text(
                 get_text('welcome', language) + '\n\n' + get_text('not_subscribed', language),
@@ -146,12 +143,12 @@ async def check_subscription(callback: CallbackQuery, state: FSMContext, bot: Bo
 
 # ========== MEETING DATE SELECTION ==========
 
-async def show_meeting_dates(message: Message, state: FSMContext, language: str):
+async def show_meeting_dates(message: Message, state: FSMContext, language: str, user_id: int):
     """Show all meeting dates with visual indicators (available and booked)"""
-    all_dates = db.get_active_meeting_dates()
-    booked_dates = db.get_booked_meeting_dates()
+    snapshot = await async_db.get_meeting_dates_snapshot()
+    dates = snapshot.dates_for(user_id)
 
-    if not all_dates:
+    if not dates:
         await message.answer(get_text('no_dates_available', language))
         # Clear state so user can send messages freely
         await state.clear()
@@ -163,7 +160,7 @@ async def show_meeting_dates(message: Message, state: FSMContext, language: str)
 
     await message.answer(
         message_text,
-        reply_markup=get_meeting_dates_keyboard(all_dates, booked_dates, language)
+        reply_markup=get_meeting_dates_keyboard(dates, language)
     )
     await state.set_state(UserRegistration.selecting_date)
 
@@ -186,13 +183,12 @@ async def process_date_selection(callback: CallbackQuery, state: FSMContext):
     user_data = await state.get_data()
     language = user_data.get('language', 'uz')
 
-    # Check if date is still available
-    available_dates = db.get_available_meeting_dates()
-    if date not in available_dates:
+    # Hold the date while the user fills the form
+    if not await async_db.reserve_date(date, callback.from_user.id):
         await callback.answer(get_text('date_already_booked', language), show_alert=True)
 
         # Show updated available dates
-        await show_meeting_dates(callback.message, state, language)
+        await show_meeting_dates(callback.message, state, language, callback.from_user.id)
         return
 
     await state.update_data(meeting_date=date)
@@ -333,7 +329,7 @@ async def process_region_selection(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(UserRegistration.entering_company)
-async def process_company(message: Message, state: FSMContext, bot: Bot):
+async def process_company(message: Message, state: FSMContext):
     """Handle company input and complete registration"""
     user_data = await state.get_data()
     language = user_data.get('language', 'uz')
@@ -351,16 +347,34 @@ async def process_company(message: Message, state: FSMContext, bot: Bot):
     address = user_data.get('address')
     meeting_date = user_data.get('meeting_date')
 
-    registration_id = db.add_registration(
+    # Admin notification is queued in the registration's transaction and sent in the background
+    admin_message = get_text('new_registration_admin', language,
+                            fullname=fullname,
+                            phone=phone,
+                            address=address,
+                            company=company,
+                            date=meeting_date,
+                            user_id=user_id)
+
+    result = await async_db.add_registration(
         user_id=user_id,
         fullname=fullname,
         phone=phone,
         address=address,
         company=company,
-        meeting_date=meeting_date
+        meeting_date=meeting_date,
+        notifications=admin_messages(admin_message, get_reply_to_user_keyboard(user_id, language))
     )
 
-    logger.info(f"Registration completed: ID {registration_id}, User {user_id}")
+    if result.registration_id is None:
+        # The date was removed meanwhile, or the hold expired and someone else took it
+        reason = 'date_unavailable' if result.date_unavailable else 'date_already_booked'
+        await message.answer(get_text(reason, language))
+        await show_meeting_dates(message, state, language, user_id)
+        return
+
+    logger.info(f"Registration completed: ID {result.registration_id}, User {user_id}")
+    outbox.wake()
 
     # Send confirmation to user
     await message.answer(
@@ -372,25 +386,6 @@ async def process_company(message: Message, state: FSMContext, bot: Bot):
                 date=meeting_date)
     )
 
-    # Notify admins
-    admin_message = get_text('new_registration_admin', language,
-                            fullname=fullname,
-                            phone=phone,
-                            address=address,
-                            company=company,
-                            date=meeting_date,
-                            user_id=user_id)
-
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(
-                admin_id,
-                admin_message,
-                reply_markup=get_reply_to_user_keyboard(user_id, language)
-            )
-        except Exception as e:
-            logger.error(f"Failed to send notification to admin {admin_id}: {e}")
-
     # Clear state
     await state.clear()
 
@@ -404,6 +399,7 @@ async def process_cancel(callback: CallbackQuery, state: FSMContext):
     language = user_data.get('language', 'uz')
 
     await state.clear()
+    await async_db.release_date_holds(callback.from_user.id)
     await callback.message.edit_text(get_text('cancel', language))
     await callback.answer()
 
@@ -433,20 +429,17 @@ async def handle_user_message(message: Message, state: FSMContext, bot: Bot):
     user_id = user.id
 
     # Get user language
-    language = db.get_user_language(user_id)
+    language = await async_db.get_user_language(user_id)
 
     # Check if user is subscribed to channel
     try:
-        member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user_id)
-        logger.info(f"User {user_id} channel status: {member.status}")
-
-        if member.status not in ['member', 'administrator', 'creator']:
+        if not await membership.is_subscribed(bot, user_id):
             # User is not subscribed - block and force subscription
             await message.answer(
                 get_text('must_subscribe_to_use', language),
                 reply_markup=get_channel_subscription_keyboard(language)
             )
-            logger.info(f"🚫 User {user_id} BLOCKED - not subscribed. Status: {member.status}. Message: {message.text[:30]}")
+            logger.info(f"🚫 User {user_id} BLOCKED - not subscribed. Message: {message.text[:30]}")
             return
         else:
             logger.info(f"✅ User {user_id} is subscribed. Forwarding message to admin.")
@@ -471,15 +464,7 @@ async def handle_user_message(message: Message, state: FSMContext, bot: Bot):
                                   message=message.text)
 
     # Send to all admins
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(
-                admin_id,
-                admin_notification,
-                reply_markup=get_reply_to_user_keyboard(user_id, language)
-            )
-        except Exception as e:
-            logger.error(f"Failed to forward message to admin {admin_id}: {e}")
+    await notify_admins(admin_notification, get_reply_to_user_keyboard(user_id, language))
 
     # Confirm to user
     await message.answer(get_text('message_sent_to_admin', language))
@@ -9,8 +9,8 @@ from aiogram.types import (
     ReplyKeyboardRemove
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
-from typing import List
-from config import CHANNEL_URL
+from typing import List, Optional, Sequence, Tuple
+from config import CHANNEL_URL, EXPORT_FORMATS
 from texts import get_text
 
 
@@ -42,9 +42,10 @@ def get_channel_subscription_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_meeting_dates_keyboard(all_dates: List[str], booked_dates: List[str], lang: str = 'uz') -> InlineKeyboardMarkup:
+def get_meeting_dates_keyboard(dates: Sequence[Tuple[str, bool]], lang: str = 'uz') -> InlineKeyboardMarkup:
     """
     Meeting dates selection keyboard with visual indicators
+    Takes (date, is_booked) pairs from the availability snapshot
     Shows: ✅ for available dates, 🔒 for booked dates
     Layout: 3 dates per row
     """
@@ -52,8 +53,8 @@ def get_meeting_dates_keyboard(all_dates: List[str], booked_dates: List[str], la
 
     # Create buttons for all dates
     buttons = []
-    for date in all_dates:
-        if date in booked_dates:
+    for date, is_booked in dates:
+        if is_booked:
             # Booked date - show with lock icon, make non-clickable
             buttons.append(
                 InlineKeyboardButton(
@@ -100,6 +101,30 @@ def get_admin_main_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
             callback_data="admin_export_and_clear"
         )
     )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('archive', lang),
+            callback_data="admin_archive"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('statistics', lang),
+            callback_data="admin_stats"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('broadcast', lang),
+            callback_data="admin_broadcast"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('search_registrations', lang),
+            switch_inline_query_current_chat=""
+        )
+    )
 
     return builder.as_markup()
 
@@ -176,6 +201,97 @@ def get_back_to_admin_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_stats_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
+    """Statistics dashboard keyboard"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('refresh', lang),
+            callback_data="admin_stats"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('back', lang),
+            callback_data="admin_back"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_registrations_page_keyboard(newer_cursor: Optional[Tuple[str, int]],
+                                    older_cursor: Optional[Tuple[str, int]],
+                                    lang: str = 'uz') -> InlineKeyboardMarkup:
+    """
+    Registrations list pagination keyboard
+    Cursors are encoded as regs_<direction>_<id>_<created_at>
+    """
+    builder = InlineKeyboardBuilder()
+
+    nav_buttons = []
+    if newer_cursor:
+        created_at, reg_id = newer_cursor
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text=get_text('prev_page', lang),
+                callback_data=f"regs_newer_{reg_id}_{created_at}"
+            )
+        )
+    if older_cursor:
+        created_at, reg_id = older_cursor
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text=get_text('next_page', lang),
+                callback_data=f"regs_older_{reg_id}_{created_at}"
+            )
+        )
+    if nav_buttons:
+        builder.row(*nav_buttons)
+
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('back', lang),
+            callback_data="admin_back"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_search_page_keyboard(prev_offset: Optional[int], next_offset: Optional[int],
+                             lang: str = 'uz') -> InlineKeyboardMarkup:
+    """
+    Search results pagination keyboard
+    Offsets are encoded as find_<offset>, the query itself stays in the FSM data
+    """
+    builder = InlineKeyboardBuilder()
+
+    nav_buttons = []
+    if prev_offset is not None:
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text=get_text('prev_page', lang),
+                callback_data=f"find_{prev_offset}"
+            )
+        )
+    if next_offset is not None:
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text=get_text('next_page', lang),
+                callback_data=f"find_{next_offset}"
+            )
+        )
+    if nav_buttons:
+        builder.row(*nav_buttons)
+
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('back', lang),
+            callback_data="admin_back"
+        )
+    )
+    return builder.as_markup()
+
+
 def get_save_dates_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
     """Keyboard to save selected dates"""
     builder = InlineKeyboardBuilder()
@@ -206,24 +322,123 @@ def get_reply_to_user_keyboard(user_id: int, lang: str = 'uz') -> InlineKeyboard
     return builder.as_markup()
 
 
-def get_export_confirm_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
-    """Keyboard to confirm export and clear operation"""
+def _export_format_buttons(prefix: str, export_format: str, lang: str) -> List[InlineKeyboardButton]:
+    """One button per export format, the picked one is marked"""
+    return [
+        InlineKeyboardButton(
+            text=f"{'✅ ' if fmt == export_format else ''}{get_text(f'export_format_{fmt}', lang)}",
+            callback_data=f"{prefix}_{fmt}"
+        )
+        for fmt in EXPORT_FORMATS
+    ]
+
+
+def get_export_confirm_keyboard(lang: str = 'uz', export_format: str = 'xlsx') -> InlineKeyboardMarkup:
+    """Keyboard to pick the export format and confirm: everything or only new since the last export"""
     builder = InlineKeyboardBuilder()
+    builder.row(*_export_format_buttons('export_format', export_format, lang))
     builder.row(
         InlineKeyboardButton(
             text=get_text('confirm_export', lang),
             callback_data="confirm_export_and_clear"
         )
     )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('confirm_export_new', lang),
+            callback_data="confirm_export_new"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('cancel', lang),
+            callback_data="admin_back"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_archive_keyboard(lang: str = 'uz', export_format: str = 'xlsx') -> InlineKeyboardMarkup:
+    """Archive screen: pick the format and export archived registrations"""
+    builder = InlineKeyboardBuilder()
+    builder.row(*_export_format_buttons('archive_format', export_format, lang))
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('export_archive', lang),
+            callback_data="confirm_export_archive"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('back', lang),
+            callback_data="admin_back"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_export_progress_keyboard(job_id: int, lang: str = 'uz') -> InlineKeyboardMarkup:
+    """Keyboard to cancel a running export"""
+    builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(
             text=get_text('cancel', lang),
+            callback_data=f"export_cancel_{job_id}"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_dates_added_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
+    """Keyboard after new dates are saved: announce them or go back"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('announce_dates', lang),
+            callback_data="broadcast_new_dates"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('back', lang),
             callback_data="admin_back"
         )
     )
     return builder.as_markup()
 
 
+def get_broadcast_confirm_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
+    """Keyboard to send or cancel a previewed broadcast"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('broadcast_send', lang),
+            callback_data="broadcast_confirm"
+        ),
+        InlineKeyboardButton(
+            text=get_text('cancel', lang),
+            callback_data="cancel"
+        )
+    )
+    return builder.as_markup()
+
+
+def get_broadcast_progress_keyboard(broadcast_id: int, lang: str = 'uz') -> InlineKeyboardMarkup:
+    """Keyboard of a running broadcast"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text=get_text('refresh', lang),
+            callback_data="broadcast_status"
+        ),
+        InlineKeyboardButton(
+            text=get_text('broadcast_stop', lang),
+            callback_data=f"broadcast_stop_{broadcast_id}"
+        )
+    )
+    return builder.as_markup()
+
+
 def get_regions_keyboard(lang: str = 'uz') -> InlineKeyboardMarkup:
     """Keyboard with all regions of Uzbekistan"""
     builder = InlineKeyboardBuilder()
@@ -5,7 +5,8 @@ from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
 from aiogram import Bot
-from config import CHANNEL_ID
+from database import async_db
+from subscription import membership
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,15 +47,27 @@ class ChannelSubscriptionMiddleware(BaseMiddleware):
         # Check subscription
         bot: Bot = data.get('bot')
         try:
-            member = await bot.get_chat_member(chat_id=CHANNEL_ID, user_id=user.id)
-            if member.status in ['member', 'administrator', 'creator']:
-                data['is_subscribed'] = True
-                return await handler(event, data)
-            else:
-                data['is_subscribed'] = False
-                return await handler(event, data)
+            data['is_subscribed'] = await membership.is_subscribed(bot, user.id)
         except Exception as e:
             logger.error(f"Error checking subscription for user {user.id}: {e}")
             # If error, allow to proceed
             data['is_subscribed'] = True
-            return await handler(event, data)
+        return await handler(event, data)
+
+
+class ActivityMiddleware(BaseMiddleware):
+    """
+    Middleware to record user activity (last_seen_at)
+    Activity is buffered in memory and written together with other user updates
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user:
+            async_db.touch_user(user.id)
+        return await handler(event, data)
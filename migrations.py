@@ -0,0 +1,547 @@
+"""
+Schema migrations for INEX CONSULTING Bot
+Schema version is tracked with PRAGMA user_version
+"""
+import re
+import sqlite3
+import logging
+from typing import Callable, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ========== MIGRATIONS ==========
+
+def _initial_schema(conn: sqlite3.Connection):
+    """Base tables (existing databases already have them)"""
+    # Users table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            language TEXT DEFAULT 'uz',
+            is_subscribed INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Meeting dates table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS meeting_dates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL UNIQUE,
+            is_active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Registrations table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS registrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            fullname TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            address TEXT NOT NULL,
+            company TEXT NOT NULL,
+            meeting_date TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+    ''')
+
+
+def _hot_query_indexes(conn: sqlite3.Connection):
+    """Indexes for date availability, per-user and ordered registration lookups"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_meeting_date
+        ON registrations (meeting_date)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_user_created
+        ON registrations (user_id, created_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_created
+        ON registrations (created_at, id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_meeting_dates_active_date
+        ON meeting_dates (is_active, date)
+    ''')
+
+
+def _users_last_seen(conn: sqlite3.Connection):
+    """Track user activity for active-user stats"""
+    conn.execute('ALTER TABLE users ADD COLUMN last_seen_at TIMESTAMP')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_last_seen
+        ON users (last_seen_at)
+    ''')
+
+
+def _date_holds(conn: sqlite3.Connection):
+    """Short-lived date reservations and one registration per meeting date"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS date_holds (
+            meeting_date TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_date_holds_user
+        ON date_holds (user_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_date_holds_expires
+        ON date_holds (expires_at)
+    ''')
+
+    duplicate = conn.execute('''
+        SELECT meeting_date FROM registrations
+        GROUP BY meeting_date
+        HAVING COUNT(*) > 1
+        LIMIT 1
+    ''').fetchone()
+
+    if duplicate:
+        # Old double bookings must be resolved by hand before uniqueness can be enforced
+        logger.warning(
+            f"Registrations already contain duplicate meeting dates (e.g. {duplicate[0]}), "
+            f"unique index on registrations.meeting_date was not created"
+        )
+        return
+
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_registrations_meeting_date
+        ON registrations (meeting_date)
+    ''')
+    conn.execute('DROP INDEX IF EXISTS idx_registrations_meeting_date')
+
+
+def _export_watermarks(conn: sqlite3.Connection):
+    """Last exported registration per admin for delta exports"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            admin_id INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            last_created_at TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _registrations_archive(conn: sqlite3.Connection):
+    """Archive for registrations of past meeting dates, day-ordered date indexes"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS registrations_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            fullname TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            address TEXT NOT NULL,
+            company TEXT NOT NULL,
+            meeting_date TEXT NOT NULL,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_archive_meeting_date
+        ON registrations_archive (meeting_date)
+    ''')
+
+    # Meeting dates are DD.MM.YYYY; these expressions (YYYYMMDD) must match
+    # the ones in database.py exactly for the planner to use the indexes
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_meeting_day
+        ON registrations (substr(meeting_date, 7, 4) || substr(meeting_date, 4, 2) || substr(meeting_date, 1, 2))
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_meeting_dates_day
+        ON meeting_dates (substr(date, 7, 4) || substr(date, 4, 2) || substr(date, 1, 2))
+    ''')
+
+
+def _registrations_search(conn: sqlite3.Connection):
+    """Full-text index over registration contact fields, kept in sync by triggers"""
+    # External content: the index stores no copy of the text, only the tokens.
+    # Uzbek apostrophes (oʻ, gʻ, ʼ) split words like the ASCII one does,
+    # so O'zbek and Oʻzbek match each other
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS registrations_fts USING fts5(
+            fullname, phone, company, address,
+            content='registrations', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2 separators 'ʻʼ‘’'", prefix='2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS registrations_fts_insert AFTER INSERT ON registrations BEGIN
+            INSERT INTO registrations_fts (rowid, fullname, phone, company, address)
+            VALUES (new.id, new.fullname, new.phone, new.company, new.address);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS registrations_fts_delete AFTER DELETE ON registrations BEGIN
+            INSERT INTO registrations_fts (registrations_fts, rowid, fullname, phone, company, address)
+            VALUES ('delete', old.id, old.fullname, old.phone, old.company, old.address);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS registrations_fts_update
+        AFTER UPDATE OF fullname, phone, company, address ON registrations BEGIN
+            INSERT INTO registrations_fts (registrations_fts, rowid, fullname, phone, company, address)
+            VALUES ('delete', old.id, old.fullname, old.phone, old.company, old.address);
+            INSERT INTO registrations_fts (rowid, fullname, phone, company, address)
+            VALUES (new.id, new.fullname, new.phone, new.company, new.address);
+        END
+    ''')
+
+    # Index the rows that existed before the triggers
+    conn.execute("INSERT INTO registrations_fts (registrations_fts) VALUES ('rebuild')")
+
+
+# (scope, key expression) of the counters of current registrations; {row} is new or old
+REGISTRATION_COUNTERS = [
+    ('total', "''"),
+    ('meeting_date', '{row}.meeting_date'),
+    ('region', '{row}.address'),
+]
+
+# Registrations received per day: history, archiving or clearing does not lower it
+DAILY_COUNTER = ('created_day', 'date({row}.created_at)')
+
+
+def _count_registration(row: str, counters=REGISTRATION_COUNTERS) -> str:
+    """Trigger statement adding the registration `row` to its counters"""
+    values = ', '.join(f"('{scope}', {key.format(row=row)}, 1)" for scope, key in counters)
+    return f'''
+            INSERT INTO stats_counters (scope, key, value) VALUES {values}
+            ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+    '''
+
+
+def _uncount_registration(row: str) -> str:
+    """Trigger statements removing the registration `row` from its counters"""
+    # One statement per counter: a row-value IN list would scan the table
+    statements = []
+    for scope, key in REGISTRATION_COUNTERS:
+        where = f"scope = '{scope}' AND key = {key.format(row=row)}"
+        statements.append(f'UPDATE stats_counters SET value = value - 1 WHERE {where};')
+        if scope != 'total':
+            # Keep one row per live key only, e.g. no rows for archived dates
+            statements.append(f'DELETE FROM stats_counters WHERE {where} AND value <= 0;')
+    return '\n'.join(statements)
+
+
+def _stats_counters(conn: sqlite3.Connection):
+    """Registration counters maintained by triggers, backfilled from existing rows"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS registrations_stats_insert AFTER INSERT ON registrations BEGIN
+            {_count_registration('new', REGISTRATION_COUNTERS + [DAILY_COUNTER])}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS registrations_stats_delete AFTER DELETE ON registrations BEGIN
+            {_uncount_registration('old')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS registrations_stats_update
+        AFTER UPDATE OF meeting_date, address ON registrations BEGIN
+            {_uncount_registration('old')}
+            {_count_registration('new')}
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS registrations_archive_stats_insert AFTER INSERT ON registrations_archive BEGIN
+            INSERT INTO stats_counters (scope, key, value) VALUES ('archived', '', 1)
+            ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS registrations_archive_stats_delete AFTER DELETE ON registrations_archive BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE scope = 'archived' AND key = '';
+        END
+    ''')
+
+    # Totals always have a row, even when zero
+    conn.execute('''
+        INSERT INTO stats_counters (scope, key, value)
+        SELECT 'total', '', COUNT(*) FROM registrations
+        UNION ALL
+        SELECT 'archived', '', COUNT(*) FROM registrations_archive
+    ''')
+    for scope, key in REGISTRATION_COUNTERS[1:]:
+        key = key.format(row='registrations')
+        conn.execute(f'''
+            INSERT INTO stats_counters (scope, key, value)
+            SELECT '{scope}', {key}, COUNT(*) FROM registrations
+            GROUP BY {key}
+        ''')
+    scope, key = DAILY_COUNTER
+    key = key.format(row='all_registrations')
+    conn.execute(f'''
+        INSERT INTO stats_counters (scope, key, value)
+        SELECT '{scope}', {key}, COUNT(*) FROM (
+            SELECT created_at FROM registrations
+            UNION ALL
+            SELECT created_at FROM registrations_archive
+        ) AS all_registrations
+        GROUP BY {key}
+    ''')
+
+
+def _fsm_states(conn: sqlite3.Connection):
+    """Conversation states and data of the persistent FSM storage"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def _fsm_states_expiry(conn: sqlite3.Connection):
+    """Index for sweeping abandoned FSM states"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fsm_states_updated
+        ON fsm_states (updated_at)
+    ''')
+
+
+def _channel_members(conn: sqlite3.Connection):
+    """Channel membership kept from chat_member updates"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS channel_members (
+            user_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _outbox(conn: sqlite3.Connection):
+    """Messages waiting for delivery, written in the transaction that produced them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            reply_markup TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Delivered messages are deleted; given-up ones keep a NULL next_attempt_at
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt
+        ON outbox (next_attempt_at)
+    ''')
+
+
+def _broadcasts(conn: sqlite3.Connection):
+    """Resumable broadcasts to all users; users who blocked the bot are skipped"""
+    conn.execute('ALTER TABLE users ADD COLUMN is_blocked INTEGER NOT NULL DEFAULT 0')
+    # Also walks reachable users in user_id order (the rowid is part of every index)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_blocked
+        ON users (is_blocked)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL,
+            texts TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_broadcasts_status
+        ON broadcasts (status)
+    ''')
+
+
+def _fsm_states_counter(conn: sqlite3.Connection):
+    """Number of stored FSM states kept in stats_counters, so the dashboard never counts rows"""
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS fsm_states_stats_insert AFTER INSERT ON fsm_states BEGIN
+            INSERT INTO stats_counters (scope, key, value) VALUES ('fsm', 'states', 1)
+            ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS fsm_states_stats_delete AFTER DELETE ON fsm_states BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE scope = 'fsm' AND key = 'states';
+        END
+    ''')
+    # Always has a row, even when zero
+    conn.execute('''
+        INSERT OR REPLACE INTO stats_counters (scope, key, value)
+        SELECT 'fsm', 'states', COUNT(*) FROM fsm_states
+    ''')
+
+
+# (version, description, apply) - append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'initial schema', _initial_schema),
+    (2, 'indexes for hot queries', _hot_query_indexes),
+    (3, 'users.last_seen_at', _users_last_seen),
+    (4, 'date holds', _date_holds),
+    (5, 'export watermarks', _export_watermarks),
+    (6, 'registrations archive', _registrations_archive),
+    (7, 'registrations full-text search', _registrations_search),
+    (8, 'statistics counters', _stats_counters),
+    (9, 'fsm states', _fsm_states),
+    (10, 'fsm states expiry', _fsm_states_expiry),
+    (11, 'channel members', _channel_members),
+    (12, 'notification outbox', _outbox),
+    (13, 'broadcasts', _broadcasts),
+    (14, 'fsm states counter', _fsm_states_counter),
+]
+
+
+# ========== RUNNER ==========
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get current schema version of the database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply all pending migrations in order
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed migration leaves the previous
+    version intact. The connection must be in autocommit mode.
+
+    Returns:
+        Schema version after migrating
+    """
+    current = get_schema_version(conn)
+
+    for version, description, apply in MIGRATIONS:
+        if version <= current:
+            continue
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            apply(conn)
+            # PRAGMA does not accept bound parameters
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            logger.error(f"Migration {version} ({description}) failed")
+            raise
+        conn.execute('COMMIT')
+
+        current = version
+        logger.info(f"Migration {version} applied: {description}")
+
+    return current
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """
+    Switch the database to incremental auto-vacuum
+
+    Changing auto_vacuum of an existing database needs a full VACUUM,
+    which cannot run inside a transaction, so this is done once outside
+    the migrations. Afterwards PRAGMA incremental_vacuum returns free
+    pages to the file system in small steps.
+
+    Returns:
+        True if the database was converted now
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+        return False
+
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    logger.info("Database converted to incremental auto-vacuum")
+    return True
+
+
+# ========== QUERY PLAN CHECK ==========
+
+LIMIT_PATTERN = re.compile(r'\bLIMIT\s+(\?|-?\d+)', re.IGNORECASE)
+
+
+def _is_bounded(sql: str, params: tuple) -> bool:
+    """Check that the query has a LIMIT whose value (or sample parameter) is positive"""
+    match = LIMIT_PATTERN.search(sql)
+    if match is None:
+        return False
+    if match.group(1) == '?':
+        # LIMIT -1 (or any negative value) means no limit at all
+        limit = params[sql.count('?', 0, match.start(1))]
+    else:
+        limit = int(match.group(1))
+    return isinstance(limit, int) and limit > 0
+
+
+def find_full_scans(conn: sqlite3.Connection, queries: dict,
+                    whole_table_reads: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Run EXPLAIN QUERY PLAN for every query and report full scans
+
+    A full scan is a table scan without an index, or a walk over a whole
+    index (even a covering one) by a query without a positive LIMIT in
+    its sample parameters. Queries named
+    in `whole_table_reads` return every row by design and are only checked
+    for table scans without an index.
+
+    Args:
+        queries: Mapping of name -> (sql, sample parameters)
+        whole_table_reads: Names of queries allowed to walk a whole index
+
+    Returns:
+        List of (query name, plan detail) for every full scan
+    """
+    full_scans = []
+    whole_table_reads = set(whole_table_reads)
+
+    for name, (sql, params) in queries.items():
+        details = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+        bounded = _is_bounded(sql, params)
+        # Scanning a subquery result is fine, its own plan rows are checked
+        subqueries = {
+            f"SCAN {detail.split(' ', 1)[1]}" for detail in details
+            if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))
+        }
+        for detail in details:
+            if detail in subqueries or not detail.startswith('SCAN'):
+                continue
+            # Full-text MATCH lookups show up as virtual table scans
+            if 'CONSTANT ROW' in detail or 'VIRTUAL TABLE' in detail:
+                continue
+            if 'INDEX' not in detail:
+                full_scans.append((name, detail))
+            elif not bounded and name not in whole_table_reads:
+                full_scans.append((name, detail))
+
+    return full_scans
@@ -0,0 +1,278 @@
+"""
+Outgoing message delivery for INEX CONSULTING Bot
+Sends to many chats at once within Telegram's rate limits, with retries,
+and delivers the persistent outbox of admin notifications
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError
+)
+from aiogram.types import InlineKeyboardMarkup
+
+from cache import TTLCache
+from config import (
+    ADMIN_IDS,
+    NOTIFY_GLOBAL_RATE,
+    NOTIFY_CHAT_RATE,
+    NOTIFY_MAX_ATTEMPTS,
+    NOTIFY_RETRY_DELAY,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_DELAY,
+    OUTBOX_MAX_RETRY_DELAY
+)
+from database import AsyncDatabase, OutboxMessage, async_db
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, at most `capacity` saved up
+
+    Waiters are served in arrival order. pause() empties the bucket so
+    nothing is let through for the given number of seconds.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait for a token and take it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Let nothing through for `seconds`, then at most one waiter"""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of sending one message"""
+    chat_id: int
+    ok: bool
+    attempts: int
+    error: Optional[str] = None
+    retryable: bool = False  # failed on network/server errors or flood control only
+    blocked: bool = False  # the user blocked the bot or the account is deactivated
+
+
+class Notifier:
+    """
+    Rate-limited sender
+
+    Every message takes a token from its chat's bucket (NOTIFY_CHAT_RATE)
+    and from the global one (NOTIFY_GLOBAL_RATE), which keeps the bot under
+    Telegram's limits of about one message per second per chat and 30 per
+    second overall. A RetryAfter pauses both buckets for the time Telegram
+    asks; network and server errors are retried with jittered exponential
+    backoff. Other errors (blocked bot, bad request) are not retried.
+    """
+
+    def __init__(self, global_rate: float = NOTIFY_GLOBAL_RATE, chat_rate: float = NOTIFY_CHAT_RATE,
+                 max_attempts: int = NOTIFY_MAX_ATTEMPTS, retry_delay: float = NOTIFY_RETRY_DELAY):
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # An idle chat's bucket is full again after a minute, so it can be dropped
+        self._chat_buckets = TTLCache(maxsize=10000, ttl=60)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id, None)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate)
+        # Refreshed on every use so a busy chat keeps its bucket
+        self._chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    async def send(self, bot: Bot, chat_id: int, text: str, **kwargs: Any) -> DeliveryResult:
+        """
+        Send one message, waiting for the rate limits and retrying transient failures
+
+        Never raises for Telegram errors: the outcome is in the result.
+        """
+        bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            attempt += 1
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await bot.send_message(chat_id, text, **kwargs)
+                return DeliveryResult(chat_id, True, attempt)
+            except TelegramRetryAfter as e:
+                # The paused buckets hold the retry (and everything else) back, no extra sleep
+                delay = 0
+                bucket.pause(e.retry_after)
+                self.global_bucket.pause(e.retry_after)
+                error = e
+                logger.warning(f"Flood control on chat {chat_id}, retrying in {e.retry_after}s")
+            except (TelegramNetworkError, TelegramServerError) as e:
+                # Full jitter keeps retries from many senders from lining up
+                delay = random.uniform(0, self.retry_delay * 2 ** (attempt - 1))
+                error = e
+            except TelegramForbiddenError as e:
+                return DeliveryResult(chat_id, False, attempt, str(e), blocked=True)
+            except Exception as e:
+                return DeliveryResult(chat_id, False, attempt, str(e))
+
+            if attempt >= self.max_attempts:
+                return DeliveryResult(chat_id, False, attempt, str(error), retryable=True)
+            if delay:
+                await asyncio.sleep(delay)
+
+
+notifier = Notifier()
+
+
+def admin_messages(text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> List[OutboxMessage]:
+    """Outbox messages carrying the same text to every admin"""
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else None
+    return [OutboxMessage(admin_id, text, markup) for admin_id in ADMIN_IDS]
+
+
+class OutboxDispatcher:
+    """
+    Delivers messages queued in the outbox table
+
+    Each round sends up to OUTBOX_BATCH_SIZE due messages concurrently
+    through the notifier, deletes the delivered ones and reschedules the
+    rest with exponential backoff (jittered, capped at
+    OUTBOX_MAX_RETRY_DELAY). Messages that cannot be delivered, or still
+    fail after OUTBOX_MAX_ATTEMPTS rounds, stay in the table with no next
+    attempt. Rounds run every OUTBOX_POLL_INTERVAL seconds and right
+    after wake(). Delivery is at least once: a crash between sending and
+    recording the round sends those messages again after the restart.
+    """
+
+    def __init__(self, database: AsyncDatabase = async_db, sender: Notifier = notifier,
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, retry_delay: float = OUTBOX_RETRY_DELAY,
+                 max_retry_delay: float = OUTBOX_MAX_RETRY_DELAY):
+        self.database = database
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot: Bot):
+        """Start delivering in the background (call from the running event loop)"""
+        self._task = asyncio.create_task(self._run(bot))
+
+    def wake(self):
+        """Run a round now, e.g. right after queueing a message"""
+        self._wakeup.set()
+
+    async def _run(self, bot: Bot):
+        while not self._closing:
+            self._wakeup.clear()
+            try:
+                handled = await self.dispatch(bot)
+            except Exception as e:
+                logger.error(f"Error delivering outbox: {e}", exc_info=True)
+                handled = 0
+
+            # A full batch means more messages may already be due
+            if handled < self.batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _next_attempt_at(self, attempts: int) -> float:
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+        return time.time() + random.uniform(delay / 2, delay)
+
+    async def dispatch(self, bot: Bot) -> int:
+        """
+        Run one delivery round
+
+        Returns:
+            Number of messages attempted
+        """
+        messages: List[Dict[str, Any]] = await self.database.get_due_messages(self.batch_size)
+        if not messages:
+            return 0
+
+        results = await asyncio.gather(*(
+            self.sender.send(
+                bot, message['chat_id'], message['text'],
+                reply_markup=(InlineKeyboardMarkup.model_validate_json(message['reply_markup'])
+                              if message['reply_markup'] else None)
+            )
+            for message in messages
+        ))
+
+        delivered = []
+        failed = []
+        for message, result in zip(messages, results):
+            if result.ok:
+                delivered.append(message['id'])
+                continue
+
+            attempts = message['attempts'] + 1
+            if result.retryable and attempts < self.max_attempts:
+                next_attempt_at = self._next_attempt_at(attempts)
+                logger.warning(
+                    f"Outbox message {message['id']} to {message['chat_id']} failed "
+                    f"(attempt {attempts}), retrying later: {result.error}"
+                )
+            else:
+                next_attempt_at = None
+                logger.error(
+                    f"Outbox message {message['id']} to {message['chat_id']} given up "
+                    f"after {attempts} attempts: {result.error}"
+                )
+            failed.append((message['id'], next_attempt_at, result.error))
+
+        await self.database.finish_messages(delivered, failed)
+        return len(messages)
+
+    async def close(self):
+        """Stop after the current round, so its outcome is recorded"""
+        if self._task is None:
+            return
+        self._closing = True
+        self.wake()
+        await self._task
+        self._task = None
+
+
+outbox = OutboxDispatcher()
+
+
+async def notify_admins(text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+    """Queue a message to every admin in the outbox and have it delivered right away"""
+    await async_db.enqueue_messages(admin_messages(text, reply_markup))
+    outbox.wake()
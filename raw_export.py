@@ -0,0 +1,71 @@
+"""
+Raw row export utility for INEX CONSULTING Bot
+Streams registrations to gzip-compressed CSV or JSONL for downstream tooling
+"""
+import csv
+import gzip
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterable
+
+# Registration columns joined with the user's Telegram profile
+FIELDS = [
+    'id', 'user_id', 'username', 'first_name', 'last_name',
+    'fullname', 'phone', 'address', 'company', 'meeting_date', 'created_at'
+]
+
+
+def _open_gzip_text(output: BinaryIO) -> io.TextIOWrapper:
+    """
+    Text stream compressed into output
+
+    The text layer batches small writes before they reach zlib. Closing
+    it finishes the gzip member but leaves output open.
+    """
+    compressed = gzip.GzipFile(fileobj=output, mode='wb')
+    return io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+
+
+def write_registrations_csv(registrations: Iterable[Dict[str, Any]], output: BinaryIO) -> int:
+    """
+    Stream registrations into a gzip-compressed UTF-8 CSV file
+
+    Rows are compressed as they are pulled from the iterable, so memory
+    stays flat apart from the compressed output itself.
+
+    Args:
+        registrations: Iterable of registration dictionaries (e.g. a database cursor iterator)
+        output: Binary file-like object
+
+    Returns:
+        Number of registrations written
+    """
+    count = 0
+    with _open_gzip_text(output) as text:
+        writer = csv.DictWriter(text, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for count, registration in enumerate(registrations, start=1):
+            writer.writerow(registration)
+
+    return count
+
+
+def write_registrations_jsonl(registrations: Iterable[Dict[str, Any]], output: BinaryIO) -> int:
+    """
+    Stream registrations into a gzip-compressed JSON Lines file (one object per line)
+
+    Args:
+        registrations: Iterable of registration dictionaries
+        output: Binary file-like object
+
+    Returns:
+        Number of registrations written
+    """
+    count = 0
+    with _open_gzip_text(output) as text:
+        for count, registration in enumerate(registrations, start=1):
+            row = {field: registration.get(field) for field in FIELDS}
+            text.write(json.dumps(row, ensure_ascii=False))
+            text.write('\n')
+
+    return count
@@ -22,3 +22,4 @@ class AdminStates(StatesGroup):
     removing_date = State()
     viewing_registrations = State()
     replying_to_user = State()
+    entering_broadcast = State()
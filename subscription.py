@@ -0,0 +1,120 @@
+"""
+Channel membership checks for INEX CONSULTING Bot
+Caches get_chat_member results so most checks need no Bot API call
+"""
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+from aiogram import Bot
+from aiogram.types import Chat
+
+from cache import TTLCache, MISSING
+from config import (
+    CHANNEL_ID,
+    CHANNEL_MEMBER_UPDATES,
+    SUBSCRIPTION_CACHE_TTL,
+    SUBSCRIPTION_NEGATIVE_TTL,
+    SUBSCRIPTION_CACHE_SIZE
+)
+from database import AsyncDatabase, async_db
+
+logger = logging.getLogger(__name__)
+
+# Chat member statuses that count as subscribed
+SUBSCRIBED_STATUSES = ('member', 'administrator', 'creator')
+
+
+class MembershipChecker:
+    """
+    Cached channel membership lookups (event loop only)
+
+    Members are cached for `ttl` seconds and non-members for the shorter
+    `negative_ttl`, so a user who has just joined is not kept out for long.
+    Concurrent checks for one user share a single get_chat_member request.
+    Errors are not cached and reach the caller.
+
+    With `local` set, chat_member updates keep the channel_members table
+    current (see handlers/channel.py): a cache miss is answered from the
+    table and only users the bot has never seen are asked from the API.
+    """
+
+    def __init__(self, chat_id=CHANNEL_ID, ttl: float = SUBSCRIPTION_CACHE_TTL,
+                 negative_ttl: float = SUBSCRIPTION_NEGATIVE_TTL, maxsize: int = SUBSCRIPTION_CACHE_SIZE,
+                 database: AsyncDatabase = async_db, local: bool = CHANNEL_MEMBER_UPDATES):
+        self.chat_id = chat_id
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.database = database
+        self.local = local
+        self._in_flight: Dict[Tuple[int, bool], asyncio.Future] = {}
+
+    def is_channel(self, chat: Chat) -> bool:
+        """Check that chat is the checked channel (CHANNEL_ID is an id or an @username)"""
+        if str(self.chat_id).startswith('@'):
+            return (chat.username or '').lower() == str(self.chat_id)[1:].lower()
+        return chat.id == int(self.chat_id)
+
+    async def is_subscribed(self, bot: Bot, user_id: int, force: bool = False) -> bool:
+        """
+        Check that user is a channel member
+
+        Args:
+            force: Ask the API, skipping the cache and the local table
+                (the user says they have just subscribed)
+        """
+        if not force:
+            cached = self.cache.get(user_id)
+            if cached is not MISSING:
+                return cached
+
+        key = (user_id, force)
+        request = self._in_flight.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._fetch(bot, user_id, force))
+            self._in_flight[key] = request
+            request.add_done_callback(lambda done: self._forget(key, done))
+
+        # One waiter giving up must not cancel the request for the others
+        return await asyncio.shield(request)
+
+    def set(self, user_id: int, subscribed: bool):
+        """Store a known membership state"""
+        self.cache.set(user_id, subscribed, None if subscribed else self.negative_ttl)
+
+    def invalidate(self, user_id: int):
+        """Forget the cached state of user"""
+        self.cache.invalidate(user_id)
+
+    async def update(self, user_id: int, status: str):
+        """Record a member status reported by a chat_member update"""
+        self.set(user_id, status in SUBSCRIBED_STATUSES)
+        if self.local:
+            await self.database.set_channel_member_status(user_id, status)
+
+    def _forget(self, key: Tuple[int, bool], request: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # Mark the error as retrieved even if every waiter was cancelled
+        if not request.cancelled():
+            request.exception()
+
+    async def _fetch(self, bot: Bot, user_id: int, force: bool) -> bool:
+        if self.local and not force:
+            status = await self.database.get_channel_member_status(user_id)
+            if status is not None:
+                subscribed = status in SUBSCRIBED_STATUSES
+                self.set(user_id, subscribed)
+                return subscribed
+
+        member = await bot.get_chat_member(chat_id=self.chat_id, user_id=user_id)
+        subscribed = member.status in SUBSCRIBED_STATUSES
+        logger.info(f"User {user_id} channel status: {member.status}")
+
+        self.set(user_id, subscribed)
+        if self.local:
+            # Seed the table; later changes arrive as chat_member updates
+            await self.database.set_channel_member_status(user_id, member.status)
+        return subscribed
+
+
+membership = MembershipChecker()
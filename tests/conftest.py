@@ -0,0 +1,32 @@
+"""
+Test setup: import the bot modules from the repository root and keep the
+module-level database instance away from the real inex_bot.db
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault('DB_PATH', os.path.join(tempfile.mkdtemp(prefix='inex_bot_tests_'), 'inex_bot.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh database of its own for each test"""
+    from database import Database
+
+    database = Database(str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def async_database(database):
+    """Awaitable facade over the test database"""
+    from database import AsyncDatabase
+
+    async_database = AsyncDatabase(database)
+    yield async_database
+    async_database.executor.shutdown(wait=True)
@@ -0,0 +1,164 @@
+"""
+Broadcasts: every reachable user once, resumed after a restart, stopped or failed cleanly
+"""
+import asyncio
+
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from broadcasts import Broadcaster
+from notifications import Notifier
+from texts import get_text
+
+ADMIN_ID = 100
+USERS = [1, 2, 3, 4, 5]
+TEXTS = {'uz': 'Salom', 'ru': 'Привет'}
+
+
+class FakeBot:
+    def __init__(self, blocked=(), on_send=None):
+        self.blocked = set(blocked)
+        self.on_send = on_send
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.on_send is not None:
+            self.on_send(chat_id)
+        if chat_id in self.blocked:
+            method = SendMessage(chat_id=chat_id, text=text)
+            raise TelegramForbiddenError(method, 'Forbidden: bot was blocked by the user')
+        self.sent.append((chat_id, text))
+
+
+def broadcaster(async_database, **kwargs):
+    sender = Notifier(global_rate=1000, chat_rate=1000)
+    return Broadcaster(async_database, sender, batch_size=2, retry_delay=0.001, **kwargs)
+
+
+def add_users(database):
+    with database.write() as conn:
+        conn.executemany(
+            'INSERT INTO users (user_id, language) VALUES (?, ?)',
+            [(user_id, 'ru' if user_id % 2 else 'uz') for user_id in USERS]
+        )
+
+
+def recipients(bot):
+    return sorted(chat_id for chat_id, _ in bot.sent)
+
+
+def test_broadcast_reaches_every_user_once(database, async_database):
+    add_users(database)
+    bot = FakeBot(blocked={3})
+    engine = broadcaster(async_database)
+
+    async def run():
+        broadcast = await engine.start(bot, ADMIN_ID, TEXTS)
+        await engine.wait()
+        return broadcast
+
+    broadcast = asyncio.run(run())
+    assert recipients(bot) == [1, 2, 4, 5]
+    assert (1, 'Привет') in bot.sent and (2, 'Salom') in bot.sent
+    assert database.get_broadcast(broadcast['id'])['status'] == 'done'
+    assert (broadcast['sent'], broadcast['blocked']) == (4, 1)
+    # Users who blocked the bot are skipped by later broadcasts
+    assert database.get_user(3)['is_blocked'] == 1
+
+
+def test_closed_broadcast_resumes_after_the_saved_page(database, async_database):
+    add_users(database)
+    engine = broadcaster(async_database)
+    closing = []
+
+    def close_on_first_send(chat_id):
+        # Shutdown while the first page is being sent
+        if not closing:
+            closing.append(asyncio.ensure_future(engine.close()))
+
+    first_bot = FakeBot(on_send=close_on_first_send)
+
+    async def run_until_closed():
+        broadcast = await engine.start(first_bot, ADMIN_ID, TEXTS)
+        await engine.wait()
+        await asyncio.gather(*closing)
+        return broadcast
+
+    broadcast = asyncio.run(run_until_closed())
+    stored = database.get_broadcast(broadcast['id'])
+    assert recipients(first_bot) == [1, 2]
+    assert stored['status'] == 'running' and stored['last_user_id'] == 2
+
+    # After a restart the broadcast continues with the next page
+    second_bot = FakeBot()
+    restarted = broadcaster(async_database)
+
+    async def resume():
+        await restarted.resume(second_bot)
+        await restarted.wait()
+
+    asyncio.run(resume())
+    assert recipients(second_bot) == [3, 4, 5]
+    stored = database.get_broadcast(broadcast['id'])
+    assert stored['status'] == 'done' and stored['sent'] == 5
+
+
+def test_stopped_broadcast_is_cancelled_after_the_page(database, async_database):
+    add_users(database)
+    engine = broadcaster(async_database)
+    bot = FakeBot(on_send=lambda chat_id: engine.stop(engine.current['id']))
+
+    async def run():
+        broadcast = await engine.start(bot, ADMIN_ID, TEXTS)
+        await engine.wait()
+        return broadcast
+
+    broadcast = asyncio.run(run())
+    assert recipients(bot) == [1, 2]
+    assert database.get_broadcast(broadcast['id'])['status'] == 'cancelled'
+
+
+def test_only_one_broadcast_runs_at_a_time(database, async_database):
+    add_users(database)
+    engine = broadcaster(async_database)
+    bot = FakeBot()
+
+    async def run():
+        first = await engine.start(bot, ADMIN_ID, TEXTS)
+        second = await engine.start(bot, ADMIN_ID, TEXTS)
+        await engine.wait()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is not None and second is None
+
+    # Refused by the database as well while a broadcast is running
+    with database.write() as conn:
+        conn.execute("UPDATE broadcasts SET status = 'running' WHERE id = ?", (first['id'],))
+    assert database.create_broadcast(ADMIN_ID, '{}') is None
+
+
+def test_failing_database_marks_broadcast_failed(database, async_database, monkeypatch):
+    add_users(database)
+    with database.write() as conn:
+        conn.execute("INSERT INTO users (user_id, language) VALUES (?, 'ru')", (ADMIN_ID,))
+    engine = broadcaster(async_database, max_attempts=2)
+    bot = FakeBot()
+
+    async def broken_save(*args):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(async_database, 'save_broadcast_progress', broken_save)
+
+    async def run():
+        broadcast = await engine.start(bot, ADMIN_ID, TEXTS)
+        await engine.wait()
+        return broadcast
+
+    broadcast = asyncio.run(run())
+    assert broadcast['status'] == 'failed'
+    assert database.get_broadcast(broadcast['id'])['status'] == 'failed'
+    assert database.get_running_broadcast() is None
+    # The admin who started it is told
+    failed_text = get_text('broadcast_failed', 'ru', total=6, sent=0, failed=0, blocked=0, remaining=6)
+    assert bot.sent[-1] == (ADMIN_ID, failed_text)
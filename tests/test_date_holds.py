@@ -0,0 +1,59 @@
+"""
+Date holds: one user at a time may hold a date, and only the holder can register it
+"""
+DATE = '01.01.2030'
+
+
+def register(database, user_id, date=DATE):
+    return database.add_registration(user_id, 'Full Name', '+998901234567', 'Toshkent', 'INEX', date)
+
+
+def test_held_date_is_taken_for_others(database):
+    database.add_meeting_date(DATE)
+
+    assert database.reserve_date(DATE, 1)
+    assert not database.reserve_date(DATE, 2)
+
+    snapshot = database.get_meeting_dates_snapshot()
+    assert snapshot.dates_for(1) == ((DATE, False),)
+    assert snapshot.dates_for(2) == ((DATE, True),)
+
+
+def test_only_the_holder_can_register(database):
+    database.add_meeting_date(DATE)
+    database.reserve_date(DATE, 1)
+
+    assert register(database, 2).registration_id is None
+    assert register(database, 1).registration_id is not None
+    # Registered dates cannot be held or registered again, even by the same user
+    assert not database.reserve_date(DATE, 1)
+    assert register(database, 1).registration_id is None
+
+
+def test_holding_another_date_releases_the_first(database):
+    database.add_meeting_date(DATE)
+    database.add_meeting_date('02.01.2030')
+
+    database.reserve_date(DATE, 1)
+    database.reserve_date('02.01.2030', 1)
+
+    assert database.reserve_date(DATE, 2)
+
+
+def test_expired_hold_can_be_taken(database):
+    database.add_meeting_date(DATE)
+    database.reserve_date(DATE, 1, ttl=0)
+
+    assert database.reserve_date(DATE, 2)
+    assert register(database, 1).registration_id is None
+    assert register(database, 2).registration_id is not None
+
+
+def test_date_removed_while_held_is_unavailable(database):
+    database.add_meeting_date(DATE)
+    database.reserve_date(DATE, 1)
+    database.delete_meeting_date(DATE)
+
+    result = register(database, 1)
+    assert result.registration_id is None
+    assert result.date_unavailable
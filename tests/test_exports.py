@@ -0,0 +1,58 @@
+"""
+Split exports: oversized files are halved until every part fits the size limit
+"""
+import gzip
+import io
+import json
+import os
+import zipfile
+
+import exports
+
+ROWS = 300
+
+
+def add_registrations(database, count=ROWS):
+    # Random text does not compress, so the files really grow with the rows
+    with database.write() as conn:
+        conn.executemany(
+            'INSERT INTO registrations (user_id, fullname, phone, address, company, meeting_date) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(number, os.urandom(32).hex(), '+998901234567', 'Toshkent', 'INEX', f'date {number}')
+             for number in range(1, count + 1)]
+        )
+
+
+def exported_ids(files):
+    """Registration ids in the export files, unpacking a zip of parts"""
+    parts = []
+    for file in files:
+        if file.filename.endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(file.data)) as archive:
+                parts.extend(archive.read(name) for name in archive.namelist())
+        else:
+            parts.append(file.data)
+    return [json.loads(line)['id'] for part in parts for line in gzip.decompress(part).splitlines()]
+
+
+def test_small_export_is_one_file(database):
+    add_registrations(database)
+
+    result = exports.build_export(database, 'jsonl')
+    assert len(result.files) == 1 and result.files[0].filename.endswith('.jsonl.gz')
+    assert result.row_count == ROWS and result.last_id == ROWS
+
+
+def test_large_export_is_halved_into_parts(database, monkeypatch):
+    add_registrations(database)
+    whole = exports.build_export(database, 'jsonl').files[0]
+    limit = len(whole.data) // 5
+    monkeypatch.setattr(exports, 'EXPORT_MAX_BYTES', limit)
+
+    result = exports.build_export(database, 'jsonl')
+    assert all(len(file.data) <= limit for file in result.files)
+    assert len(result.files) > 1
+    # Every registration exactly once
+    ids = exported_ids(result.files)
+    assert sorted(ids) == list(range(1, ROWS + 1))
+    assert result.row_count == ROWS and result.last_id == ROWS
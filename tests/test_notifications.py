@@ -0,0 +1,71 @@
+"""
+Rate-limited sending: flood control, transient errors and blocked users
+"""
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from notifications import Notifier
+
+
+class FakeBot:
+    """Raises the queued errors in turn, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+METHOD = SendMessage(chat_id=1, text='x')
+
+
+def fast_notifier(**kwargs):
+    return Notifier(global_rate=1000, chat_rate=1000, retry_delay=0.001, **kwargs)
+
+
+def test_retry_after_waits_once():
+    bot = FakeBot(TelegramRetryAfter(METHOD, 'Flood control exceeded', retry_after=0.2))
+
+    async def send():
+        started = time.monotonic()
+        result = await fast_notifier().send(bot, 1, 'x')
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(send())
+    assert result.ok and result.attempts == 2
+    # The paused buckets hold the retry back; no extra sleep on top of them
+    assert 0.2 <= elapsed < 0.35
+
+
+def test_network_errors_are_retried_then_reported():
+    bot = FakeBot(*(TelegramNetworkError(METHOD, 'timeout') for _ in range(3)))
+
+    result = asyncio.run(fast_notifier(max_attempts=3).send(bot, 1, 'x'))
+    assert not result.ok and result.retryable and result.attempts == 3
+
+    result = asyncio.run(fast_notifier(max_attempts=3).send(bot, 1, 'x'))
+    assert result.ok and bot.sent == [(1, 'x')]
+
+
+def test_blocked_user_is_not_retried():
+    bot = FakeBot(TelegramForbiddenError(METHOD, 'Forbidden: bot was blocked by the user'))
+
+    result = asyncio.run(fast_notifier().send(bot, 1, 'x'))
+    assert result.blocked and not result.retryable and result.attempts == 1
+
+
+def test_concurrent_sends_report_every_chat():
+    bot = FakeBot()
+    notifier = fast_notifier()
+
+    async def send():
+        return await asyncio.gather(*(notifier.send(bot, chat_id, 'x') for chat_id in range(5)))
+
+    assert [(result.chat_id, result.ok) for result in asyncio.run(send())] == [(i, True) for i in range(5)]
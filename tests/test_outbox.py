@@ -0,0 +1,97 @@
+"""
+Outbox delivery: delivered messages are deleted, failed ones retried, then given up
+"""
+import asyncio
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError
+from aiogram.methods import SendMessage
+
+from database import OutboxMessage
+from notifications import Notifier, OutboxDispatcher
+
+METHOD = SendMessage(chat_id=1, text='x')
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((chat_id, text))
+
+
+def dispatcher(async_database, **kwargs):
+    # One send attempt per round, rounds retried at once (retry_delay=0)
+    sender = Notifier(global_rate=1000, chat_rate=1000, max_attempts=1)
+    return OutboxDispatcher(async_database, sender, max_attempts=3, retry_delay=0, **kwargs)
+
+
+def outbox_rows(database):
+    with database.read() as conn:
+        return [dict(row) for row in conn.execute('SELECT * FROM outbox ORDER BY id')]
+
+
+def test_delivered_messages_are_deleted(database, async_database):
+    database.enqueue_messages([OutboxMessage(1, 'a'), OutboxMessage(2, 'b')])
+    bot = FakeBot()
+
+    assert asyncio.run(dispatcher(async_database).dispatch(bot)) == 2
+    assert sorted(bot.sent) == [(1, 'a'), (2, 'b')]
+    assert outbox_rows(database) == []
+
+
+def test_failed_message_is_retried_then_given_up(database, async_database):
+    database.enqueue_messages([OutboxMessage(1, 'a')])
+    bot = FakeBot(TelegramNetworkError(METHOD, 'timeout'))
+    outbox = dispatcher(async_database)
+
+    asyncio.run(outbox.dispatch(bot))
+    [row] = outbox_rows(database)
+    assert row['attempts'] == 1 and row['next_attempt_at'] is not None and 'timeout' in row['last_error']
+
+    asyncio.run(outbox.dispatch(bot))
+    asyncio.run(outbox.dispatch(bot))
+    [row] = outbox_rows(database)
+    assert row['attempts'] == 3 and row['next_attempt_at'] is None
+    assert database.count_failed_messages() == 1
+
+    # Given-up messages are not sent again
+    bot.error = None
+    assert asyncio.run(outbox.dispatch(bot)) == 0
+    assert bot.sent == []
+
+
+def test_recovered_message_is_delivered(database, async_database):
+    database.enqueue_messages([OutboxMessage(1, 'a')])
+    bot = FakeBot(TelegramNetworkError(METHOD, 'timeout'))
+    outbox = dispatcher(async_database)
+
+    asyncio.run(outbox.dispatch(bot))
+    bot.error = None
+    asyncio.run(outbox.dispatch(bot))
+
+    assert bot.sent == [(1, 'a')]
+    assert outbox_rows(database) == []
+
+
+def test_undeliverable_message_is_given_up_at_once(database, async_database):
+    database.enqueue_messages([OutboxMessage(1, 'a')])
+    bot = FakeBot(TelegramForbiddenError(METHOD, 'Forbidden: bot was blocked by the user'))
+
+    asyncio.run(dispatcher(async_database).dispatch(bot))
+    [row] = outbox_rows(database)
+    assert row['attempts'] == 1 and row['next_attempt_at'] is None
+
+
+def test_old_given_up_messages_are_purged(database):
+    database.enqueue_messages([OutboxMessage(1, 'old'), OutboxMessage(2, 'new')])
+    old, new = (row['id'] for row in outbox_rows(database))
+    database.finish_messages([], [(old, None, 'error'), (new, None, 'error')])
+    with database.write() as conn:
+        conn.execute("UPDATE outbox SET created_at = '2000-01-01 00:00:00' WHERE id = ?", (old,))
+
+    assert database.purge_failed_messages(keep=24 * 60 * 60) == 1
+    assert [row['text'] for row in outbox_rows(database)] == ['new']
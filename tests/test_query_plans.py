@@ -0,0 +1,32 @@
+"""
+Every query in database.py must be served by an index
+"""
+import sqlite3
+
+from database import Database
+from migrations import find_full_scans
+
+
+def test_every_query_uses_an_index(tmp_path):
+    database = Database(str(tmp_path / 'plans.db'))
+    try:
+        assert database.check_query_plans() == []
+    finally:
+        database.close()
+
+
+def test_unbounded_index_walk_is_a_full_scan():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (a INTEGER, b TEXT)')
+    conn.execute('CREATE INDEX idx_t_a ON t (a)')
+    queries = {
+        'count': ('SELECT COUNT(*) FROM t', ()),
+        'table_scan': ('SELECT * FROM t WHERE b = ?', ('',)),
+        'lookup': ('SELECT * FROM t WHERE a = ?', (0,)),
+        'first_page': ('SELECT a FROM t ORDER BY a LIMIT ?', (10,)),
+        'no_limit': ('SELECT a FROM t ORDER BY a LIMIT ?', (-1,)),
+        'first_row': ('SELECT a FROM t ORDER BY a LIMIT 1', ()),
+    }
+
+    assert [name for name, _ in find_full_scans(conn, queries)] == ['count', 'table_scan', 'no_limit']
+    assert [name for name, _ in find_full_scans(conn, queries, {'count', 'no_limit'})] == ['table_scan']
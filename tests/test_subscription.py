@@ -0,0 +1,64 @@
+"""
+Channel membership checks: one API request per user however many ask at once
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from subscription import MembershipChecker
+
+
+class FakeBot:
+    def __init__(self, status='member', error=None):
+        self.status = status
+        self.error = error
+        self.calls = 0
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(status=self.status)
+
+
+def test_concurrent_checks_share_one_request():
+    bot = FakeBot()
+    checker = MembershipChecker(local=False)
+
+    async def check():
+        results = await asyncio.gather(*(checker.is_subscribed(bot, 1) for _ in range(10)))
+        # Answered from the cache afterwards
+        results.append(await checker.is_subscribed(bot, 1))
+        return results
+
+    assert asyncio.run(check()) == [True] * 11
+    assert bot.calls == 1
+
+
+def test_force_skips_the_cache():
+    bot = FakeBot(status='left')
+    checker = MembershipChecker(local=False)
+
+    async def check():
+        first = await checker.is_subscribed(bot, 1)
+        bot.status = 'member'
+        return first, await checker.is_subscribed(bot, 1), await checker.is_subscribed(bot, 1, force=True)
+
+    assert asyncio.run(check()) == (False, False, True)
+    assert bot.calls == 2
+
+
+def test_errors_are_not_cached():
+    bot = FakeBot(error=RuntimeError('network'))
+    checker = MembershipChecker(local=False)
+
+    async def check():
+        with pytest.raises(RuntimeError):
+            await checker.is_subscribed(bot, 1)
+        bot.error = None
+        return await checker.is_subscribed(bot, 1)
+
+    assert asyncio.run(check()) is True
+    assert bot.calls == 2
@@ -0,0 +1,55 @@
+"""
+Buffered user writes: visible at once, stored on flush, kept when a flush fails
+"""
+import sqlite3
+
+import pytest
+
+
+def stored_user(database, user_id):
+    with database.read() as conn:
+        row = conn.execute('SELECT * FROM users WHERE user_id = ?', (user_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def test_flush_stores_buffered_user(database):
+    database.add_user(1, 'user', language='ru')
+
+    assert database.get_user(1)['language'] == 'ru'
+    assert stored_user(database, 1) is None
+
+    assert database.flush_user_writes() == 1
+    assert stored_user(database, 1)['username'] == 'user'
+    assert database.flush_user_writes() == 0
+
+
+def test_failed_flush_is_retried(database, monkeypatch):
+    database.add_user(1, 'user')
+
+    def broken_write():
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(database, 'write', broken_write)
+    with pytest.raises(sqlite3.OperationalError):
+        database.flush_user_writes()
+    monkeypatch.undo()
+
+    # A change made after the failed flush wins over the retried one
+    database.set_user_language(1, 'ru')
+    assert database.flush_user_writes() == 1
+    assert stored_user(database, 1)['language'] == 'ru'
+
+
+def test_activity_does_not_create_users(database):
+    database.touch_user(1)
+    database.set_user_language(1, 'ru')
+
+    assert database.get_user(1) is None
+    database.flush_user_writes()
+    assert stored_user(database, 1) is None
+
+    database.add_user(1, 'user')
+    database.flush_user_writes()
+    database.touch_user(1)
+    database.flush_user_writes()
+    assert stored_user(database, 1)['last_seen_at'] is not None
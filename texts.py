@@ -82,6 +82,11 @@ Quyidagi mavjud sanalardan birini tanlang:""",
         'ru': "❌ Извините, эта дата уже занята. Пожалуйста, выберите другую дату."
     },
 
+    'date_unavailable': {
+        'uz': "❌ Kechirasiz, bu sana endi mavjud emas. Iltimos, boshqa sanani tanlang.",
+        'ru': "❌ Извините, эта дата больше недоступна. Пожалуйста, выберите другую дату."
+    },
+
     # User information collection
     'ask_fullname': {
         'uz': """👤 Ism va familiyangizni kiriting:
@@ -288,6 +293,16 @@ DD.MM.YYYY HH:MM
         'ru': "📋 Список регистраций ({count} шт.):"
     },
 
+    'prev_page': {
+        'uz': "⬅️ Oldingi",
+        'ru': "⬅️ Предыдущая"
+    },
+
+    'next_page': {
+        'uz': "Keyingi ➡️",
+        'ru': "Следующая ➡️"
+    },
+
     'registration_item': {
         'uz': """
 ━━━━━━━━━━━━━━━━━
@@ -399,19 +414,23 @@ Tez orada javob berishadi.""",
     'export_confirm': {
         'uz': """📊 Excel yuklab olish
 
-Siz ro'yxatlarni Excel faylga yuklab olmoqchisiz.
+Siz ro'yxatlarni faylga yuklab olmoqchisiz.
+📄 Formatni tanlang: Excel yoki katta hajm uchun siqilgan CSV/JSONL
 
 Bu amalni bajarilgandan so'ng:
-✅ Barcha ro'yxatlar Excel faylga yuklanadi
+✅ Barcha ro'yxatlar faylga yuklanadi
+🆕 Yoki faqat oxirgi yuklab olishdan keyingi yangi ro'yxatlar
 💾 Baza saqlanib qoladi (o'chirilmaydi)
 
 Davom etasizmi?""",
         'ru': """📊 Экспорт в Excel
 
-Вы хотите скачать регистрации в Excel.
+Вы хотите скачать регистрации в файл.
+📄 Выберите формат: Excel или сжатый CSV/JSONL для больших объёмов
 
 После выполнения этой операции:
-✅ Все регистрации будут выгружены в Excel
+✅ Все регистрации будут выгружены в файл
+🆕 Или только новые с момента последней выгрузки
 💾 База данных сохранится (не удалится)
 
 Продолжить?"""
@@ -422,9 +441,54 @@ Davom etasizmi?""",
         'ru': "✅ Да, продолжить"
     },
 
+    'confirm_export_new': {
+        'uz': "🆕 Faqat yangilari",
+        'ru': "🆕 Только новые"
+    },
+
+    'no_new_data_to_export': {
+        'uz': "❌ Oxirgi yuklab olishdan keyin yangi ro'yxatlar yo'q!",
+        'ru': "❌ Новых регистраций с последней выгрузки нет!"
+    },
+
+    'export_format_xlsx': {
+        'uz': "📊 Excel",
+        'ru': "📊 Excel"
+    },
+
+    'export_format_csv': {
+        'uz': "📄 CSV.gz",
+        'ru': "📄 CSV.gz"
+    },
+
+    'export_format_jsonl': {
+        'uz': "🧾 JSONL.gz",
+        'ru': "🧾 JSONL.gz"
+    },
+
     'export_processing': {
-        'uz': "⏳ Excel fayl tayyorlanmoqda...",
-        'ru': "⏳ Подготовка Excel файла..."
+        'uz': "⏳ Fayl tayyorlanmoqda...",
+        'ru': "⏳ Подготовка файла..."
+    },
+
+    'export_progress': {
+        'uz': "⏳ Fayl tayyorlanmoqda...\n\n📊 {rows} ta ro'yxat yozildi",
+        'ru': "⏳ Подготовка файла...\n\n📊 Записано регистраций: {rows}"
+    },
+
+    'export_cancelled': {
+        'uz': "🚫 Export bekor qilindi.",
+        'ru': "🚫 Экспорт отменён."
+    },
+
+    'export_already_running': {
+        'uz': "⏳ Bu export allaqachon tayyorlanmoqda.",
+        'ru': "⏳ Этот экспорт уже готовится."
+    },
+
+    'export_not_running': {
+        'uz': "Bu export allaqachon tugagan.",
+        'ru': "Этот экспорт уже завершён."
     },
 
     'export_success': {
@@ -454,6 +518,271 @@ Baza tozalandi!""",
         'ru': "❌ Ошибка при создании Excel файла!"
     },
 
+    # Statistics
+    'statistics': {
+        'uz': "📈 Statistika",
+        'ru': "📈 Статистика"
+    },
+
+    'refresh': {
+        'uz': "🔄 Yangilash",
+        'ru': "🔄 Обновить"
+    },
+
+    'stats_dashboard': {
+        'uz': """📈 Statistika
+
+📋 Joriy ro'yxatlar: {total}
+🗄 Arxivda: {archived}
+📅 Band qilingan sanalar: {booked_dates}
+👥 Faol foydalanuvchilar (24 soat): {active_users}
+📮 Yetkazilmagan bildirishnomalar: {failed_notifications}
+
+📍 Viloyatlar bo'yicha:
+{regions}
+
+🗓 So'nggi {days} kun (yangi ro'yxatlar):
+{daily}
+
+⚡️ Kesh: {cache_size} ta, samaradorlik {cache_hit_rate}%
+{fsm}""",
+        'ru': """📈 Статистика
+
+📋 Текущих регистраций: {total}
+🗄 В архиве: {archived}
+📅 Занятых дат: {booked_dates}
+👥 Активных пользователей (24 часа): {active_users}
+📮 Недоставленных уведомлений: {failed_notifications}
+
+📍 По областям:
+{regions}
+
+🗓 Последние {days} дней (новые регистрации):
+{daily}
+
+⚡️ Кэш: {cache_size} шт., попаданий {cache_hit_rate}%
+{fsm}"""
+    },
+
+    'stats_fsm_sqlite': {
+        'uz': "📝 Ochiq anketalar: {keys} ta (bazada), yozilishini kutmoqda: {pending}",
+        'ru': "📝 Незавершённые анкеты: {keys} (в базе), ожидают записи: {pending}"
+    },
+
+    'stats_fsm_memory': {
+        'uz': "📝 Ochiq anketalar: {keys} ta (xotirada, ~{kb} KB), chiqarilgan: {evictions}, muddati o'tgan: {expirations}",
+        'ru': "📝 Незавершённые анкеты: {keys} (в памяти, ~{kb} КБ), вытеснено: {evictions}, истекло: {expirations}"
+    },
+
+    'stats_line': {
+        'uz': "  • {name}: {count}",
+        'ru': "  • {name}: {count}"
+    },
+
+    'stats_none': {
+        'uz': "  —",
+        'ru': "  —"
+    },
+
+    # Search
+    'search_registrations': {
+        'uz': "🔍 Qidirish",
+        'ru': "🔍 Поиск"
+    },
+
+    'find_usage': {
+        'uz': "ℹ️ Foydalanish: /find matn\n\nIsm, telefon, kompaniya yoki manzil bo'yicha qidiriladi.",
+        'ru': "ℹ️ Использование: /find текст\n\nПоиск по имени, телефону, компании или адресу."
+    },
+
+    'find_results': {
+        'uz': "🔍 «{query}» bo'yicha topildi: {count} ta",
+        'ru': "🔍 Найдено по запросу «{query}»: {count}"
+    },
+
+    'find_empty': {
+        'uz': "❌ «{query}» bo'yicha hech narsa topilmadi.",
+        'ru': "❌ По запросу «{query}» ничего не найдено."
+    },
+
+    # Archive
+    'archive': {
+        'uz': "🗄 Arxiv",
+        'ru': "🗄 Архив"
+    },
+
+    'archive_info': {
+        'uz': """🗄 Arxiv
+
+📦 Arxivdagi ro'yxatlar: {archived}
+📋 Joriy ro'yxatlar: {current}
+
+O'tgan sanalardagi ro'yxatlar avtomatik ravishda arxivga o'tkaziladi.
+🔍 Sana bo'yicha ko'rish: /archive KK.OO.YYYY""",
+        'ru': """🗄 Архив
+
+📦 Регистраций в архиве: {archived}
+📋 Текущих регистраций: {current}
+
+Регистрации на прошедшие даты автоматически переносятся в архив.
+🔍 Просмотр по дате: /archive ДД.ММ.ГГГГ"""
+    },
+
+    'export_archive': {
+        'uz': "📥 Arxivni yuklab olish",
+        'ru': "📥 Скачать архив"
+    },
+
+    'archive_empty': {
+        'uz': "❌ Arxiv bo'sh!",
+        'ru': "❌ Архив пуст!"
+    },
+
+    'archive_usage': {
+        'uz': "ℹ️ Foydalanish: /archive KK.OO.YYYY",
+        'ru': "ℹ️ Использование: /archive ДД.ММ.ГГГГ"
+    },
+
+    'archive_date_empty': {
+        'uz': "❌ {date} sanasi uchun arxivda ro'yxatlar yo'q.",
+        'ru': "❌ В архиве нет регистраций на {date}."
+    },
+
+    'archive_date_list': {
+        'uz': "🗄 Arxiv: {date} ({count} ta):",
+        'ru': "🗄 Архив: {date} ({count} шт.):"
+    },
+
+    # Broadcasts
+    'broadcast': {
+        'uz': "📢 Xabar tarqatish",
+        'ru': "📢 Рассылка"
+    },
+
+    'broadcast_ask_text': {
+        'uz': "📢 Barcha foydalanuvchilarga yuboriladigan xabarni yozing:",
+        'ru': "📢 Напишите сообщение для всех пользователей:"
+    },
+
+    'broadcast_preview': {
+        'uz': "📢 Quyidagi xabar barcha foydalanuvchilarga yuboriladi:\n\n{text}",
+        'ru': "📢 Это сообщение получат все пользователи:\n\n{text}"
+    },
+
+    'broadcast_send': {
+        'uz': "✅ Yuborish",
+        'ru': "✅ Отправить"
+    },
+
+    'broadcast_stop': {
+        'uz': "⏹ To'xtatish",
+        'ru': "⏹ Остановить"
+    },
+
+    'broadcast_progress': {
+        'uz': """📢 Xabar yuborilmoqda...
+
+✅ Yuborildi: {sent}
+❌ Xatolik: {failed}
+🚫 Botni bloklagan: {blocked}
+⏳ Qoldi: {remaining} / {total}""",
+        'ru': """📢 Идёт рассылка...
+
+✅ Отправлено: {sent}
+❌ Ошибок: {failed}
+🚫 Заблокировали бота: {blocked}
+⏳ Осталось: {remaining} / {total}"""
+    },
+
+    'broadcast_done': {
+        'uz': """✅ Xabar tarqatish yakunlandi!
+
+✅ Yuborildi: {sent}
+❌ Xatolik: {failed}
+🚫 Botni bloklagan: {blocked}""",
+        'ru': """✅ Рассылка завершена!
+
+✅ Отправлено: {sent}
+❌ Ошибок: {failed}
+🚫 Заблокировали бота: {blocked}"""
+    },
+
+    'broadcast_cancelled': {
+        'uz': """🚫 Xabar tarqatish to'xtatildi.
+
+✅ Yuborildi: {sent}
+❌ Xatolik: {failed}
+🚫 Botni bloklagan: {blocked}
+⏳ Yuborilmadi: {remaining}""",
+        'ru': """🚫 Рассылка остановлена.
+
+✅ Отправлено: {sent}
+❌ Ошибок: {failed}
+🚫 Заблокировали бота: {blocked}
+⏳ Не отправлено: {remaining}"""
+    },
+
+    'broadcast_failed': {
+        'uz': """❌ Xabar tarqatish xatolik tufayli to'xtadi.
+
+✅ Yuborildi: {sent}
+❌ Xatolik: {failed}
+🚫 Botni bloklagan: {blocked}
+⏳ Yuborilmadi: {remaining}""",
+        'ru': """❌ Рассылка остановлена из-за ошибки.
+
+✅ Отправлено: {sent}
+❌ Ошибок: {failed}
+🚫 Заблокировали бота: {blocked}
+⏳ Не отправлено: {remaining}"""
+    },
+
+    'broadcast_already_running': {
+        'uz': "⏳ Boshqa xabar tarqatish hali tugamagan.",
+        'ru': "⏳ Предыдущая рассылка ещё не завершена."
+    },
+
+    'broadcast_stopping': {
+        'uz': "⏹ To'xtatilmoqda...",
+        'ru': "⏹ Останавливается..."
+    },
+
+    'broadcast_not_running': {
+        'uz': "Bu xabar tarqatish allaqachon tugagan.",
+        'ru': "Эта рассылка уже завершена."
+    },
+
+    'announce_dates': {
+        'uz': "📢 Foydalanuvchilarga xabar berish",
+        'ru': "📢 Сообщить пользователям"
+    },
+
+    'new_dates_announcement': {
+        'uz': "📅 Yangi uchrashuv sanalari qo'shildi:\n\n{dates}\n\nRo'yxatdan o'tish uchun /start ni bosing.",
+        'ru': "📅 Добавлены новые даты встреч:\n\n{dates}\n\nДля записи нажмите /start."
+    },
+
+    # Backups
+    'backup_processing': {
+        'uz': "⏳ Zaxira nusxa yaratilmoqda...",
+        'ru': "⏳ Создание резервной копии..."
+    },
+
+    'backup_caption': {
+        'uz': "💾 Baza zaxira nusxasi\n\n🕒 {created}\n📦 {size} KB",
+        'ru': "💾 Резервная копия базы\n\n🕒 {created}\n📦 {size} KB"
+    },
+
+    'backup_too_large': {
+        'uz': "❌ Zaxira nusxa Telegram orqali yuborish uchun juda katta.\nServerdagi fayl: {path}",
+        'ru': "❌ Резервная копия слишком большая для отправки через Telegram.\nФайл на сервере: {path}"
+    },
+
+    'backup_error': {
+        'uz': "❌ Zaxira nusxani yuborishda xatolik!",
+        'ru': "❌ Ошибка при отправке резервной копии!"
+    },
+
     'language_changed': {
         'uz': "✅ Til o'zgartirildi!",
         'ru': "✅ Язык изменен!"
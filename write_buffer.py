@@ -0,0 +1,57 @@
+"""
+Write-behind buffer for INEX CONSULTING Bot
+Coalesces pending row updates in memory until they are flushed
+"""
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+
+class WriteBuffer:
+    """
+    Thread-safe map of key -> pending column values
+
+    Repeated updates of the same key are merged, so a flush writes
+    each row once no matter how many times it changed. Updates taken
+    by a flush stay visible to get() until the flush is finished.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._flushing: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: Hashable, fields: Dict[str, Any]):
+        """Merge fields into the pending update for key"""
+        with self._lock:
+            self._pending.setdefault(key, {}).update(fields)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Get the not yet persisted fields for key"""
+        with self._lock:
+            if key not in self._pending and key not in self._flushing:
+                return None
+            fields = dict(self._flushing.get(key, {}))
+            fields.update(self._pending.get(key, {}))
+            return fields
+
+    def begin_flush(self) -> Dict[Hashable, Dict[str, Any]]:
+        """Take all pending updates for writing"""
+        with self._lock:
+            if self._flushing:
+                raise RuntimeError("Flush already in progress")
+            self._flushing, self._pending = self._pending, {}
+            return self._flushing
+
+    def end_flush(self, success: bool):
+        """Finish a flush; on failure the taken updates are pending again (newer values win)"""
+        with self._lock:
+            if not success:
+                for key, fields in self._flushing.items():
+                    merged = dict(fields)
+                    merged.update(self._pending.get(key, {}))
+                    self._pending[key] = merged
+            self._flushing = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)